@@ -41,3 +41,42 @@ exe = EXE(
     entitlements_file=None,
     icon=icon_path,
 )
+
+# Пакетный режим - отдельный консольный exe: у оконного exe нет консоли,
+# и вывод команд и ошибки разбора аргументов в cron или CI терялись бы
+cli = Analysis(
+    ['trader_cli.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=['PyQt5'],
+    noarchive=False,
+    optimize=0,
+)
+cli_pyz = PYZ(cli.pure)
+
+cli_exe = EXE(
+    cli_pyz,
+    cli.scripts,
+    cli.binaries,
+    cli.datas,
+    [],
+    name='TraderPlusEditorCli',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=True,
+    upx_exclude=[],
+    runtime_tmpdir=None,
+    console=True,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon=icon_path,
+)
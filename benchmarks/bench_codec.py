@@ -0,0 +1,57 @@
+"""Сравнение скорости чтения и записи больших конфигов разными JSON-кодеками.
+
+Для каждого доступного кодека проверяется, что записанный файл побайтно
+совпадает с json.dump(indent=4, ensure_ascii=False).
+
+Запуск: python benchmarks/bench_codec.py [--products 200000] [--seed 1]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from trader_io import CODECS  # noqa: E402
+from trader_store import decode_products  # noqa: E402
+from synthetic import make_general_config, make_price_config  # noqa: E402
+
+
+def best_of(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=200000)
+    parser.add_argument("--categories", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    configs = {
+        "price": make_price_config(args.products, args.categories, args.seed),
+        "general": make_general_config(2000, args.seed),
+    }
+    for name, config in configs.items():
+        reference = json.dumps(config, indent=4, ensure_ascii=False).encode('utf-8')
+        if name == "price":
+            decode_products(config)
+        print(f"{name}: {len(reference) / 1024 / 1024:.1f} МБ")
+        for codec_name, codec_class in CODECS.items():
+            codec = codec_class()
+            load_time, _ = best_of(lambda: codec.loads(reference))
+            save_time, data = best_of(lambda: codec.dumps(config))
+            status = "совпадает" if data == reference else "ОТЛИЧАЕТСЯ"
+            print(f"  {codec_name:8} чтение {load_time * 1000:8.1f} мс  запись {save_time * 1000:8.1f} мс  {status}")
+
+
+if __name__ == "__main__":
+    main()
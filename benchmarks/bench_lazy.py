@@ -0,0 +1,60 @@
+"""Замер загрузки файла цен: разбор всех товаров против отложенного разбора.
+
+Запуск: python benchmarks/bench_lazy.py [--products 100000] [--seed 1]
+Память считается через tracemalloc (только объекты Python).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from trader_store import ConfigDocument  # noqa: E402
+from synthetic import make_price_config  # noqa: E402
+
+
+def session(text, lazy):
+    """Типичная сессия: загрузка, одна открытая категория и один поиск"""
+    start = time.perf_counter()
+    document = ConfigDocument(json.loads(text), lazy=lazy)
+    loaded = time.perf_counter()
+    document.products(0)
+    document.search_products(document.products(0)[0].classname.lower())
+    touched = time.perf_counter()
+    return document, (loaded - start) * 1000, (touched - loaded) * 1000
+
+
+def measure(text, lazy):
+    document, load, touch = session(text, lazy)
+    decoded = document.decoded_count()
+    del document
+    # Память замеряется отдельным прогоном: tracemalloc замедляет выполнение
+    tracemalloc.start()
+    document = session(text, lazy)[0]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Документ держится до замера памяти; оба прогона разбирают одно и то же
+    assert document.decoded_count() == decoded
+    return load, touch, memory / 1e6, decoded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--categories", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    text = json.dumps(make_price_config(args.products, args.categories, args.seed))
+    for title, lazy in (("Полный разбор", False), ("Отложенный разбор", True)):
+        load, touch, memory, decoded = measure(text, lazy)
+        print(f"{title:18} загрузка {load:8.1f} мс, категория и поиск {touch:7.1f} мс, "
+              f"память {memory:6.1f} МБ, разобрано категорий: {decoded}")
+
+
+if __name__ == "__main__":
+    main()
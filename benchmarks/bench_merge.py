@@ -0,0 +1,69 @@
+"""Замер структурного сравнения и трехстороннего слияния файла цен.
+
+Запуск: python benchmarks/bench_merge.py [--products 50000] [--edits 500] [--seed 1]
+Обе версии получают по --edits случайных правок товаров от общей исходной.
+"""
+
+import argparse
+import copy
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from trader_merge import diff_configs, merge_configs  # noqa: E402
+from trader_store import ConfigDocument  # noqa: E402
+from synthetic import make_price_config  # noqa: E402
+
+
+def edit_copy(config_data, edits, rng):
+    """Копия конфига со случайными изменениями цен отдельных товаров"""
+    result = copy.deepcopy(config_data)
+    categories = result['TraderCategories']
+    for _ in range(edits):
+        products = rng.choice(categories)['Products']
+        index = rng.randrange(len(products))
+        fields = products[index].split(',')
+        fields[4] = str(rng.randint(1, 100000))
+        products[index] = ','.join(fields)
+    return result
+
+
+def timed(func, *args, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--categories", type=int, default=400)
+    parser.add_argument("--edits", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    base = make_price_config(args.products, args.categories, args.seed)
+    ours = edit_copy(base, args.edits, rng)
+    theirs = edit_copy(base, args.edits, rng)
+
+    changes, diff_time = timed(diff_configs, base, theirs)
+    print(f"Сравнение (строки из файла):   {diff_time:7.1f} мс, изменений: {len(changes)}")
+    # Открытый в редакторе документ хранит разобранные товары
+    decoded = ConfigDocument(copy.deepcopy(ours)).data
+    changes, diff_time = timed(diff_configs, decoded, theirs)
+    print(f"Сравнение (разобранные товары): {diff_time:7.1f} мс, изменений: {len(changes)}")
+    result, merge_time = timed(merge_configs, base, ours, theirs)
+    print(f"Слияние:                       {merge_time:7.1f} мс, перенесено: {len(result.applied)}, "
+          f"конфликтов: {len(result.conflicts)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Замер массового изменения цен: расчет по столбцам против правки по одному товару.
+
+Запуск: python benchmarks/bench_pricing.py [--products 100000] [--seed 1]
+Если установлен numpy, расчет столбцов выполняется через него.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import trader_pricing  # noqa: E402
+from trader_pricing import PriceColumns, category_selection  # noqa: E402
+from trader_store import ConfigDocument  # noqa: E402
+from synthetic import make_price_config  # noqa: E402
+
+OPERATIONS = [('markup', 'buy', 15), ('ratio', 'sell', 'buy', 0.5), ('round', 'sell', 10)]
+
+
+def one_by_one(document):
+    """Правка по одному товару, как через диалог редактирования"""
+    count = 0
+    for category_index, category in enumerate(document.records()):
+        for product_index, product in enumerate(category['Products']):
+            if not product.is_valid or product.buy_price < 0:
+                continue
+            buy = int(product.buy_price * 1.15 + 0.5)
+            sell = round(buy * 0.5 / 10) * 10 if product.sell_price >= 0 else product.sell_price
+            document.set_product(category_index, product_index, product.replace(buy_price=buy, sell_price=sell))
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--categories", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"Расчет столбцов: {'numpy' if trader_pricing.load_numpy() is not None else 'Python'}")
+    document = ConfigDocument(make_price_config(args.products, args.categories, args.seed))
+    rows = range(len(document.records()))
+
+    start = time.perf_counter()
+    columns = PriceColumns(category_selection(document, rows))
+    gathered = time.perf_counter()
+    for operation in OPERATIONS:
+        columns.apply(operation)
+    computed = time.perf_counter()
+    changes = columns.changes()
+    planned = time.perf_counter()
+    document.set_products(changes)
+    applied = time.perf_counter()
+    print(f"Сбор столбцов:       {(gathered - start) * 1000:8.1f} мс")
+    print(f"Операции:            {(computed - gathered) * 1000:8.1f} мс")
+    print(f"Новые товары:        {(planned - computed) * 1000:8.1f} мс")
+    print(f"Запись в документ:   {(applied - planned) * 1000:8.1f} мс")
+    print(f"Итого {len(changes)} товаров: {(applied - start) * 1000:8.1f} мс")
+
+    document = ConfigDocument(make_price_config(args.products, args.categories, args.seed))
+    start = time.perf_counter()
+    count = one_by_one(document)
+    print(f"По одному товару ({count}): {(time.perf_counter() - start) * 1000:8.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Замер скорости поиска по товарам: триграммный индекс против полного перебора.
+
+Запуск: python benchmarks/bench_search.py [--products 50000] [--seed 1]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from trader_store import ConfigDocument, product_matches  # noqa: E402
+from synthetic import make_price_config  # noqa: E402
+
+def scan(document, search_text):
+    """Поиск полным перебором, как без индекса"""
+    return [(category, product)
+            for category in document.records()
+            for product in category['Products']
+            if product_matches(product, search_text)]
+
+
+def timed(func, *args, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--categories", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    config = make_price_config(args.products, args.categories, args.seed)
+    start = time.perf_counter()
+    document = ConfigDocument(config)
+    print(f"Загрузка {args.products} товаров: {(time.perf_counter() - start) * 1000:.1f} мс")
+    start = time.perf_counter()
+    document.search_products("warmup")
+    print(f"Построение триграммного индекса: {(time.perf_counter() - start) * 1000:.1f} мс")
+
+    for query in ["ak", "mag_", "ammo_x", "canteen9", "1000"]:
+        index_time, found = timed(document.search_products, query)
+        scan_time, scanned = timed(scan, document, query)
+        assert len(found) == len(scanned), query
+        print(f"{query!r:12} найдено {len(found):6}  индекс {index_time * 1000:8.2f} мс  "
+              f"перебор {scan_time * 1000:8.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
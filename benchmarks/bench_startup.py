@@ -0,0 +1,143 @@
+"""Замер холодного запуска редактора в отдельных процессах.
+
+Запуск: python benchmarks/bench_startup.py [--runs 10]
+
+Каждый прогон - новый процесс Python, поэтому модули импортируются заново.
+Сравниваются два набора импортов: отложенный - только модули, которые
+trader_editor.py импортирует при запуске (берутся из его импортов верхнего
+уровня), и сразу все модули проекта вместе с numpy - так было до отложенных
+импортов. Если установлен PyQt5, для каждого набора замеряется время до показа
+окна на платформе Qt offscreen: импорт, создание окна и первая отрисовка.
+Без PyQt5 замеряется только импорт модулей.
+"""
+
+import argparse
+import ast
+import glob
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+IMPORT_CODE = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{imports}
+print((time.perf_counter() - start) * 1000)
+"""
+
+WINDOW_CODE = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+{imports}
+import trader_editor
+from PyQt5.QtWidgets import QApplication
+imported = time.perf_counter()
+app = QApplication([])
+window = trader_editor.TraderPlusEditor()
+built = time.perf_counter()
+window.show()
+app.processEvents()
+shown = time.perf_counter()
+print((imported - start) * 1000, (built - imported) * 1000, (shown - built) * 1000)
+"""
+
+
+def startup_modules():
+    """Модули проекта, которые trader_editor.py импортирует при запуске"""
+    with open(os.path.join(ROOT, 'trader_editor.py'), 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return [module for module in modules if module.startswith('trader_') and module != 'trader_editor']
+
+
+def all_modules():
+    """Все модули проекта без интерфейса вместе с numpy"""
+    names = [os.path.splitext(os.path.basename(path))[0] for path in glob.glob(os.path.join(ROOT, 'trader_*.py'))]
+    modules = sorted(name for name in names if name != 'trader_editor')
+    if importlib.util.find_spec('numpy') is not None:
+        modules.append('numpy')
+    return modules
+
+
+def without_qt(modules):
+    """Модули, которые импортируются без PyQt5"""
+    result = []
+    for module in modules:
+        path = os.path.join(ROOT, module + '.py')
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                if 'PyQt5' in f.read():
+                    continue
+        result.append(module)
+    return result
+
+
+def run_python(code, env=None):
+    """Выполнение кода в новом процессе: (вывод, полное время процесса в мс)"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=env, check=True)
+    return result.stdout.split(), (time.perf_counter() - start) * 1000
+
+
+def import_lines(modules):
+    return '\n'.join(f"import {module}" for module in modules)
+
+
+def measure_imports(modules, runs):
+    code = IMPORT_CODE.format(root=ROOT, imports=import_lines(modules))
+    imports, processes = [], []
+    for _ in range(runs):
+        output, process = run_python(code)
+        imports.append(float(output[0]))
+        processes.append(process)
+    return statistics.median(imports), statistics.median(processes)
+
+
+def measure_window(modules, runs):
+    """Время до показа окна, если до trader_editor импортированы modules"""
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    code = WINDOW_CODE.format(root=ROOT, imports=import_lines(modules))
+    phases = []
+    for _ in range(runs):
+        output, process = run_python(code, env)
+        phases.append([float(value) for value in output] + [process])
+    return [statistics.median(values) for values in zip(*phases)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    sets = (("Отложенные импорты", startup_modules()), ("Все модули сразу", all_modules()))
+    for title, modules in sets:
+        print(f"{title}: {', '.join(modules)}")
+
+    if importlib.util.find_spec('PyQt5') is None:
+        print("PyQt5 не установлен: замеряется только импорт модулей без интерфейса")
+        for title, modules in sets:
+            imported, process = measure_imports(without_qt(modules), args.runs)
+            print(f"{title:20} импорт {imported:7.1f} мс (процесс целиком {process:6.1f} мс)")
+        return
+
+    # Отложенный набор - обычный запуск; в полном все модули импортируются до trader_editor
+    for title, modules in (("Отложенные импорты", []), ("Все модули сразу", sets[1][1])):
+        imported, built, shown, process = measure_window(modules, args.runs)
+        print(f"{title:20} импорт {imported:.1f} мс, создание {built:.1f} мс, показ {shown:.1f} мс, "
+              f"до показа окна {imported + built + shown:.1f} мс (процесс целиком {process:.1f} мс)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Замер чтения файла цен: разбор целиком против потокового разбора через mmap.
+
+Запуск: python benchmarks/bench_stream.py [--products 200000] [--seed 1]
+Пиковая память считается через tracemalloc (только объекты Python).
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from trader_io import load_config  # noqa: E402
+from trader_stream import ConfigStream  # noqa: E402
+from synthetic import make_price_config  # noqa: E402
+
+
+def whole(path):
+    start = time.perf_counter()
+    records = load_config(path)['TraderCategories']
+    first = time.perf_counter()
+    return first - start, time.perf_counter() - start, len(records)
+
+
+def streaming(path):
+    start = time.perf_counter()
+    first = None
+    count = 0
+    for _ in ConfigStream(path):
+        # Запись сразу уходит в интерфейс и не накапливается в потоке чтения
+        if first is None:
+            first = time.perf_counter()
+        count += 1
+    return first - start, time.perf_counter() - start, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=200000)
+    parser.add_argument("--categories", type=int, default=800)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.json')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(make_price_config(args.products, args.categories, args.seed), f, indent=4, ensure_ascii=False)
+    try:
+        print(f"Файл: {os.path.getsize(path) / 1e6:.1f} МБ")
+        for title, func in (("Целиком", whole), ("Потоково", streaming)):
+            first, total, count = func(path)
+            tracemalloc.start()
+            func(path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{title:9} первая запись {first * 1000:7.1f} мс, всего {total * 1000:7.1f} мс, "
+                  f"записей {count}, пик памяти {peak / 1e6:6.1f} МБ")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
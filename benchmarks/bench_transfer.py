@@ -0,0 +1,48 @@
+"""Замер копирования и перемещения товаров между категориями.
+
+Запуск: python benchmarks/bench_transfer.py [--products 100000] [--selected 5000]
+Из одной категории в другую переносится --selected товаров одним изменением
+документа; после каждого замера изменение отменяется.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from trader_store import ConfigDocument  # noqa: E402
+from synthetic import make_price_config  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--selected", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Две категории: все выбранные товары в первой, вторая - цель
+    document = ConfigDocument(make_price_config(args.products, args.products // (args.selected * 2) or 1,
+                                                args.seed))
+    source = max(range(len(document.records())), key=lambda index: len(document.products(index)))
+    target = (source + 1) % len(document.records())
+    rows = list(range(0, len(document.products(source)), 2))[:args.selected]
+
+    for move in (False, True):
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            transferred, skipped = document.transfer_products(source, rows, target, move)
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+            document.undo()
+        title = "Перемещение" if move else "Копирование"
+        print(f"{title}: {best:7.1f} мс, перенесено: {len(transferred)}, пропущено: {len(skipped)} "
+              f"(в исходной категории {len(document.products(source))} товаров)")
+
+
+if __name__ == "__main__":
+    main()
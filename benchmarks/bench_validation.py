@@ -0,0 +1,59 @@
+"""Замер проверки файла цен: в одном процессе и в пуле процессов.
+
+Запуск: python benchmarks/bench_validation.py [--products 50000] [--seed 1] [--workers N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from trader_store import ConfigDocument  # noqa: E402
+from trader_validation import ValidationResults, Validator  # noqa: E402
+from synthetic import make_price_config  # noqa: E402
+
+
+def measure(validator, categories):
+    start = time.perf_counter()
+    count = len(validator.validate(categories))
+    return (time.perf_counter() - start) * 1000, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--categories", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    document = ConfigDocument(make_price_config(args.products, args.categories, args.seed))
+    categories = document.records()
+
+    elapsed, count = measure(Validator(workers=1), categories)
+    print(f"Один процесс:             {elapsed:8.1f} мс, находок: {count}")
+
+    validator = Validator(workers=args.workers)
+    validator.PARALLEL_THRESHOLD = 0
+    try:
+        elapsed, count = measure(validator, categories)
+        print(f"Пул ({args.workers}), первый запуск: {elapsed:8.1f} мс, находок: {count}")
+        elapsed, count = measure(validator, categories)
+        print(f"Пул ({args.workers}), повторно:      {elapsed:8.1f} мс, находок: {count}")
+
+        # Повторная проверка одной измененной категории после правки
+        results = ValidationResults(document)
+        document.listeners.append(results)
+        product = document.products(0)[0]
+        document.set_product(0, 0, product.replace(sell_price=product.buy_price + 1))
+        start = time.perf_counter()
+        results.revalidate(validator)
+        print(f"Измененная категория:     {(time.perf_counter() - start) * 1000:8.1f} мс")
+    finally:
+        validator.shutdown()
+
+
+if __name__ == "__main__":
+    main()
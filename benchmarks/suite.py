@@ -0,0 +1,304 @@
+"""Набор воспроизводимых замеров редактора на синтетических конфигах.
+
+Запуск:
+    python benchmarks/suite.py --sizes 1k,10k,100k -o results.json
+    python benchmarks/suite.py --sizes 1k,1M --baseline results.json --threshold 1.25
+
+Для каждого размера генерируются согласованные файлы цен, торговцев и ID
+(synthetic.make_config_set) с одним и тем же --seed. Замеряются загрузка,
+поиск (пустой, короткий и длинный запрос), открытие категории, правка и
+удаление товара и сохранение файла. Замеры core/... работают с документом
+напрямую, замеры gui/... - с окном редактора на платформе Qt offscreen
+(без PyQt5 они пропускаются). Результаты записываются в JSON; с --baseline
+они сравниваются с сохраненным прогоном, и код возврата 1 означает, что
+какой-то замер стал медленнее больше чем в --threshold раз.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# До импорта Qt: окно создается без дисплея
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from trader_io import atomic_write, dump_config, get_codec, load_config  # noqa: E402
+from trader_store import ConfigDocument  # noqa: E402
+from synthetic import make_config_set  # noqa: E402
+
+SIZE_SUFFIXES = {'k': 1000, 'm': 1000000}
+
+# Замеры быстрее этого не считаются замедлением: разброс больше самой разницы
+MIN_REGRESSION_MS = 1.0
+
+
+def parse_size(text):
+    """Размер вида 1000, 10k или 1M"""
+    text = text.strip().lower()
+    if text[-1:] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def size_label(products):
+    if products >= 1000000 and products % 1000000 == 0:
+        return f"{products // 1000000}M"
+    if products >= 1000 and products % 1000 == 0:
+        return f"{products // 1000}k"
+    return str(products)
+
+
+class Recorder:
+    """Результаты замеров: имя -> лучшее и медианное время в мс"""
+
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = {}
+
+    def measure(self, name, func, **extra):
+        """Замер func(номер прогона) repeat раз"""
+        times = []
+        for run in range(self.repeat):
+            start = time.perf_counter()
+            func(run)
+            times.append((time.perf_counter() - start) * 1000)
+        self.add(name, times, **extra)
+
+    def add(self, name, times, **extra):
+        self.results[name] = dict(best=min(times), median=statistics.median(times), runs=len(times), **extra)
+        print(f"{name:32} {min(times):10.2f} мс  (медиана {statistics.median(times):.2f})")
+
+    def skip(self, name, reason):
+        self.results[name] = {"skipped": reason}
+        print(f"{name:32} пропущен: {reason}")
+
+
+def queries(config_set):
+    """Поисковые запросы: пустой, короткий (начало класснейма) и длинный (класснейм целиком)"""
+    classname = config_set["price"]["TraderCategories"][0]["Products"][-1].split(',')[0].lower()
+    return {"empty": "", "short": classname[:3], "long": classname}
+
+
+def write_files(directory, config_set, copies):
+    """Файлы каждого типа в copies экземплярах (по одному на прогон загрузки)"""
+    paths = {}
+    for file_type, config_data in config_set.items():
+        text = dump_config(config_data)
+        paths[file_type] = []
+        for copy in range(copies):
+            path = os.path.join(directory, f"{file_type}_{copy}.json")
+            atomic_write(path, text)
+            paths[file_type].append(path)
+    return paths
+
+
+# --- Замеры без интерфейса ---
+
+def run_core(recorder, label, paths, search):
+    price_path = paths["price"][0]
+    for file_type in ("price", "general", "ids"):
+        recorder.measure(f"core/load_{file_type}/{label}",
+                         lambda run, files=paths[file_type]: ConfigDocument(load_config(files[run]), lazy=True),
+                         bytes=os.path.getsize(paths[file_type][0]))
+    recorder.measure(f"core/load_eager/{label}", lambda run: ConfigDocument(load_config(price_path)))
+
+    document = ConfigDocument(load_config(price_path), lazy=True)
+    categories = len(document.records())
+    # Каждый прогон открывает еще не разобранную категорию (до поиска, который их разбирает)
+    recorder.measure(f"core/open_category/{label}",
+                     lambda run: document.products(categories - 1 - run % categories))
+    for kind in ("short", "long"):
+        text = search[kind]
+        recorder.measure(f"core/search_{kind}/{label}",
+                         lambda run: (document.search_categories(text), document.search_products(text)))
+    recorder.measure(f"core/edit/{label}", lambda run: document.set_product(
+        0, 0, document.products(0)[0].replace(buy_price=1000 + run)))
+    recorder.measure(f"core/delete/{label}", lambda run: document.delete_product(0, len(document.products(0)) - 1))
+
+    output = os.path.join(os.path.dirname(price_path), "saved.json")
+    recorder.measure(f"core/save/{label}", lambda run: atomic_write(output, dump_config(document.data)),
+                     bytes=os.path.getsize(price_path))
+
+
+# --- Замеры окна редактора ---
+
+def wait_until(app, predicate, timeout=600):
+    """Обработка событий Qt, пока predicate() не станет истинным"""
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("Замер не завершился за отведенное время")
+        app.processEvents()
+        time.sleep(0.0005)
+
+
+def run_gui(recorder, label, paths, search):
+    try:
+        from PyQt5.QtWidgets import QApplication
+        import trader_editor
+    except ImportError as e:
+        for name in ("load", "search_empty", "search_short", "search_long", "open_category", "edit", "delete", "save"):
+            recorder.skip(f"gui/{name}/{label}", f"нет PyQt5 ({e})")
+        return
+
+    app = QApplication.instance() or QApplication([])
+    editor = trader_editor.TraderPlusEditor()
+    editor.show()
+    app.processEvents()
+    try:
+        def load(run):
+            editor.load_file(paths["price"][run])
+            wait_until(app, lambda: not editor.is_loading())
+        recorder.measure(f"gui/load/{label}", load)
+
+        controller = editor.search_controller
+
+        def find(text):
+            editor.search_entry.blockSignals(True)
+            editor.search_entry.setText(text)
+            editor.search_entry.blockSignals(False)
+            editor.apply_filter()
+            wait_until(app, lambda: controller._pending is None)
+            app.processEvents()
+
+        for kind in ("short", "long", "empty"):
+            times = []
+            for run in range(recorder.repeat):
+                # Пустой запрос замеряется как сброс найденного
+                find(search["short"] if kind == "empty" else "")
+                start = time.perf_counter()
+                find(search[kind])
+                times.append((time.perf_counter() - start) * 1000)
+            recorder.add(f"gui/search_{kind}/{label}", times)
+
+        document = editor.document
+        categories = len(document.records())
+        windows = []
+
+        def open_category(run):
+            index = categories - 1 - run % categories
+            window = trader_editor.ProductWindow(editor, document, index, document.record(index)['CategoryName'])
+            window.show()
+            app.processEvents()
+            windows.append(window)
+        recorder.measure(f"gui/open_category/{label}", open_category)
+        for window in windows[1:]:
+            window.close()
+        window = windows[0]
+
+        def edit(run):
+            model = window.product_model
+            model.set_product(0, model.product(0).replace(buy_price=1000 + run))
+            editor.auto_save()
+            app.processEvents()
+        recorder.measure(f"gui/edit/{label}", edit)
+
+        def delete(run):
+            window.product_model.remove_product(window.product_model.rowCount() - 1)
+            editor.auto_save()
+            app.processEvents()
+        recorder.measure(f"gui/delete/{label}", delete)
+        window.close()
+
+        def save(run):
+            editor.auto_save()
+            editor.save_file()
+            wait_until(app, lambda: editor.save_worker.wait_idle(0))
+            app.processEvents()
+        recorder.measure(f"gui/save/{label}", save, bytes=os.path.getsize(paths["price"][0]))
+    finally:
+        editor.close()
+        app.processEvents()
+
+
+# --- Сравнение с сохраненным прогоном ---
+
+def compare(results, baseline, threshold):
+    """Вывод отношения к базовому прогону, возвращает список замедлившихся замеров"""
+    regressions = []
+    print(f"\n{'Замер':32} {'было, мс':>10} {'стало, мс':>10} {'отношение':>10}")
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before is None or 'best' not in current or 'best' not in before:
+            continue
+        ratio = current['best'] / before['best'] if before['best'] else float('inf')
+        mark = ""
+        if ratio > threshold and current['best'] - before['best'] > MIN_REGRESSION_MS:
+            regressions.append(name)
+            mark = "  <- медленнее"
+        print(f"{name:32} {before['best']:10.2f} {current['best']:10.2f} {ratio:10.2f}{mark}")
+    return regressions
+
+
+def environment():
+    try:
+        from PyQt5.QtCore import QT_VERSION_STR
+    except ImportError:
+        QT_VERSION_STR = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "qt": QT_VERSION_STR,
+        "json_codec": get_codec().name,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1k,10k,100k", help="количество товаров через запятую (1k, 10k, 1M)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-gui", action="store_true", help="только замеры без интерфейса")
+    parser.add_argument("-o", "--output", help="файл JSON для результатов")
+    parser.add_argument("--baseline", help="файл JSON предыдущего прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=1.25, help="допустимое замедление (во сколько раз)")
+    args = parser.parse_args()
+
+    recorder = Recorder(args.repeat)
+    for products in [parse_size(size) for size in args.sizes.split(',')]:
+        label = size_label(products)
+        config_set = make_config_set(products, args.seed)
+        search = queries(config_set)
+        directory = tempfile.mkdtemp(prefix="trader_bench_")
+        try:
+            paths = write_files(directory, config_set, args.repeat)
+            del config_set
+            run_core(recorder, label, paths, search)
+            if not args.no_gui:
+                run_gui(recorder, label, paths, search)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "environment": environment(),
+        "results": recorder.results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты записаны: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(recorder.results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"Замедлились: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Генератор синтетических файлов конфигурации TraderPlus для замеров."""
+
+import random
+import string
+
+PREFIXES = ["AK", "M4A1", "SVD", "Mag_", "Ammo_", "TShirt_", "Jeans_", "Canteen", "Bandage", "Apple"]
+
+
+def make_price_config(products, categories, seed):
+    """Синтетический файл цен заданного размера"""
+    rng = random.Random(seed)
+    config = {"TraderCategories": []}
+    per_category = max(1, products // categories)
+    for c in range(categories):
+        items = []
+        for _ in range(per_category):
+            classname = rng.choice(PREFIXES) + ''.join(rng.choices(string.ascii_letters + string.digits, k=8))
+            buy = rng.randint(10, 50000)
+            items.append(f"{classname},1,{rng.choice([-1, 10, 100])},1,{buy},{buy // 2}")
+        config["TraderCategories"].append({"CategoryName": f"Категория {c}", "Products": items})
+    return config
+
+
+def make_general_config(traders, seed):
+    """Синтетический файл торговцев"""
+    rng = random.Random(seed)
+    config = {"Version": "2.5", "Traders": []}
+    for i in range(traders):
+        config["Traders"].append({
+            "Id": i,
+            "Name": "SFP_NPC_SidorCompleks_ai",
+            "GivenName": f"Торговец {i}",
+            "Role": "Торговец",
+            "Position": [round(rng.uniform(0, 15000), 6), round(rng.uniform(0, 500), 6), round(rng.uniform(0, 15000), 6)],
+            "Orientation": [round(rng.uniform(-180, 180), 5), 0.0, 0.0],
+            "Clothes": [],
+        })
+    return config
+
+
+GROUPS = ["Оружие", "Боеприпасы", "Магазины", "Одежда", "Медицина", "Продовольствие", "Инструменты", "Транспорт"]
+TRADER_NAMES = ["Сидорович", "Бармен", "Сахаров", "Петренко", "Кузнецов", "Лукаш", "Волк", "Шустрый"]
+
+
+def make_config_set(products, seed, per_category=125):
+    """Согласованные файлы цен, торговцев и ID, похожие на настоящие.
+
+    Категории называются "Группа Торговец", у каждого торговца - все группы;
+    среди товаров встречаются дробные коэффициенты, -1 и повторы класснеймов
+    между категориями. Возвращает словарь тип файла -> конфиг.
+    """
+    rng = random.Random(seed)
+    categories = max(1, products // per_category)
+    traders = max(1, -(-categories // len(GROUPS)))
+    shared = [rng.choice(PREFIXES) + ''.join(rng.choices(string.ascii_letters + string.digits, k=6))
+              for _ in range(max(1, products // 20))]
+
+    price = {"TraderCategories": []}
+    ids = {"Version": "2.5", "IDs": []}
+    for trader in range(traders):
+        ids["IDs"].append({"Id": trader, "Categories": [], "LicencesRequired": [], "CurrenciesAccepted": []})
+    for c in range(categories):
+        trader = c // len(GROUPS)
+        name = f"{GROUPS[c % len(GROUPS)]} {TRADER_NAMES[trader % len(TRADER_NAMES)]} {trader}"
+        items = []
+        # Остаток достается последней категории
+        count = products - c * per_category if c == categories - 1 else per_category
+        for _ in range(max(1, count)):
+            if rng.random() < 0.3:
+                classname = rng.choice(shared)
+            else:
+                classname = rng.choice(PREFIXES) + ''.join(rng.choices(string.ascii_letters + string.digits, k=8))
+            buy = rng.choice([-1, rng.randint(10, 50000)])
+            sell = -1 if buy == -1 else buy // rng.choice([2, 3, 4])
+            coefficient = rng.choice([1, 1, 1, 0.5, 0.75])
+            items.append(f"{classname},{coefficient},{rng.choice([-1, 10, 100])},{rng.choice([1, 1, 20])},{buy},{sell}")
+        price["TraderCategories"].append({"CategoryName": name, "Products": items})
+        ids["IDs"][trader]["Categories"].append(name)
+    return {"price": price, "general": make_general_config(traders, seed), "ids": ids}
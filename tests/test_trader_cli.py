@@ -0,0 +1,71 @@
+"""Пакетный режим: выбор категорий и товаров по шаблонам и точным именам.
+
+Запуск: python -m unittest discover -s tests
+"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import trader_cli  # noqa: E402
+
+CONFIG = {
+    "TraderCategories": [
+        {"CategoryName": "Ammo", "Products": ["AK74,1,100,1,500,250", "Mag_AK74,1,100,1,300,150"]},
+        {"CategoryName": "Оружие", "Products": ["AKM,1,-1,1,18000,9000", "ak74,1,-1,1,20000,10000"]},
+    ],
+}
+
+
+class SelectionTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp(prefix="trader_cli_test_")
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, "TraderPlusPriceConfig.json")
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(CONFIG, f, indent=4, ensure_ascii=False)
+
+    def run_cli(self, *argv):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            code = trader_cli.main(list(argv))
+        self.assertEqual(code, 0)
+        return output.getvalue().splitlines()
+
+    def listed(self, *options):
+        return self.run_cli('price', 'list', self.path, *options)
+
+    def test_exact_classname_ignores_case(self):
+        expected = ["Ammo;AK74,1,100,1,500,250", "Оружие;ak74,1,-1,1,20000,10000"]
+        self.assertEqual(self.listed('--classname', 'ak74'), expected)
+        self.assertEqual(self.listed('--classname', 'AK74'), expected)
+
+    def test_exact_and_wildcard_modes_agree(self):
+        for exact, pattern in (('ak74', 'ak74*'), ('AMMO', 'amm?'), ('оружие', 'ОРУЖИЕ*')):
+            option = '--classname' if exact == 'ak74' else '--category'
+            with self.subTest(exact=exact):
+                self.assertEqual(self.listed(option, exact), self.listed(option, pattern))
+
+    def test_exact_category_and_classname(self):
+        self.assertEqual(self.listed('--category', 'ammo', '--classname', 'ak74'), ["Ammo;AK74,1,100,1,500,250"])
+        self.assertEqual(self.listed('--category', 'ammo', '--classname', 'akm'), [])
+
+    def test_set_by_exact_classname_saves_changes(self):
+        self.run_cli('price', 'set', self.path, '--field', 'maxstock', '--value', '7', '--classname', 'Ak74')
+        with open(self.path, 'r', encoding='utf-8') as f:
+            products = [product for category in json.load(f)['TraderCategories'] for product in category['Products']]
+        self.assertIn("AK74,1,7,1,500,250", products)
+        self.assertIn("ak74,1,7,1,20000,10000", products)
+        self.assertIn("Mag_AK74,1,100,1,300,150", products)
+
+
+if __name__ == "__main__":
+    unittest.main()
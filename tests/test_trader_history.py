@@ -0,0 +1,109 @@
+"""Отмена и повтор правок документа: одна правка - один шаг истории, индексы остаются верными.
+
+Запуск: python -m unittest discover -s tests
+"""
+
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from trader_store import ConfigDocument, json_default  # noqa: E402
+
+CONFIG = {
+    "Version": "2.5",
+    "EnableAutoCalculation": 0,
+    "TraderCategories": [
+        {"CategoryName": "Оружие", "Products": ["M4A1,1,100,1,25000,12500", "AKM,0.85,-1,1,18000,-1",
+                                                 "SVD,1,5,1,40000,20000"]},
+        {"CategoryName": "Патроны", "Products": ["Ammo_556,1,-1,1,50,25", "AKM,1,1,1,1,1"]},
+        {"CategoryName": "Еда", "Products": ["Apple,1,50,1,15,7"]},
+    ],
+}
+
+
+def make_document():
+    return ConfigDocument(json.loads(json.dumps(CONFIG)))
+
+
+def state(document):
+    """Текст конфига в том виде, в каком он попадет в файл"""
+    return json.dumps(document.data, ensure_ascii=False, default=json_default)
+
+
+class UndoRedoTest(unittest.TestCase):
+
+    def assertIndexesFresh(self, document):
+        """Индексы после правок совпадают с построенными заново"""
+        fresh = ConfigDocument(json.loads(state(document)))
+        for classname in set(document.product_locations) | set(fresh.product_locations):
+            self.assertEqual(sorted(document.find_products(classname)), sorted(fresh.find_products(classname)))
+        for category in fresh.records():
+            name = category['CategoryName']
+            self.assertEqual(document.find_category(name), fresh.find_category(name))
+
+    def assertRoundTrip(self, document, edit):
+        """Правка отменяется и повторяется одним действием"""
+        before = state(document)
+        edit()
+        after = state(document)
+        self.assertNotEqual(before, after)
+        self.assertIndexesFresh(document)
+
+        document.undo()
+        self.assertEqual(state(document), before)
+        self.assertFalse(document.history.can_undo())
+        self.assertIndexesFresh(document)
+
+        document.redo()
+        self.assertEqual(state(document), after)
+        self.assertFalse(document.history.can_redo())
+        self.assertIndexesFresh(document)
+
+    def test_move_products(self):
+        document = make_document()
+        self.assertRoundTrip(document, lambda: document.transfer_products(0, [0, 2], 2, move=True))
+        self.assertEqual([product.classname for product in document.products(2)], ["Apple", "M4A1", "SVD"])
+
+    def test_copy_skips_duplicates(self):
+        document = make_document()
+        result = []
+        self.assertRoundTrip(document, lambda: result.append(document.transfer_products(0, [0, 1], 1)))
+        self.assertEqual(result, [([0], [1])])
+        copied = document.products(1)[-1]
+        self.assertIsNot(copied, document.products(0)[0])
+        self.assertEqual(copied.to_csv(), document.products(0)[0].to_csv())
+
+    def test_delete_products(self):
+        document = make_document()
+        self.assertRoundTrip(document, lambda: document.delete_products(0, [2, 0]))
+        self.assertEqual([product.classname for product in document.products(0)], ["AKM"])
+
+    def test_records_and_header(self):
+        document = make_document()
+
+        def edit():
+            with document.transaction("Правка"):
+                document.delete_record(1)
+                document.add_record({"CategoryName": "Медицина", "Products": []})
+                document.delete_header("Version")
+                document.set_header("EnableAutoCalculation", 1)
+        self.assertRoundTrip(document, edit)
+        document.undo()
+        self.assertEqual(list(document.data), list(CONFIG))
+
+    def test_new_edit_clears_redo(self):
+        document = make_document()
+        product = document.products(2)[0]
+        document.set_product(2, 0, product.replace(buy_price=20))
+        document.undo()
+        self.assertTrue(document.history.can_redo())
+        document.set_product(2, 0, product.replace(buy_price=30))
+        self.assertFalse(document.history.can_redo())
+        self.assertEqual(document.products(2)[0].buy_price, 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
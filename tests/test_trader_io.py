@@ -0,0 +1,75 @@
+"""Сохранение конфига побайтно совпадает с исходным файлом, включая переводы строк.
+
+Запуск: python -m unittest discover -s tests
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import trader_io  # noqa: E402
+from trader_store import ConfigDocument  # noqa: E402
+
+CONFIG = {
+    "Version": "2.5",
+    "EnableAutoCalculation": 0,
+    "TraderCategories": [
+        {
+            "CategoryName": "Оружие",
+            "Products": ["M4A1,1,100,1,25000,12500", "AKM,0.85,-1,1,18000,-1"],
+        },
+        {
+            "CategoryName": "Еда",
+            "Products": ["Apple,1,50,1,15,7"],
+        },
+    ],
+}
+
+
+class CodecRoundTripTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="trader_io_test_")
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.addCleanup(setattr, trader_io, '_codec', trader_io._codec)
+
+    def write(self, name, data):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def round_trip(self, newline):
+        """Загрузка и сохранение файла каждым доступным кодеком"""
+        original = json.dumps(CONFIG, indent=4, ensure_ascii=False).replace('\n', newline).encode('utf-8')
+        for name, codec in trader_io.CODECS.items():
+            with self.subTest(codec=name):
+                trader_io._codec = codec()
+                path = self.write(f"{name}.json", original)
+                document = ConfigDocument(trader_io.load_config(path))
+                trader_io.save_config(path, document.data)
+                with open(path, 'rb') as f:
+                    self.assertEqual(f.read(), original)
+
+    def test_crlf_file_keeps_crlf(self):
+        self.round_trip('\r\n')
+
+    def test_lf_file_keeps_lf(self):
+        self.round_trip('\n')
+
+    def test_new_file_uses_system_newline(self):
+        path = os.path.join(self.directory, "new.json")
+        trader_io.save_config(path, CONFIG)
+        with open(path, 'rb') as f:
+            data = f.read()
+        expected = json.dumps(CONFIG, indent=4, ensure_ascii=False).replace('\n', os.linesep).encode('utf-8')
+        self.assertEqual(data, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
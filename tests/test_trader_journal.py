@@ -0,0 +1,118 @@
+"""Журнал правок: восстановление после сбоя и сжатие после записи конфига.
+
+Запуск: python -m unittest discover -s tests
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from trader_io import load_config, save_config  # noqa: E402
+from trader_journal import EditJournal, file_identity, journal_path, read_journal  # noqa: E402
+from trader_pricing import apply_pricing, category_selection  # noqa: E402
+from trader_store import ConfigDocument, json_default  # noqa: E402
+
+CONFIG = {
+    "Version": "2.5",
+    "TraderCategories": [
+        {"CategoryName": "Оружие", "Products": ["M4A1,1,100,1,25000,12500", "AKM,0.85,-1,1,18000,-1"]},
+        {"CategoryName": "Еда", "Products": ["Apple,1,50,1,15,7"]},
+    ],
+}
+
+
+def state(document):
+    return json.dumps(document.data, ensure_ascii=False, default=json_default)
+
+
+class JournalTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp(prefix="trader_journal_test_")
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, "TraderPlusPriceConfig.json")
+        save_config(self.path, CONFIG)
+
+    def open_document(self):
+        """Документ с подключенным журналом, как в редакторе"""
+        document = ConfigDocument(load_config(self.path))
+        journal = EditJournal(self.path)
+        self.addCleanup(journal.close)
+        document.listeners.append(journal)
+        return document, journal
+
+    def edit(self, document):
+        product = document.products(1)[0]
+        document.set_product(1, 0, product.replace(buy_price=20))
+        document.transfer_products(0, [1], 1, move=True)
+        apply_pricing(document, category_selection(document, [0]), [('markup', 'buy', 10)])
+        document.set_header("EnableAutoCalculation", 1)
+        document.add_record({"CategoryName": "Медицина", "Products": []})
+
+    def recover(self):
+        """Открытие файла после сбоя с применением журнала"""
+        recovered = read_journal(self.path)
+        self.assertIsNotNone(recovered)
+        self.assertTrue(recovered.matches(self.path))
+        document = ConfigDocument(load_config(self.path))
+        document.apply_steps(recovered.steps(document.file_type), "Восстановление из журнала")
+        return document, recovered
+
+    def test_recovery_after_crash(self):
+        document, journal = self.open_document()
+        self.edit(document)
+        journal.close()  # Сбой: конфиг так и не записан
+
+        recovered_document, recovered = self.recover()
+        self.assertEqual(len(recovered), 5)
+        self.assertEqual(state(recovered_document), state(document))
+        # Восстановление - одна правка
+        recovered_document.undo()
+        self.assertEqual(state(recovered_document), json.dumps(CONFIG, ensure_ascii=False))
+
+    def test_torn_last_line_is_dropped(self):
+        document, journal = self.open_document()
+        self.edit(document)
+        journal.close()
+        with open(journal_path(self.path), 'ab') as f:
+            f.write(b'[["set_header",["Version"')
+        self.assertEqual(len(read_journal(self.path)), 5)
+
+    def test_compaction_keeps_later_edits(self):
+        document, journal = self.open_document()
+        document.set_header("Version", "2.6")
+        mark = journal.mark()
+        snapshot = json.loads(state(document))
+        document.delete_product(0, 1)  # Правка после снимка, переданного на запись
+        save_config(self.path, snapshot)
+        journal.compacted(mark, file_identity(self.path))
+        journal.close()
+
+        recovered_document, recovered = self.recover()
+        self.assertEqual(len(recovered), 1)
+        self.assertEqual(state(recovered_document), state(document))
+
+    def test_full_compaction_removes_journal(self):
+        document, journal = self.open_document()
+        document.set_header("Version", "2.6")
+        save_config(self.path, document.data)
+        journal.compacted(journal.mark(), file_identity(self.path))
+        self.assertFalse(os.path.exists(journal_path(self.path)))
+        self.assertIsNone(read_journal(self.path))
+
+    def test_changed_file_does_not_match(self):
+        document, journal = self.open_document()
+        document.set_header("Version", "2.6")
+        journal.close()
+        save_config(self.path, dict(CONFIG, Version="3.0"))
+        os.utime(self.path, ns=(0, 0))
+        self.assertFalse(read_journal(self.path).matches(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+"""Сравнение и трехстороннее слияние конфигов: изменения по ключам, конфликты и перенос в документ.
+
+Запуск: python -m unittest discover -s tests
+"""
+
+import copy
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from trader_merge import ADDED, CHANGED, REMOVED, diff_configs, merge_configs, plan_merge  # noqa: E402
+from trader_store import ConfigDocument, json_default  # noqa: E402
+
+BASE = {
+    "Version": "2.5",
+    "EnableAutoCalculation": 0,
+    "TraderCategories": [
+        {"CategoryName": "Оружие", "Products": ["M4A1,1,100,1,25000,12500", "AKM,0.85,-1,1,18000,-1"]},
+        {"CategoryName": "Патроны", "Products": ["Ammo_556,1,-1,1,50,25"]},
+        {"CategoryName": "Еда", "Products": ["Apple,1,50,1,15,7", "Pear,1,50,1,15,7"]},
+    ],
+}
+
+
+def edited(edit):
+    config = copy.deepcopy(BASE)
+    edit(config)
+    return config
+
+
+def products(config, name):
+    for category in config["TraderCategories"]:
+        if category["CategoryName"] == name:
+            return category["Products"]
+    return None
+
+
+def state(document):
+    return json.dumps(document.data, ensure_ascii=False, default=json_default)
+
+
+def ours_edit(config):
+    weapons = products(config, "Оружие")
+    weapons[weapons.index("AKM,0.85,-1,1,18000,-1")] = "AKM,0.85,-1,1,20000,-1"
+    products(config, "Еда").append("Bread,1,20,1,10,5")
+    config["Version"] = "2.6"
+
+
+def theirs_edit(config):
+    products(config, "Оружие").insert(1, "SVD,1,5,1,40000,20000")
+    del products(config, "Еда")[1]
+    config["TraderCategories"].append({"CategoryName": "Медицина", "Products": ["Bandage,1,10,1,100,50"]})
+    config["EnableAutoCalculation"] = 1
+
+
+class DiffTest(unittest.TestCase):
+
+    def test_no_changes(self):
+        self.assertEqual(diff_configs(BASE, copy.deepcopy(BASE)), [])
+
+    def test_products_by_classname(self):
+        new = edited(lambda config: (theirs_edit(config), ours_edit(config)))
+        changes = {change.path: change for change in diff_configs(BASE, new)}
+        self.assertEqual(changes[('header', ('Version', 0))].kind, CHANGED)
+        self.assertEqual(changes[('header', ('EnableAutoCalculation', 0))].new, 1)
+        akm = changes[('record', ("Оружие", 0), ('Products', 0), ("AKM", 0))]
+        self.assertEqual((akm.kind, akm.old, akm.new),
+                         (CHANGED, "AKM,0.85,-1,1,18000,-1", "AKM,0.85,-1,1,20000,-1"))
+        self.assertEqual(changes[('record', ("Оружие", 0), ('Products', 0), ("SVD", 0))].kind, ADDED)
+        self.assertEqual(changes[('record', ("Еда", 0), ('Products', 0), ("Pear", 0))].kind, REMOVED)
+        self.assertEqual(changes[('record', ("Медицина", 0))].kind, ADDED)
+        self.assertEqual(len(changes), 7)
+
+    def test_parsed_and_raw_products_compare_equal(self):
+        document = ConfigDocument(copy.deepcopy(BASE))
+        self.assertEqual(diff_configs(BASE, document.data), [])
+
+    def test_different_file_types(self):
+        with self.assertRaises(ValueError):
+            diff_configs(BASE, {"Traders": []})
+
+
+class MergeTest(unittest.TestCase):
+
+    def test_independent_changes_merge(self):
+        result = merge_configs(BASE, edited(ours_edit), edited(theirs_edit))
+        self.assertEqual(result.conflicts, [])
+        self.assertEqual(result.data, edited(lambda config: (ours_edit(config), theirs_edit(config))))
+        self.assertEqual(len(result.applied), 4)
+
+    def test_conflict_prefers_ours_or_theirs(self):
+        ours = edited(lambda config: products(config, "Патроны").__setitem__(0, "Ammo_556,1,-1,1,60,30"))
+        theirs = edited(lambda config: products(config, "Патроны").__setitem__(0, "Ammo_556,1,-1,1,70,35"))
+        for prefer, expected in ((None, ours), ('ours', ours), ('theirs', theirs)):
+            with self.subTest(prefer=prefer):
+                result = merge_configs(BASE, ours, theirs, prefer)
+                self.assertEqual(result.data, expected)
+                self.assertEqual(len(result.conflicts), 1)
+                conflict = result.conflicts[0]
+                self.assertEqual(conflict.path, ('record', ("Патроны", 0), ('Products', 0), ("Ammo_556", 0)))
+                self.assertEqual((conflict.base, conflict.ours, conflict.theirs),
+                                 ("Ammo_556,1,-1,1,50,25", "Ammo_556,1,-1,1,60,30", "Ammo_556,1,-1,1,70,35"))
+
+    def test_delete_against_edit_is_conflict(self):
+        ours = edited(lambda config: config["TraderCategories"].pop(1))
+        theirs = edited(lambda config: products(config, "Патроны").append("Ammo_762,1,-1,1,60,30"))
+        result = merge_configs(BASE, ours, theirs)
+        self.assertEqual(result.data, ours)
+        self.assertEqual([conflict.path for conflict in result.conflicts], [('record', ("Патроны", 0))])
+
+    def test_inserted_product_keeps_position(self):
+        result = merge_configs(BASE, copy.deepcopy(BASE), edited(theirs_edit))
+        self.assertEqual(products(result.data, "Оружие"),
+                         ["M4A1,1,100,1,25000,12500", "SVD,1,5,1,40000,20000", "AKM,0.85,-1,1,18000,-1"])
+
+
+class PlanMergeTest(unittest.TestCase):
+
+    def test_plan_is_one_undo_step(self):
+        document = ConfigDocument(edited(ours_edit))
+        before = state(document)
+        result = merge_configs(BASE, document.data, edited(theirs_edit))
+        plan = plan_merge(document, result.data)
+        self.assertEqual(sorted(plan.keys), sorted(["Оружие", "Еда", "Медицина"]))
+        document.apply_steps(plan.steps, "Слияние версий")
+        self.assertEqual(json.loads(state(document)), result.data)
+        self.assertEqual(plan_merge(document, result.data).steps, [])
+
+        document.undo()
+        self.assertEqual(state(document), before)
+        self.assertFalse(document.history.can_undo())
+
+    def test_removed_records_and_header(self):
+        document = ConfigDocument(copy.deepcopy(BASE))
+        merged = edited(lambda config: (config["TraderCategories"].pop(0), config.pop("Version")))
+        document.apply_steps(plan_merge(document, merged).steps, "Слияние версий")
+        self.assertEqual(json.loads(state(document)), merged)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""Массовое изменение цен: одинаковый результат с numpy и без него, отмена одной правкой.
+
+Запуск: python -m unittest discover -s tests
+"""
+
+import math
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import trader_pricing  # noqa: E402
+from trader_pricing import apply_pricing, category_selection, plan_pricing  # noqa: E402
+from trader_store import ConfigDocument  # noqa: E402
+
+PRODUCTS = [
+    "a,0.5,-1,1,12.5,3",
+    "M4A1,1,100,1,25000,12500",
+    "AKM,0.85,-1,1,18000,-1",
+    "Apple,1,50,1,15,7",
+    "Odd,1,5,1,1e-05,0.333",
+    "Text,1,5,1,abc,5",
+]
+
+OPERATIONS = [
+    [('round', 'coef', 1), ('round', 'buy', 10)],
+    [('markup', 'buy', 15), ('ratio', 'sell', 'buy', 0.5), ('round', 'sell', 10)],
+    [('scale', 'coef', 1.5), ('clamp', 'coef', 0.6, 1.2)],
+    [('clamp', 'sell', 10, None), ('scale', 'maxstock', 0.5)],
+]
+
+PYTHON_FUNCTIONS = {
+    'numpy': None,
+    '_numpy_checked': True,
+    '_floor': math.floor,
+    '_maximum': max,
+    '_minimum': min,
+    '_where': trader_pricing._python_where,
+}
+
+
+def make_document():
+    return ConfigDocument({"TraderCategories": [{"CategoryName": "A", "Products": list(PRODUCTS)}]})
+
+
+class PricingTest(unittest.TestCase):
+
+    def plan(self, operations, numpy_enabled):
+        saved = {name: getattr(trader_pricing, name) for name in PYTHON_FUNCTIONS}
+        try:
+            if numpy_enabled:
+                if trader_pricing.load_numpy() is None:
+                    self.skipTest("numpy не установлен")
+            else:
+                for name, value in PYTHON_FUNCTIONS.items():
+                    setattr(trader_pricing, name, value)
+            document = make_document()
+            changes = plan_pricing(category_selection(document, [0]), operations)
+        finally:
+            for name, value in saved.items():
+                setattr(trader_pricing, name, value)
+        return [(product_index, product.to_csv()) for _, product_index, product in changes]
+
+    def test_numpy_and_python_write_same_text(self):
+        for operations in OPERATIONS:
+            with self.subTest(operations=operations):
+                self.assertEqual(self.plan(operations, True), self.plan(operations, False))
+
+    def test_float_fields_stay_float(self):
+        expected = [(0, "a,1.0,-1,1,10.0,3"), (2, "AKM,1.0,-1,1,18000,-1"),
+                    (3, "Apple,1,50,1,20,7"), (4, "Odd,1,5,1,0.0,0.333")]
+        self.assertEqual(self.plan(OPERATIONS[0], False), expected)
+
+    def test_negative_and_text_values_unchanged(self):
+        changed = dict(self.plan(OPERATIONS[1], False))
+        self.assertEqual(changed[2], "AKM,0.85,-1,1,20700,-1")
+        self.assertNotIn(5, changed)
+
+    def test_apply_is_one_undo_step(self):
+        document = make_document()
+        count = apply_pricing(document, category_selection(document, [0]), OPERATIONS[1])
+        self.assertGreater(count, 0)
+        document.undo()
+        self.assertEqual([product.to_csv() for product in document.products(0)], PRODUCTS)
+        self.assertFalse(document.history.can_undo())
+
+    def test_invalid_operations(self):
+        with self.assertRaises(ValueError):
+            plan_pricing([], [('round', 'buy', 0)])
+        with self.assertRaises(ValueError):
+            plan_pricing([], [('clamp', 'buy', 5, 1)])
+        with self.assertRaises(ValueError):
+            plan_pricing([], [('double', 'buy')])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""Отложенный разбор товаров: документ с lazy=True отвечает так же, как полностью разобранный.
+
+Запуск: python -m unittest discover -s tests
+"""
+
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from trader_store import ConfigDocument, json_default  # noqa: E402
+
+CONFIG = {
+    "Version": "2.5",
+    "TraderCategories": [
+        {"CategoryName": "Оружие", "Products": ["M4A1,1,100,1,25000,12500", "AKM,0.85,-1,1,18000,-1"]},
+        {"CategoryName": "Патроны", "Products": ["Ammo_556,1,-1,1,50,25", "akm,1,1,1,1,1"]},
+        {"CategoryName": "Еда", "Products": ["Apple,1,50,1,15,7", "Broken", "AKM,1,2"]},
+        {"CategoryName": "Склад", "Products": ["AKM_Mag,1,10,1,100,50"]},
+    ],
+}
+
+
+def make_document(lazy):
+    return ConfigDocument(json.loads(json.dumps(CONFIG)), lazy=lazy)
+
+
+def state(document):
+    return json.dumps(document.data, ensure_ascii=False, default=json_default)
+
+
+def classnames():
+    return {product.split(',')[0] if product.count(',') >= 5 else product
+            for category in CONFIG["TraderCategories"] for product in category["Products"]}
+
+
+class LazyDocumentTest(unittest.TestCase):
+
+    def decoded_names(self, document):
+        return [category['CategoryName'] for category in document.records() if document.is_decoded(category)]
+
+    def test_find_products_matches_eager(self):
+        eager = make_document(lazy=False)
+        for classname in classnames() | {"Missing", "M4"}:
+            with self.subTest(classname=classname):
+                lazy = make_document(lazy=True)
+                self.assertEqual(lazy.find_products(classname), eager.find_products(classname))
+
+    def test_find_products_decodes_only_owners(self):
+        document = make_document(lazy=True)
+        self.assertEqual(document.decoded_count(), 0)
+        self.assertEqual(document.find_products("AKM"), [(0, 1)])
+        # "akm" и "AKM_Mag" - другие класснеймы, их категории не нужны
+        self.assertNotIn("Патроны", self.decoded_names(document))
+        self.assertNotIn("Склад", self.decoded_names(document))
+        self.assertEqual(document.find_products("akm"), [(1, 1)])
+        self.assertIn("Патроны", self.decoded_names(document))
+
+    def test_invalid_products(self):
+        document = make_document(lazy=True)
+        self.assertEqual(document.find_products("Broken"), [(2, 1)])
+        document = make_document(lazy=True)
+        self.assertEqual(document.find_products("AKM,1,2"), [(2, 2)])
+        self.assertEqual(self.decoded_names(document), ["Еда"])
+
+    def test_lookup_after_edit(self):
+        document = make_document(lazy=True)
+        document.add_record({"CategoryName": "Новая", "Products": ["AKM,1,1,1,5,5"]})
+        self.assertEqual(document.find_products("AKM"), [(0, 1), (4, 0)])
+        document.undo()
+        self.assertEqual(document.find_products("AKM"), [(0, 1)])
+
+    def test_search_products_matches_eager(self):
+        eager = make_document(lazy=False)
+        for search_text in ("akm", "AMMO", "broken", "1,2", "25000", "нет"):
+            with self.subTest(search_text=search_text):
+                lazy = make_document(lazy=True)
+                self.assertEqual([(category['CategoryName'], product.to_csv())
+                                  for category, product in lazy.search_products(search_text)],
+                                 [(category['CategoryName'], product.to_csv())
+                                  for category, product in eager.search_products(search_text)])
+
+    def test_saved_text_is_unchanged(self):
+        lazy = make_document(lazy=True)
+        lazy.find_products("AKM")
+        self.assertEqual(state(lazy), state(make_document(lazy=False)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""Потоковый разбор файла дает тот же конфиг, что и load_config.
+
+Запуск: python -m unittest discover -s tests
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import trader_io  # noqa: E402
+from trader_stream import ConfigStream, load_config_streaming, stream_records  # noqa: E402
+
+PRICE = {
+    "Version": "2.5",
+    "EnableAutoCalculation": 0,
+    "TraderCategories": [
+        {"CategoryName": "Оружие [редкое] {1}", "Products": ["M4A1,1,100,1,25000,12500", "AKM,0.85,-1,1,18000,-1"]},
+        {"CategoryName": "Кавычки \" и \\ в названии ]", "Products": []},
+        {"CategoryName": "Еда", "Products": ["Apple,1,50,1,15,7"]},
+    ],
+    "Coefficients": [1.5, -2, 1e-05, True, None],
+}
+
+GENERAL = {
+    "Version": "2.5",
+    "Traders": [
+        {"Id": 0, "Name": "Trader", "GivenName": "Ivan", "Role": "Weapons"},
+        {"Id": 1, "Name": "Trader2", "GivenName": "", "Role": "Food"},
+    ],
+    "Currencies": [{"ClassName": "TraderPlus_Money_Dollar1", "Value": 1}],
+}
+
+
+class StreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="trader_stream_test_")
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.addCleanup(setattr, trader_io, '_codec', trader_io._codec)
+
+    def write(self, data, name="config.json"):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def assertSameAsLoadConfig(self, config):
+        """Файл в разных форматах разбирается каждым кодеком так же, как load_config"""
+        formats = {
+            "lf": json.dumps(config, indent=4, ensure_ascii=False),
+            "crlf": json.dumps(config, indent=4, ensure_ascii=False).replace('\n', '\r\n'),
+            "compact": json.dumps(config, separators=(',', ':'), ensure_ascii=False),
+            "escaped": json.dumps(config, indent="\t"),
+        }
+        for codec_name, codec in trader_io.CODECS.items():
+            trader_io._codec = codec()
+            for name, text in formats.items():
+                with self.subTest(codec=codec_name, format=name):
+                    path = self.write(text.encode('utf-8'), f"{name}.json")
+                    loaded = load_config_streaming(path)
+                    self.assertEqual(loaded, trader_io.load_config(path))
+                    self.assertEqual(list(loaded), list(config))
+
+    def test_price_file(self):
+        self.assertSameAsLoadConfig(PRICE)
+
+    def test_general_file(self):
+        self.assertSameAsLoadConfig(GENERAL)
+
+    def test_records_and_header(self):
+        path = self.write(json.dumps(PRICE, indent=4, ensure_ascii=False).encode('utf-8'))
+        stream = ConfigStream(path)
+        names = []
+        for record in stream:
+            self.assertEqual(stream.file_type, "price")
+            self.assertLessEqual(stream.position, stream.size)
+            names.append(record["CategoryName"])
+        self.assertEqual(names, [category["CategoryName"] for category in PRICE["TraderCategories"]])
+        self.assertEqual(stream.header["Coefficients"], PRICE["Coefficients"])
+        self.assertEqual(stream.position, stream.size)
+        self.assertEqual(list(stream_records(path)), PRICE["TraderCategories"])
+
+    def test_empty_lists_and_unknown_file(self):
+        for config in ({}, {"TraderCategories": []}, {"Other": {"TraderCategories": [1]}, "IDs": []}):
+            with self.subTest(config=config):
+                path = self.write(json.dumps(config, indent=4).encode('utf-8'))
+                self.assertEqual(load_config_streaming(path), config)
+        stream = ConfigStream(self.write(b'{"Other": [1, 2]}'))
+        self.assertEqual(list(stream), [])
+        self.assertEqual(stream.file_type, "unknown")
+
+    def test_bom(self):
+        path = self.write(b'\xef\xbb\xbf' + json.dumps(PRICE, ensure_ascii=False).encode('utf-8'))
+        self.assertEqual(load_config_streaming(path), PRICE)
+
+    def test_broken_file(self):
+        text = json.dumps(PRICE, indent=4, ensure_ascii=False).encode('utf-8')
+        for data in (b'', text[:len(text) // 2], text[:-1], b'[1, 2]'):
+            with self.subTest(data=data[-20:]):
+                with self.assertRaises(ValueError):
+                    load_config_streaming(self.write(data))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,468 @@
+"""Пакетная обработка конфигов TraderPlus из командной строки (без графического интерфейса).
+
+Примеры:
+    python trader_editor.py info TraderPlusPriceConfig.json
+    python trader_editor.py price scale TraderPlusPriceConfig.json --field buy --factor 1.15 --category "*оружие*"
+    python trader_editor.py price ratio TraderPlusPriceConfig.json --field sell --source buy --ratio 0.5
+    python trader_editor.py price round TraderPlusPriceConfig.json --field buy --step 10
+    python trader_editor.py price set TraderPlusPriceConfig.json --field maxstock --value -1 --classname "Ammo_*"
+    python trader_editor.py general set TraderPlusGeneralConfig.json --field Role --value "Торговец" --id 3
+    python trader_editor.py ids add-category TraderPlusIDsConfig.json --id 0 --category "Медицина"
+    python trader_editor.py run TraderPlusPriceConfig.json changes.txt
+    python trader_editor.py check /путь/к/папке/TraderPlus/Config
+    python trader_editor.py validate TraderPlusPriceConfig.json --rules not_numeric,sell_above_buy
+    python trader_editor.py diff old/TraderPlusPriceConfig.json new/TraderPlusPriceConfig.json
+    python trader_editor.py merge base.json server.json upstream.json -o merged.json
+
+Файл сценария для run содержит по одной операции на строку в том же формате,
+но без имени файла, например: price scale --field sell --factor 0.9 --category "Еда*".
+Все операции сценария применяются к одной загрузке файла и сохраняются одной записью.
+"""
+
+import argparse
+import fnmatch
+import shlex
+import sys
+
+from trader_io import load_config, save_config
+from trader_merge import describe_change, describe_conflict, diff_configs, merge_configs
+from trader_pricing import PRICING_FIELDS, plan_pricing, plan_set
+from trader_store import ConfigDocument, detect_file_type
+from trader_validation import ERROR, RULES, SEVERITY_LABELS, ValidationResults, Validator
+from trader_workspace import WORKSPACE_FILES, Workspace
+
+COMMANDS = ('info', 'price', 'general', 'ids', 'run', 'check', 'validate', 'diff', 'merge')
+
+PRODUCT_FIELDS = {
+    'coef': 'coefficient',
+    'maxstock': 'maxstock',
+    'qty': 'quantity',
+    'buy': 'buy_price',
+    'sell': 'sell_price',
+}
+
+WILDCARDS = set('*?[')
+
+
+class CliError(Exception):
+    """Ошибка выполнения команды (сообщение выводится пользователю)"""
+
+
+def parse_value(text):
+    """Разбор значения из командной строки: целое, дробное или строка"""
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+
+def matches(pattern, text):
+    """Сравнение с шаблоном вида "*ammo*" без учета регистра"""
+    return pattern is None or fnmatch.fnmatchcase(text.lower(), pattern.lower())
+
+
+def select_categories(document, pattern):
+    """Индексы категорий по шаблону названия без учета регистра.
+
+    Название без шаблонных символов ищется по индексу названий.
+    """
+    if pattern is not None and not WILDCARDS & set(pattern):
+        name = pattern.lower()
+        return sorted(document.record_position(category) for category in document.search_categories(name)
+                      if category['CategoryName'].lower() == name)
+    return [i for i, category in enumerate(document.records()) if matches(pattern, category['CategoryName'])]
+
+
+def select_products(document, category_pattern, classname_pattern):
+    """Товары по шаблонам категории и класснейма: (индекс категории, индекс товара, товар).
+
+    Как и шаблоны, точный класснейм сравнивается без учета регистра:
+    все его варианты находятся по индексу класснеймов.
+    """
+    if classname_pattern is not None and not WILDCARDS & set(classname_pattern):
+        name = classname_pattern.lower()
+        categories = set(select_categories(document, category_pattern))
+        locations = []
+        for classname in document.classname_index.query(name):
+            if classname.lower() == name:
+                locations.extend(document.find_products(classname))
+        for category_index, product_index in sorted(locations):
+            if category_index in categories:
+                product = document.products(category_index)[product_index]
+                if product.is_valid:
+                    yield category_index, product_index, product
+        return
+    for category_index in select_categories(document, category_pattern):
+        for product_index, product in enumerate(document.products(category_index)):
+            if product.is_valid and matches(classname_pattern, product.classname):
+                yield category_index, product_index, product
+
+
+def require_type(document, file_type):
+    if document.file_type != file_type:
+        names = {"price": "цен", "general": "торговцев", "ids": "ID торговцев"}
+        raise CliError(f"Операция требует файл {names[file_type]}, а загружен файл типа '{document.file_type}'")
+
+
+def report(args, message):
+    if args.verbose:
+        print(message)
+
+
+# --- Операции ---
+
+def op_info(document, args):
+    """Сводка по файлу"""
+    print(f"Тип файла: {document.file_type}")
+    if document.file_type == "price":
+        products = sum(len(category['Products']) for category in document.records())
+        print(f"Категорий: {len(document.records())}")
+        print(f"Товаров: {products}")
+        print(f"Уникальных класснеймов: {len(document.product_locations)}")
+    elif document.file_type == "general":
+        print(f"Торговцев: {len(document.records())}")
+    elif document.file_type == "ids":
+        print(f"Записей ID: {len(document.records())}")
+    return 0
+
+
+def op_price_list(document, args):
+    """Вывод товаров по фильтру"""
+    require_type(document, "price")
+    for category_index, _, product in select_products(document, args.category, args.classname):
+        print(f"{document.record(category_index)['CategoryName']};{product.to_csv()}")
+    return 0
+
+
+def op_price_pricing(document, args):
+    """Массовое изменение цен: scale, markup, ratio, round, clamp"""
+    require_type(document, "price")
+    if args.action == 'scale':
+        operation = ('scale', args.field, args.factor)
+    elif args.action == 'markup':
+        operation = ('markup', args.field, args.percent)
+    elif args.action == 'ratio':
+        operation = ('ratio', args.field, args.source, args.ratio)
+    elif args.action == 'round':
+        operation = ('round', args.field, args.step)
+    else:
+        operation = ('clamp', args.field, args.min, args.max)
+    changes = plan_pricing(select_products(document, args.category, args.classname), [operation])
+    if args.verbose:
+        for category_index, product_index, product in changes:
+            old = document.products(category_index)[product_index]
+            print(f"{document.record(category_index)['CategoryName']} | {product.classname}: "
+                  f"{old.to_csv()} -> {product.to_csv()}")
+    document.set_products(changes)
+    return len(changes)
+
+
+def op_price_set(document, args):
+    """Установка значения поля товаров"""
+    require_type(document, "price")
+    attribute = PRODUCT_FIELDS[args.field]
+    value = parse_value(args.value)
+    changes = plan_set(select_products(document, args.category, args.classname), attribute, value)
+    for category_index, product_index, product in changes:
+        old = getattr(document.products(category_index)[product_index], attribute)
+        report(args, f"{document.record(category_index)['CategoryName']} | {product.classname}: "
+                     f"{args.field} {old} -> {value}")
+    document.set_products(changes)
+    return len(changes)
+
+
+def select_traders(document, args):
+    if args.id is not None:
+        index = document.find_trader(trader_id=args.id)
+        return [] if index is None else [index]
+    return [i for i, trader in enumerate(document.records()) if matches(args.name, trader.get('GivenName', ''))]
+
+
+def op_general_set(document, args):
+    """Установка поля торговцев"""
+    require_type(document, "general")
+    value = parse_value(args.value)
+    changed = 0
+    for index in select_traders(document, args):
+        trader = document.record(index)
+        if trader.get(args.field) != value:
+            document.set_record(index, dict(trader, **{args.field: value}))
+            report(args, f"{trader.get('GivenName', '')}: {args.field} {trader.get(args.field)} -> {value}")
+            changed += 1
+    return changed
+
+
+def select_ids(document, args):
+    if args.id is not None:
+        index = document.find_id(args.id)
+        return [] if index is None else [index]
+    return list(range(len(document.records())))
+
+
+def op_ids_add_category(document, args):
+    """Добавление категории в записи IDs"""
+    require_type(document, "ids")
+    changed = 0
+    for index in select_ids(document, args):
+        entry = document.record(index)
+        categories = entry.get('Categories', [])
+        if args.category not in categories:
+            document.set_record(index, dict(entry, Categories=categories + [args.category]))
+            report(args, f"ID {entry.get('Id')}: + {args.category}")
+            changed += 1
+    return changed
+
+
+def op_ids_remove_category(document, args):
+    """Удаление категории из записей IDs"""
+    require_type(document, "ids")
+    changed = 0
+    for index in select_ids(document, args):
+        entry = document.record(index)
+        categories = entry.get('Categories', [])
+        if args.category in categories:
+            document.set_record(index, dict(entry, Categories=[c for c in categories if c != args.category]))
+            report(args, f"ID {entry.get('Id')}: - {args.category}")
+            changed += 1
+    return changed
+
+
+def check_workspace(directory):
+    """Проверка связей между файлами папки, код возврата 1 при найденных проблемах"""
+    workspace = Workspace.from_directory(directory)
+    if not workspace.documents:
+        raise CliError(f"В папке нет файлов {', '.join(WORKSPACE_FILES.values())}")
+    for file_type, path in workspace.paths.items():
+        print(f"{file_type}: {path}")
+    for kind, key in workspace.problem_list():
+        print(workspace.describe(kind, key))
+    count = workspace.problem_count()
+    print(f"Проблем: {count}")
+    return 1 if count else 0
+
+
+def validate_file(path, codes=None, modules=()):
+    """Проверка файла цен по правилам, код возврата 1 при найденных ошибках"""
+    document = ConfigDocument(load_config(path))
+    require_type(document, "price")
+    try:
+        validator = Validator(codes, modules)
+    except ImportError as e:
+        raise CliError(f"Не удалось загрузить модуль правил: {e}")
+    results = ValidationResults(document)
+    categories = document.records()
+    try:
+        results.add(categories, validator.validate(categories))
+    finally:
+        validator.shutdown()
+    findings = results.findings()
+    errors = 0
+    for finding in findings:
+        name = categories[finding.category_index]['CategoryName']
+        print(f"{SEVERITY_LABELS[finding.severity]} [{finding.code}] {name}: {finding.message}")
+        errors += finding.severity == ERROR
+    print(f"Ошибок: {errors}, предупреждений: {len(findings) - errors}")
+    return 1 if errors else 0
+
+
+def diff_files(old_path, new_path):
+    """Структурное сравнение двух файлов, код возврата 1 при различиях"""
+    old = load_config(old_path)
+    new = load_config(new_path)
+    changes = diff_configs(old, new)
+    for change in changes:
+        print(describe_change(detect_file_type(old), change))
+    print(f"Изменений: {len(changes)}")
+    return 1 if changes else 0
+
+
+def merge_files(args):
+    """Трехстороннее слияние, код возврата 1 при неразрешенных конфликтах"""
+    result = merge_configs(load_config(args.base), load_config(args.ours), load_config(args.theirs),
+                           args.prefer)
+    for conflict in result.conflicts:
+        print(f"Конфликт: {describe_conflict(result.file_type, conflict)}")
+    print(f"Перенесено изменений из {args.theirs}: {len(result.applied)}, конфликтов: {len(result.conflicts)}")
+    if result.conflicts and args.prefer is None:
+        print("Файл не сохранен: укажите --prefer ours или --prefer theirs")
+        return 1
+    if args.dry_run:
+        return 0
+    output = args.output or args.ours
+    size = save_config(output, result.data)
+    print(f"Сохранено: {output} ({size} байт)")
+    return 0
+
+
+# --- Разбор аргументов ---
+
+def add_product_filters(parser):
+    parser.add_argument('--category', help="шаблон названия категории (например \"*Оружие*\")")
+    parser.add_argument('--classname', help="шаблон класснейма (например \"Ammo_*\")")
+
+
+def common_options():
+    """Общие ключи команд, работающих с файлом"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('-o', '--output', help="записать результат в другой файл")
+    parser.add_argument('-n', '--dry-run', action='store_true', help="только показать изменения, не сохранять")
+    parser.add_argument('-v', '--verbose', action='store_true', help="выводить каждое изменение")
+    return parser
+
+
+def add_operations(subparsers, with_file):
+    """Описание операций; в сценарии run имя файла и общие ключи не указываются"""
+    parents = [common_options()] if with_file else []
+
+    def add(group_parsers, name, func, help_text):
+        parser = group_parsers.add_parser(name, help=help_text, parents=parents)
+        if with_file:
+            parser.add_argument('file', help="файл конфигурации")
+        parser.set_defaults(func=func)
+        return parser
+
+    price = subparsers.add_parser('price', help="операции над файлом цен").add_subparsers(dest='action', required=True)
+    parser = add(price, 'list', op_price_list, "вывод товаров")
+    add_product_filters(parser)
+    fields = sorted(PRICING_FIELDS)
+    pricing = (
+        ('scale', "умножение поля на коэффициент", {'--factor': dict(type=float, required=True)}),
+        ('markup', "наценка в процентах (отрицательная - скидка)", {'--percent': dict(type=float, required=True)}),
+        ('ratio', "поле как доля другого поля (--field sell --source buy --ratio 0.5)",
+         {'--source': dict(choices=fields, required=True), '--ratio': dict(type=float, required=True)}),
+        ('round', "округление до шага", {'--step': dict(type=float, required=True)}),
+        ('clamp', "ограничение диапазоном", {'--min': dict(type=float), '--max': dict(type=float)}),
+    )
+    for name, help_text, options in pricing:
+        parser = add(price, name, op_price_pricing, help_text)
+        parser.add_argument('--field', required=True, choices=fields)
+        for option, kwargs in options.items():
+            parser.add_argument(option, **kwargs)
+        add_product_filters(parser)
+    parser = add(price, 'set', op_price_set, "установка значения поля")
+    parser.add_argument('--field', required=True, choices=sorted(PRODUCT_FIELDS))
+    parser.add_argument('--value', required=True)
+    add_product_filters(parser)
+
+    general = subparsers.add_parser('general', help="операции над файлом торговцев").add_subparsers(
+        dest='action', required=True)
+    parser = add(general, 'set', op_general_set, "установка поля торговцев")
+    parser.add_argument('--field', required=True)
+    parser.add_argument('--value', required=True)
+    parser.add_argument('--id', type=int, help="Id торговца")
+    parser.add_argument('--name', help="шаблон отображаемого имени")
+
+    ids = subparsers.add_parser('ids', help="операции над файлом ID торговцев").add_subparsers(
+        dest='action', required=True)
+    for name, func, help_text in (('add-category', op_ids_add_category, "добавление категории"),
+                                  ('remove-category', op_ids_remove_category, "удаление категории")):
+        parser = add(ids, name, func, help_text)
+        parser.add_argument('--category', required=True)
+        parser.add_argument('--id', type=int, help="Id торговца (по умолчанию - все записи)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="trader_editor", description="Пакетная обработка конфигов TraderPlus")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    info = subparsers.add_parser('info', help="сводка по файлу")
+    info.add_argument('file')
+    info.set_defaults(func=op_info)
+
+    check = subparsers.add_parser('check', help="проверка связей между файлами цен, торговцев и IDs")
+    check.add_argument('directory', help="папка с файлами TraderPlus")
+
+    validate = subparsers.add_parser('validate', help="проверка файла цен по правилам")
+    validate.add_argument('file')
+    validate.add_argument('--rules', help=f"правила через запятую (по умолчанию все: {', '.join(RULES)})")
+    validate.add_argument('--plugin', action='append', default=[],
+                          help="модуль с дополнительными правилами (можно указать несколько раз)")
+
+    diff = subparsers.add_parser('diff', help="сравнение двух версий файла по категориям, товарам и Id")
+    diff.add_argument('old')
+    diff.add_argument('new')
+
+    merge = subparsers.add_parser('merge', help="трехстороннее слияние версий файла")
+    merge.add_argument('base', help="общая исходная версия")
+    merge.add_argument('ours', help="наша версия (по умолчанию результат записывается в нее)")
+    merge.add_argument('theirs', help="другая версия, изменения которой переносятся")
+    merge.add_argument('--prefer', choices=('ours', 'theirs'),
+                       help="какую версию брать в конфликтах (без ключа при конфликтах файл не сохраняется)")
+    merge.add_argument('-o', '--output', help="записать результат в другой файл")
+    merge.add_argument('-n', '--dry-run', action='store_true', help="только показать результат, не сохранять")
+
+    run = subparsers.add_parser('run', help="выполнение сценария операций", parents=[common_options()])
+    run.add_argument('file')
+    run.add_argument('script', help="файл сценария, по одной операции на строку")
+    run.set_defaults(func=None)
+
+    add_operations(subparsers, with_file=True)
+    return parser
+
+
+def build_script_parser():
+    parser = argparse.ArgumentParser(prog="сценарий", add_help=False)
+    add_operations(parser.add_subparsers(dest='command', required=True), with_file=False)
+    return parser
+
+
+def read_script(path, options):
+    """Разбор файла сценария в список операций"""
+    parser = build_script_parser()
+    operations = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                args = parser.parse_args(shlex.split(line))
+            except SystemExit:
+                raise CliError(f"{path}:{line_number}: не удалось разобрать операцию: {line}")
+            args.verbose = options.verbose
+            operations.append((line, args))
+    return operations
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == 'check':
+            return check_workspace(args.directory)
+        if args.command == 'validate':
+            codes = args.rules.split(',') if args.rules else None
+            return validate_file(args.file, codes, args.plugin)
+        if args.command == 'diff':
+            return diff_files(args.old, args.new)
+        if args.command == 'merge':
+            return merge_files(args)
+        document = ConfigDocument(load_config(args.file))
+        if args.command == 'info':
+            return op_info(document, args)
+
+        if args.command == 'run':
+            operations = read_script(args.script, args)
+        else:
+            operations = [(f"{args.command} {args.action}", args)]
+
+        total = 0
+        for title, operation in operations:
+            changed = operation.func(document, operation)
+            if operation.func is not op_price_list:
+                print(f"{title}: изменено записей: {changed}")
+                total += changed
+
+        if total and not args.dry_run:
+            output = args.output or args.file
+            size = save_config(output, document.data)
+            print(f"Сохранено: {output} ({size} байт)")
+        return 0
+    except (CliError, OSError, ValueError) as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
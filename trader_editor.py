@@ -1,49 +1,60 @@
 import sys
-import json
 import os
+import threading
+import multiprocessing
+import time
 from typing import Dict, List, Any
+
+if __name__ == "__main__":
+    # Процессы пула проверки в собранном exe запускаются через этот же файл
+    multiprocessing.freeze_support()
+    
+    # Пакетный режим: подкоманды выполняются до импорта PyQt5, поэтому Qt
+    # и окно в пакетном режиме не загружаются совсем
+    if len(sys.argv) > 1:
+        import trader_cli
+        if sys.argv[1] in trader_cli.COMMANDS:
+            sys.exit(trader_cli.main(sys.argv[1:]))
+
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QLabel, QLineEdit, QCheckBox, QPushButton,
-                             QTreeWidget, QTreeWidgetItem, QMenuBar, QStatusBar,
+                             QTreeView, QMenuBar, QStatusBar,
                              QFileDialog, QMessageBox, QInputDialog, QDialog,
                              QFormLayout, QHeaderView, QMenu,
-                             QAction, QProgressBar, QSplitter, QTextEdit, QSizePolicy)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, QSettings
-from PyQt5.QtGui import QFont, QIcon, QPalette, QColor, QKeySequence, QPixmap
+                             QAction, QProgressBar, QSplitter, QTextEdit, QSizePolicy,
+                             QListWidget, QListWidgetItem, QComboBox, QAbstractItemView,
+                             QTableWidget, QTableWidgetItem)
+from PyQt5.QtCore import (Qt, QObject, QThread, pyqtSignal, QTimer, QSettings, QModelIndex,
+                          QAbstractTableModel, QSortFilterProxyModel, QFileSystemWatcher)
+from PyQt5.QtGui import QKeySequence
+
+import trader_perf
+import trader_theme
+from trader_io import get_codec, load_config, save_config, snapshot_config
+from trader_search import is_numeric_query
+from trader_store import HEADER_STEPS, RECORD_KEYS, ConfigDocument, Product, detect_file_type, product_matches
 
 class TraderPlusEditor(QMainWindow):
     def __init__(self):
         super().__init__()
         
         # Данные
-        self.config_data = {}
+        self.document = ConfigDocument()
+        self.config_data = self.document.data
         self.current_file = ""
         self.file_type = "price"  # "price" или "general"
         
+        # Рабочая область: все открытые файлы цен, торговцев и ID вместе
+        # (создается при загрузке первого файла, ensure_workspace)
+        self.workspace = None
+        self._load_queue = []
+        
         # Настройка окна
         self.setWindowTitle("TraderPlusEditor")
         self.setGeometry(100, 100, 1000, 800)
         
-        # Установка иконки окна
-        try:
-            # Пробуем загрузить иконку из файла
-            icon_path = os.path.join(os.path.dirname(__file__), 'icon.ico')
-            if os.path.exists(icon_path):
-                self.setWindowIcon(QIcon(icon_path))
-                print(f"Иконка загружена: {icon_path}")
-            else:
-                # Если файл не найден, создаем простую иконку
-                print(f"Файл иконки не найден: {icon_path}")
-                # Создаем простую иконку
-                pixmap = QPixmap(32, 32)
-                pixmap.fill(QColor(52, 152, 219))  # Синий цвет
-                self.setWindowIcon(QIcon(pixmap))
-        except Exception as e:
-            print(f"Ошибка загрузки иконки: {e}")
-            # Создаем простую иконку в случае ошибки
-            pixmap = QPixmap(32, 32)
-            pixmap.fill(QColor(52, 152, 219))
-            self.setWindowIcon(QIcon(pixmap))
+        # Установка иконки окна (диалоги наследуют ее от родителя)
+        self.setWindowIcon(trader_theme.icon())
         
         # Установка минимального размера
         self.setMinimumSize(1100, 800)
@@ -54,109 +65,111 @@ class TraderPlusEditor(QMainWindow):
         # Создание интерфейса
         self.create_interface()
         self.setup_drag_drop()
+        self.setup_save_worker()
+        self.setup_undo_actions()
+        self.setup_validation()
+        self.setup_file_watcher()
+        self.setup_perf()
+        
+    def setup_save_worker(self):
+        """Фоновое сохранение: правки копятся и записываются одной операцией.
+        
+        Каждая правка сразу дописывается в журнал рядом с файлом, поэтому
+        полная перезапись файла (сжатие журнала) может выполняться реже.
+        """
+        settings = QSettings("TraderPlusEditor", "TraderPlusEditor")
+        self.journals = {}
+        
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(settings.value("autosave/delay_ms", 3000, type=int))
+        self.save_timer.timeout.connect(self.flush_auto_save)
+        self._manual_save_requested = False
+        
+        self.save_thread = QThread(self)
+        self.save_worker = SaveWorker()
+        self.save_worker.moveToThread(self.save_thread)
+        self.save_worker.started.connect(self.on_save_started)
+        self.save_worker.saved.connect(self.on_save_finished)
+        self.save_worker.failed.connect(self.on_save_failed)
+        self.save_worker.conflict.connect(self.on_save_conflict)
+        self.save_thread.start()
+        
+    def setup_undo_actions(self):
+        """Горячие клавиши отмены и повтора правок"""
+        self.undo_action = QAction("Отменить", self)
+        self.undo_action.setShortcut(QKeySequence.Undo)
+        self.undo_action.triggered.connect(self.undo)
+        self.addAction(self.undo_action)
+        
+        self.redo_action = QAction("Повторить", self)
+        self.redo_action.setShortcuts([QKeySequence.Redo, QKeySequence("Ctrl+Shift+Z")])
+        self.redo_action.triggered.connect(self.redo)
+        self.addAction(self.redo_action)
+        
+    def setup_validation(self):
+        """Проверка файла цен: находки приходят порциями из фонового потока,
+        после правок повторно проверяются только измененные категории"""
+        self.validator = None
+        self.validation_results = None
+        self.validation_worker = None
+        self.validation_thread = None
+        self._validation_categories = []
+        
+        self.revalidate_timer = QTimer(self)
+        self.revalidate_timer.setSingleShot(True)
+        self.revalidate_timer.setInterval(300)
+        self.revalidate_timer.timeout.connect(self.revalidate_dirty)
+        
+    def setup_file_watcher(self):
+        """Отслеживание изменений открытого файла другими программами.
+        
+        Для каждого файла хранится его состояние при последней загрузке или
+        записи (FileBase): по нему изменения на диске отличаются от своих
+        несохраненных правок, и в документ попадают только измененные записи.
+        """
+        self.file_bases = {}
+        self.reload_worker = None
+        self.reload_thread = None
+        
+        self.file_watcher = QFileSystemWatcher(self)
+        self.file_watcher.fileChanged.connect(self.on_file_changed)
+        
+        # Программы часто пишут файл в несколько приемов - ждем окончания записи
+        self.external_timer = QTimer(self)
+        self.external_timer.setSingleShot(True)
+        self.external_timer.setInterval(500)
+        self.external_timer.timeout.connect(self.check_external_change)
+        
+    def setup_perf(self):
+        """Замеры горячих путей (включаются в окне производительности)"""
+        settings = QSettings("TraderPlusEditor", "TraderPlusEditor")
+        trader_perf.recorder.enabled = settings.value("perf/enabled", False, type=bool)
+        self.perf_dialog = None
+        self._load_span = None
+        
+        self.perf_action = QAction("Производительность", self)
+        self.perf_action.setShortcut(QKeySequence("Ctrl+Shift+P"))
+        self.perf_action.triggered.connect(self.show_perf_dialog)
+        self.addAction(self.perf_action)
+        
+    def show_perf_dialog(self):
+        """Окно счетчиков производительности (немодальное)"""
+        if self.perf_dialog is None:
+            self.perf_dialog = PerfDialog(self)
+        self.perf_dialog.show()
+        self.perf_dialog.raise_()
         
     def setup_application_style(self):
         """Настройка стилей всего приложения"""
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #f5f5f5;
-            }
-            
-            QLabel {
-                font-size: 13px;
-                color: #333;
-            }
-            
-            QLineEdit {
-                font-size: 13px;
-                padding: 8px 12px;
-                border: 2px solid #ddd;
-                border-radius: 6px;
-                background-color: white;
-            }
-            
-            QLineEdit:focus {
-                border-color: #4CAF50;
-                outline: none;
-            }
-            
-            QPushButton {
-                font-size: 13px;
-                font-weight: bold;
-                padding: 10px 20px;
-                border: none;
-                border-radius: 6px;
-                background-color: #4CAF50;
-                color: white;
-                min-width: 100px;
-            }
-            
-            QPushButton:hover {
-                background-color: #45a049;
-            }
-            
-            QPushButton:pressed {
-                background-color: #3d8b40;
-            }
-            
-            QTreeWidget {
-                font-size: 13px;
-                border: 1px solid #ddd;
-                border-radius: 6px;
-                background-color: white;
-                alternate-background-color: #f8f9fa;
-                selection-background-color: #e3f2fd;
-            }
-            
-            QTreeWidget::item {
-                padding: 8px;
-                border-bottom: 1px solid #eeeeee;
-            }
-            
-            QTreeWidget::item:selected {
-                background-color: #2196F3;
-                color: white;
-            }
-            
-            QTreeWidget::item:hover {
-                background-color: #e8f4f8;
-            }
-            
-            QHeaderView::section {
-                font-size: 14px;
-                font-weight: bold;
-                padding: 12px;
-                border: none;
-                border-right: 1px solid #ddd;
-                border-bottom: 2px solid #4CAF50;
-                background-color: #fafafa;
-            }
-            
-            QStatusBar {
-                font-size: 12px;
-                background-color: #eeeeee;
-                border-top: 1px solid #ddd;
-                padding: 5px;
-            }
-            
-
-        """)
+        trader_theme.apply(QApplication.instance())
         
     def create_interface(self):
         """Создание основного интерфейса"""
         
         # Информация о файле (создаем заранее)
         self.file_info_label = QLabel("📄 Файл не загружен")
-        self.file_info_label.setStyleSheet("""
-            QLabel {
-                font-size: 13px;
-                color: #7f8c8d;
-                background-color: #ecf0f1;
-                padding: 8px 15px;
-                border-radius: 6px;
-                border: 1px solid #bdc3c7;
-            }
-        """)
+        trader_theme.set_role(self.file_info_label, 'file')
         
         # Центральный виджет
         central_widget = QWidget()
@@ -188,18 +201,7 @@ class TraderPlusEditor(QMainWindow):
         self.drag_hint_label.setMinimumHeight(150)
         self.drag_hint_label.setMaximumHeight(200)
         self.drag_hint_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        self.drag_hint_label.setStyleSheet("""
-            QLabel {
-                font-size: 16px;
-                color: #3498db;
-                background-color: #f8f9fa;
-                padding: 40px 30px;
-                border: 3px dashed #3498db;
-                border-radius: 15px;
-                margin: 10px;
-                font-weight: bold;
-            }
-        """)
+        trader_theme.set_role(self.drag_hint_label, 'drag_hint')
         self.drag_hint_label.setText("📁 Перетащите файл конфигурации TraderPlus сюда\n\n"
                                    "Поддерживаемые файлы:\n\n"
                                    "TraderPlusPriceConfig.json\n"
@@ -207,6 +209,14 @@ class TraderPlusEditor(QMainWindow):
                                    "TraderPlusIDsConfig.json")
         content_layout.addWidget(self.drag_hint_label)
         
+        # Панели проблем связей и результатов проверки создаются при первой
+        # необходимости (ensure_problems_panel, ensure_validation_panel)
+        self.content_layout = content_layout
+        self.problems_label = None
+        self.problems_list = None
+        self.validation_label = None
+        self.validation_list = None
+        
         main_layout.addWidget(self.content_container)
         
         # Кнопки управления
@@ -216,18 +226,21 @@ class TraderPlusEditor(QMainWindow):
         # Статусная строка
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
-        self.status_bar.setStyleSheet("""
-            QStatusBar {
-                font-size: 13px;
-                background-color: #34495e;
-                color: white;
-                border-top: 2px solid #3498db;
-                padding: 8px;
-                font-weight: bold;
-            }
-        """)
         self.status_bar.showMessage("🚀 Готов к работе")
         
+        # Индикатор фоновой загрузки файла
+        self.load_worker = None
+        self.load_thread = None
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 100)
+        self.load_progress.setMaximumWidth(250)
+        self.load_progress.hide()
+        self.status_bar.addPermanentWidget(self.load_progress)
+        self.load_cancel_button = QPushButton("Отмена")
+        self.load_cancel_button.clicked.connect(self.cancel_loading)
+        self.load_cancel_button.hide()
+        self.status_bar.addPermanentWidget(self.load_cancel_button)
+        
         # Показываем подсказку при запуске
         self.show_drag_drop_hint()
         
@@ -238,14 +251,7 @@ class TraderPlusEditor(QMainWindow):
         
         # Поиск
         search_label = QLabel("🔍 Поиск:")
-        search_label.setStyleSheet("""
-            QLabel {
-                font-size: 14px;
-                font-weight: bold;
-                color: #34495e;
-                margin-right: 5px;
-            }
-        """)
+        trader_theme.set_role(search_label, 'search')
         header_layout.addWidget(search_label)
         
         self.search_entry = QLineEdit()
@@ -253,49 +259,24 @@ class TraderPlusEditor(QMainWindow):
         self.search_entry.setMaximumWidth(400)
         self.search_entry.setPlaceholderText("Введите текст для поиска категорий и товаров...")
         self.search_entry.textChanged.connect(self.on_search_change)
-        self.search_entry.setStyleSheet("""
-            QLineEdit {
-                font-size: 14px;
-                padding: 12px 16px;
-                border: 2px solid #bdc3c7;
-                border-radius: 8px;
-                background-color: white;
-            }
-            
-            QLineEdit:focus {
-                border-color: #3498db;
-                box-shadow: 0 0 5px rgba(52, 152, 219, 0.3);
-            }
-        """)
+        trader_theme.set_role(self.search_entry, 'search')
         header_layout.addWidget(self.search_entry)
         
         # Кнопка очистки
         clear_button = QPushButton("🗑️ Очистить")
         clear_button.clicked.connect(self.clear_search)
-        clear_button.setStyleSheet("""
-            QPushButton {
-                font-size: 13px;
-                font-weight: bold;
-                padding: 12px 20px;
-                border: none;
-                border-radius: 8px;
-                background-color: #e74c3c;
-                color: white;
-                margin-left: 10px;
-            }
-            
-            QPushButton:hover {
-                background-color: #c0392b;
-            }
-            
-            QPushButton:pressed {
-                background-color: #a93226;
-            }
-        """)
+        trader_theme.set_role(clear_button, 'clear', 'red')
         header_layout.addWidget(clear_button)
         
         header_layout.addStretch()
         
+        # Переключение между файлами рабочей области
+        self.file_switcher = QComboBox()
+        self.file_switcher.setMinimumWidth(260)
+        self.file_switcher.activated.connect(self.on_file_switched)
+        self.file_switcher.hide()
+        header_layout.addWidget(self.file_switcher)
+        
         # Информация о файле
         header_layout.addWidget(self.file_info_label)
         
@@ -303,8 +284,18 @@ class TraderPlusEditor(QMainWindow):
         
     def create_category_table(self):
         """Создание таблицы категорий"""
-        self.category_table = QTreeWidget()
-        self.category_table.setHeaderLabels(["📂 Название категории", "📊 Информация о товарах"])
+        # Модель строится по данным конфига, прокси отвечает за поиск
+        self.list_model = ConfigListModel(self)
+        self.list_proxy = ConfigFilterProxyModel(self)
+        self.list_proxy.setSourceModel(self.list_model)
+        
+        # Поиск запускается после паузы в наборе текста
+        settings = QSettings("TraderPlusEditor", "TraderPlusEditor")
+        search_delay = settings.value("search/debounce_ms", SearchController.DEFAULT_DELAY_MS, type=int)
+        self.search_controller = SearchController(self.list_model, self.list_proxy, search_delay, self)
+        
+        self.category_table = QTreeView()
+        self.category_table.setModel(self.list_proxy)
         
         # Настройка колонок
         header = self.category_table.header()
@@ -317,55 +308,14 @@ class TraderPlusEditor(QMainWindow):
         # Настройка внешнего вида
         self.category_table.setAlternatingRowColors(True)
         self.category_table.setRootIsDecorated(False)
-        self.category_table.setSelectionBehavior(QTreeWidget.SelectRows)
+        self.category_table.setUniformRowHeights(True)
+        self.category_table.setSelectionBehavior(QTreeView.SelectRows)
         
         # Увеличиваем высоту строк
-        self.category_table.setStyleSheet("""
-            QTreeWidget {
-                font-size: 14px;
-                border: 2px solid #bdc3c7;
-                border-radius: 8px;
-                background-color: white;
-                alternate-background-color: #f8f9fa;
-                selection-background-color: #3498db;
-                gridline-color: #ecf0f1;
-            }
-            
-            QTreeWidget::item {
-                padding: 12px 8px;
-                border-bottom: 1px solid #ecf0f1;
-                font-size: 14px;
-            }
-            
-            QTreeWidget::item:selected {
-                background-color: #3498db;
-                color: white;
-                font-weight: bold;
-            }
-            
-            QTreeWidget::item:hover {
-                background-color: #e8f4f8;
-                color: #2c3e50;
-            }
-            
-            QHeaderView::section {
-                font-size: 15px;
-                font-weight: bold;
-                padding: 15px 10px;
-                border: none;
-                border-right: 1px solid #bdc3c7;
-                border-bottom: 3px solid #3498db;
-                background-color: #ecf0f1;
-                color: #2c3e50;
-            }
-            
-            QHeaderView::section:hover {
-                background-color: #d5dbdb;
-            }
-        """)
+        trader_theme.set_role(self.category_table, 'categories')
         
         # Подключение событий
-        self.category_table.itemDoubleClicked.connect(self.on_category_double_click)
+        self.category_table.doubleClicked.connect(self.on_category_double_click)
         
     def show_drag_drop_hint(self):
         """Показать подсказку о перетаскивании файлов"""
@@ -381,114 +331,94 @@ class TraderPlusEditor(QMainWindow):
         """Создание секции кнопок"""
         buttons_layout = QHBoxLayout()
         
-        # Стиль для кнопок
-        button_style = """
-            QPushButton {
-                font-size: 14px;
-                font-weight: bold;
-                padding: 15px 25px;
-                border: none;
-                border-radius: 8px;
-                color: white;
-                margin: 5px;
-                min-width: 150px;
-            }
-        """
-        
         self.add_button = QPushButton("➕ Добавить категорию")
         self.add_button.clicked.connect(self.add_category)
-        self.add_button.setStyleSheet(button_style + """
-            QPushButton {
-                background-color: #27ae60;
-            }
-            QPushButton:hover {
-                background-color: #229954;
-            }
-            QPushButton:pressed {
-                background-color: #1e8449;
-            }
-        """)
+        trader_theme.set_role(self.add_button, 'action', 'green')
         buttons_layout.addWidget(self.add_button)
         
         self.delete_button = QPushButton("🗑️ Удалить категорию")
         self.delete_button.clicked.connect(self.delete_category)
-        self.delete_button.setStyleSheet(button_style + """
-            QPushButton {
-                background-color: #e74c3c;
-            }
-            QPushButton:hover {
-                background-color: #c0392b;
-            }
-            QPushButton:pressed {
-                background-color: #a93226;
-            }
-        """)
+        trader_theme.set_role(self.delete_button, 'action', 'red')
         buttons_layout.addWidget(self.delete_button)
         
+        # Массовое изменение цен (только для файла цен)
+        self.pricing_button = QPushButton("💲 Изменить цены")
+        self.pricing_button.clicked.connect(self.bulk_pricing)
+        trader_theme.set_role(self.pricing_button, 'action', 'teal')
+        self.pricing_button.hide()
+        buttons_layout.addWidget(self.pricing_button)
+        
+        # Проверка файла цен по правилам
+        self.validate_button = QPushButton("🔎 Проверить")
+        self.validate_button.clicked.connect(self.validate_file)
+        trader_theme.set_role(self.validate_button, 'action', 'purple')
+        self.validate_button.hide()
+        buttons_layout.addWidget(self.validate_button)
+        
+        # Сравнение и слияние с другой версией файла
+        self.merge_button = QPushButton("🔀 Слияние")
+        self.merge_button.clicked.connect(self.merge_file)
+        trader_theme.set_role(self.merge_button, 'action', 'dark')
+        self.merge_button.hide()
+        buttons_layout.addWidget(self.merge_button)
+        
         # Кнопка сохранить
         save_button = QPushButton("Сохранить")
         save_button.clicked.connect(self.save_file)
-        save_button.setStyleSheet(button_style + """
-            QPushButton {
-                background-color: #f39c12;
-            }
-            QPushButton:hover {
-                background-color: #e67e22;
-            }
-            QPushButton:pressed {
-                background-color: #d35400;
-            }
-        """)
+        trader_theme.set_role(save_button, 'action', 'orange')
         buttons_layout.addWidget(save_button)
         
         # Кнопка выгрузить файл
         unload_button = QPushButton("Закрыть файл")
         unload_button.clicked.connect(self.unload_file)
-        unload_button.setStyleSheet(button_style + """
-            QPushButton {
-                background-color: #9b59b6;
-            }
-            QPushButton:hover {
-                background-color: #8e44ad;
-            }
-            QPushButton:pressed {
-                background-color: #7d3c98;
-            }
-        """)
+        trader_theme.set_role(unload_button, 'action', 'violet')
         buttons_layout.addWidget(unload_button)
         
         buttons_layout.addStretch()
         
+        # Счетчики производительности
+        perf_button = QPushButton("📊")
+        perf_button.setToolTip("Производительность (Ctrl+Shift+P)")
+        perf_button.clicked.connect(self.show_perf_dialog)
+        trader_theme.set_role(perf_button, 'action', 'gray')
+        buttons_layout.addWidget(perf_button)
+        
         # Кнопка "О программе"
         about_button = QPushButton("О программе")
         about_button.clicked.connect(self.show_about_dialog)
-        about_button.setStyleSheet(button_style + """
-            QPushButton {
-                background-color: #3498db;
-            }
-            QPushButton:hover {
-                background-color: #2980b9;
-            }
-            QPushButton:pressed {
-                background-color: #21618c;
-            }
-        """)
+        trader_theme.set_role(about_button, 'action', 'blue')
         buttons_layout.addWidget(about_button)
         
         return buttons_layout
         
     def unload_file(self):
         """Выгрузка текущего файла"""
+        if self.is_loading():
+            self.cancel_loading()
+            return
         if not self.config_data:
             QMessageBox.information(self, "Информация", "Файл не загружен")
             return
             
-        # Очищаем данные
-        self.config_data = {}
+        # Дописываем несохраненные правки и очищаем данные
+        self.flush_auto_save()
+        self.detach_journal()
+        workspace = self.ensure_workspace()
+        workspace.remove_document(self.file_type)
+        if workspace.documents:
+            # Остальные файлы рабочей области остаются открытыми
+            self.switch_document(next(iter(workspace.documents)))
+            return
+        self.update_file_switcher()
+        self.watch_file("")
+        self.document = ConfigDocument()
+        self.config_data = self.document.data
         self.current_file = ""
         self.file_type = "price"
         
-        # Очищаем поиск
+        # Очищаем поиск и модель
+        self.list_model.set_document(self.document)
+        self.search_controller.reset()
         self.search_entry.clear()
         
         # Показываем подсказку и скрываем таблицу
@@ -496,16 +426,7 @@ class TraderPlusEditor(QMainWindow):
         
         # Обновляем информацию о файле
         self.file_info_label.setText("📄 Файл не загружен")
-        self.file_info_label.setStyleSheet("""
-            QLabel {
-                font-size: 13px;
-                color: #7f8c8d;
-                background-color: #ecf0f1;
-                padding: 8px 15px;
-                border-radius: 6px;
-                border: 1px solid #bdc3c7;
-            }
-        """)
+        trader_theme.set_state(self.file_info_label, None)
         
         # Обновляем заголовки кнопок
         self.update_button_labels()
@@ -526,76 +447,318 @@ class TraderPlusEditor(QMainWindow):
             
     def dropEvent(self, event):
         """Обработка сброса файла"""
-        files = [u.toLocalFile() for u in event.mimeData().urls()]
-        if files and files[0].lower().endswith('.json'):
-            self.load_file(files[0])
+        from trader_workspace import WORKSPACE_FILES
+        files = []
+        for path in (u.toLocalFile() for u in event.mimeData().urls()):
+            if os.path.isdir(path):
+                # Папка сервера: открываем все стандартные файлы TraderPlus из нее
+                files.extend(os.path.join(path, name) for name in WORKSPACE_FILES.values()
+                             if os.path.exists(os.path.join(path, name)))
+            elif path.lower().endswith('.json'):
+                files.append(path)
+        if files:
+            self.load_files(files)
         else:
             QMessageBox.warning(self, "Предупреждение", "Поддерживаются только JSON файлы")
             
-    def load_file(self, filename):
-        """Загрузка файла конфигурации"""
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                self.config_data = json.load(f)
-            self.current_file = filename
+    def load_files(self, filenames):
+        """Загрузка нескольких файлов в рабочую область по очереди"""
+        self._load_queue = list(filenames[1:])
+        self.load_file(filenames[0])
             
-            # Определяем тип файла
-            self.detect_file_type()
-            
-            # Скрываем подсказку и показываем таблицу
-            self.drag_hint_label.hide()
-            self.category_table.show()
-            
-            # Восстанавливаем нормальный размер подсказки
-            self.drag_hint_label.setMinimumHeight(150)
-            self.drag_hint_label.setMaximumHeight(200)
-            
-            # Очищаем таблицу перед загрузкой новых данных
-            self.category_table.clear()
+    def load_file(self, filename):
+        """Загрузка файла конфигурации.
+        
+        Файл читается и разбирается в отдельном потоке, категории появляются
+        в таблице порциями по мере готовности.
+        """
+        if self.load_worker is not None:
+            # Прерываем незавершенную загрузку другого файла
+            self.load_worker.cancel()
+        else:
+            # Несохраненные правки предыдущего файла записываем до подмены данных
+            self.flush_auto_save()
+            self.detach_journal()
+            self._previous_state = (self.document, self.current_file, self.file_type)
             
-            # Загружаем данные в зависимости от типа
-            if self.file_type == "price":
-                self.filter_categories()
-            elif self.file_type == "general":
-                self.filter_traders()
-            else:
-                self.filter_ids()
-                
-            # Обновляем заголовки кнопок
-            self.update_button_labels()
-                
-            self.file_info_label.setText(f"📄 {os.path.basename(filename)}")
-            self.file_info_label.setStyleSheet("""
-                QLabel {
-                    font-size: 13px;
-                    color: #27ae60;
-                    background-color: #d5f4e6;
-                    padding: 8px 15px;
-                    border-radius: 6px;
-                    border: 1px solid #27ae60;
-                    font-weight: bold;
-                }
-            """)
-            self.status_bar.showMessage(f"✅ Файл успешно загружен: {os.path.basename(filename)}")
+        # До окончания загрузки автосохранение и правки недоступны
+        self.current_file = ""
+        self.loading_file = filename
+        self._load_span = trader_perf.recorder.span('load_file')
+        self.set_editing_enabled(False)
+        
+        settings = QSettings("TraderPlusEditor", "TraderPlusEditor")
+        self.load_worker = LoadWorker(filename, settings.value("load/lazy_products", True, type=bool),
+                                      settings.value("load/stream_min_mb", 64, type=int) << 20)
+        self.load_thread = QThread(self)
+        self.load_worker.moveToThread(self.load_thread)
+        self.load_thread.started.connect(self.load_worker.run)
+        self.load_worker.progress.connect(self.on_load_progress)
+        self.load_worker.document_ready.connect(self.on_load_document)
+        self.load_worker.records_ready.connect(self.on_load_records)
+        self.load_worker.tail_ready.connect(self.on_load_tail)
+        self.load_worker.base_ready.connect(self.on_load_base)
+        self.load_worker.finished.connect(self.on_load_finished)
+        self.load_worker.failed.connect(self.on_load_failed)
+        self.load_worker.cancelled.connect(self.on_load_cancelled)
+        for signal in (self.load_worker.finished, self.load_worker.failed, self.load_worker.cancelled):
+            signal.connect(self.load_thread.quit)
+        self.load_thread.finished.connect(self.load_worker.deleteLater)
+        self.load_thread.finished.connect(self.load_thread.deleteLater)
+        
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+        self.load_cancel_button.show()
+        self.status_bar.showMessage(f"⏳ Загрузка: {os.path.basename(filename)}")
+        self.load_thread.start()
+        
+    def cancel_loading(self):
+        """Отмена загрузки файла"""
+        if self.load_worker is not None:
+            self.load_worker.cancel()
+            
+    def is_loading(self):
+        """Идет ли загрузка файла"""
+        return self.load_worker is not None
+        
+    def _is_current_loader(self):
+        # Сигналы прерванной загрузки игнорируются
+        return self.load_worker is not None and self.sender() is self.load_worker
+        
+    def on_load_progress(self, percent):
+        """Прогресс загрузки файла"""
+        if self._is_current_loader():
+            self.load_progress.setValue(percent)
+            
+    def on_load_document(self, config_data):
+        """Файл разобран: подключаем пустой документ, записи придут порциями"""
+        if not self._is_current_loader():
+            return
+        self.show_document(ConfigDocument(config_data, lazy=self.load_worker.lazy))
+        
+    def on_load_records(self, records):
+        """Очередная порция записей готова к отображению"""
+        if self._is_current_loader():
+            self.list_model.append_rows(records)
+            
+    def on_load_tail(self, values):
+        """Ключи верхнего уровня, стоящие в файле после списка записей"""
+        if self._is_current_loader():
+            self.document.data.update(values)
+            
+    def on_load_base(self, base):
+        """Состояние файла на диске, с которым будут сверяться изменения извне"""
+        if self._is_current_loader():
+            self.file_bases[self.loading_file] = base
+            
+    def on_load_finished(self):
+        """Загрузка завершена"""
+        if not self._is_current_loader():
+            return
+        filename = self.loading_file
+        self.finish_loading()
+        self.current_file = filename
+        self._load_span.rows = len(self.document.records())
+        self._load_span.bytes = os.path.getsize(filename)
+        self._load_span.finish()
+        
+        # Правки, не попавшие в файл из-за аварийного завершения
+        recovered = self.recover_journal(filename)
+        self.attach_journal(filename, recovered)
+        if recovered is not None:
             self.auto_save()
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось открыть файл: {str(e)}")
-            
-    def detect_file_type(self):
-        """Определение типа файла конфигурации"""
-        if 'TraderCategories' in self.config_data:
-            self.file_type = "price"
-        elif 'Traders' in self.config_data:
-            self.file_type = "general"
-        elif 'IDs' in self.config_data:
-            self.file_type = "ids"
+            self.flush_auto_save()
+            
+        # Файл становится частью рабочей области (заменяет файл того же типа)
+        from trader_workspace import WORKSPACE_FILES
+        workspace = self.ensure_workspace()
+        if self.file_type in WORKSPACE_FILES:
+            workspace.set_document(self.document, filename)
+        self.update_file_switcher()
+        self.show_file_info(filename)
+        self.status_bar.showMessage(f"✅ Файл успешно загружен: {os.path.basename(filename)}")
+        
+        if self._load_queue:
+            self.load_file(self._load_queue.pop(0))
+            
+    def show_file_info(self, filename):
+        """Имя открытого файла в заголовке"""
+        self.file_info_label.setText(f"📄 {os.path.basename(filename)}")
+        trader_theme.set_state(self.file_info_label, 'open')
+        
+    def update_file_switcher(self):
+        """Список файлов рабочей области (виден, если открыто больше одного)"""
+        from trader_workspace import WORKSPACE_FILES
+        labels = {"price": "💰 Цены", "general": "👤 Торговцы", "ids": "🆔 ID торговцев"}
+        workspace = self.ensure_workspace()
+        self.file_switcher.clear()
+        for file_type in WORKSPACE_FILES:
+            path = workspace.paths.get(file_type)
+            if file_type in workspace.documents:
+                self.file_switcher.addItem(f"{labels[file_type]}: {os.path.basename(path or '')}", file_type)
+                if file_type == self.file_type:
+                    self.file_switcher.setCurrentIndex(self.file_switcher.count() - 1)
+        self.file_switcher.setVisible(self.file_switcher.count() > 1)
+        
+    def on_file_switched(self, index):
+        """Выбор другого файла рабочей области"""
+        self.switch_document(self.file_switcher.itemData(index))
+        
+    def switch_document(self, file_type):
+        """Показ другого открытого файла рабочей области без перезагрузки"""
+        workspace = self.ensure_workspace()
+        if file_type == self.file_type or self.is_loading() or file_type not in workspace.documents:
+            return
+        self.flush_auto_save()
+        self.detach_journal()
+        self.current_file = workspace.paths[file_type] or ""
+        self.show_document(workspace.document(file_type))
+        if self.current_file:
+            self.attach_journal(self.current_file)
+            self.show_file_info(self.current_file)
+        self.update_file_switcher()
+        
+    def ensure_workspace(self):
+        """Рабочая область (создается при первом обращении)"""
+        if self.workspace is None:
+            from trader_workspace import Workspace
+            self.workspace = Workspace()
+            self.workspace.listeners.append(self.update_problems_panel)
+        return self.workspace
+        
+    def ensure_problems_panel(self):
+        """Панель проблем связей между файлами рабочей области"""
+        if self.problems_list is not None:
+            return
+        self.problems_label = QLabel()
+        trader_theme.set_role(self.problems_label, 'problems')
+        self.problems_list = QListWidget()
+        self.problems_list.setMaximumHeight(140)
+        self.problems_list.itemDoubleClicked.connect(self.on_problem_double_click)
+        # Панель проблем стоит сразу под таблицей, перед результатами проверки
+        index = self.content_layout.indexOf(self.drag_hint_label) + 1
+        self.content_layout.insertWidget(index, self.problems_label)
+        self.content_layout.insertWidget(index + 1, self.problems_list)
+        
+    def ensure_validation_panel(self):
+        """Панель результатов проверки файла цен по правилам"""
+        if self.validation_list is not None:
+            return
+        self.validation_label = QLabel()
+        trader_theme.set_role(self.validation_label, 'validation')
+        self.validation_list = QListWidget()
+        self.validation_list.setMaximumHeight(160)
+        self.validation_list.itemDoubleClicked.connect(self.on_finding_double_click)
+        self.content_layout.addWidget(self.validation_label)
+        self.content_layout.addWidget(self.validation_list)
+        
+    def update_problems_panel(self):
+        """Список проблем связей между файлами (обновляется после каждой правки)"""
+        count = self.workspace.problem_count()
+        visible = len(self.workspace.documents) > 1 and count > 0
+        if not visible and self.problems_list is None:
+            return
+        self.ensure_problems_panel()
+        self.problems_list.clear()
+        self.problems_label.setVisible(visible)
+        self.problems_list.setVisible(visible)
+        if not visible:
+            return
+        self.problems_label.setText(f"⚠️ Проблемы связей между файлами: {count}")
+        for kind, key in self.workspace.problem_list()[:500]:
+            item = QListWidgetItem(self.workspace.describe(kind, key))
+            item.setData(Qt.UserRole, (kind, key))
+            self.problems_list.addItem(item)
+            
+    def on_problem_double_click(self, item):
+        """Переход к записи, с которой связана проблема"""
+        from trader_workspace import DANGLING_CATEGORY, ORPHAN_CATEGORY, UNKNOWN_TRADER
+        kind, key = item.data(Qt.UserRole)
+        if kind == ORPHAN_CATEGORY:
+            file_type = "price"
+        elif kind in (DANGLING_CATEGORY, UNKNOWN_TRADER):
+            file_type = "ids"
         else:
-            self.file_type = "unknown"
+            file_type = "general"
+        self.switch_document(file_type)
+        self.search_entry.setText(str(key))
+        self.apply_filter()
+        
+    def on_load_failed(self, message):
+        """Ошибка загрузки - возвращаем предыдущий файл"""
+        if not self._is_current_loader():
+            return
+        self.finish_loading()
+        self.restore_previous_document()
+        QMessageBox.critical(self, "Ошибка", f"Не удалось открыть файл: {message}")
+        if self._load_queue:
+            self.load_file(self._load_queue.pop(0))
+        
+    def on_load_cancelled(self):
+        """Загрузка отменена пользователем - возвращаем предыдущий файл"""
+        if not self._is_current_loader():
+            return
+        self._load_queue = []
+        self.finish_loading()
+        self.restore_previous_document()
+        self.status_bar.showMessage("⛔ Загрузка отменена")
+        
+    def finish_loading(self):
+        """Скрытие индикатора загрузки и разблокировка правок"""
+        self.load_worker = None
+        self.load_thread = None
+        self.load_progress.hide()
+        self.load_cancel_button.hide()
+        self.set_editing_enabled(True)
+        
+    def restore_previous_document(self):
+        """Возврат к файлу, открытому до начала загрузки"""
+        document, self.current_file, _ = self._previous_state
+        self.show_document(document)
+        if self.current_file:
+            self.attach_journal(self.current_file)
+        if not self.config_data:
+            self.file_type = "price"
+            self.update_button_labels()
+            self.show_drag_drop_hint()
+        
+    def show_document(self, document):
+        """Отображение документа в главной таблице"""
+        if document is not self.document:
+            self.reset_validation()
+        self.document = document
+        self.config_data = document.data
+        self.file_type = document.file_type
+        
+        # Скрываем подсказку и показываем таблицу
+        self.drag_hint_label.hide()
+        self.category_table.show()
+        
+        # Восстанавливаем нормальный размер подсказки
+        self.drag_hint_label.setMinimumHeight(150)
+        self.drag_hint_label.setMaximumHeight(200)
+        
+        # Передаем данные модели, строки отрисуются по мере прокрутки
+        self.list_model.set_document(document)
+        self.search_controller.reset()
+        self.apply_filter()
             
-
+        # Обновляем заголовки кнопок
+        self.update_button_labels()
+        
+    def set_editing_enabled(self, enabled):
+        """Блокировка правок на время загрузки файла"""
+        self.add_button.setEnabled(enabled)
+        self.delete_button.setEnabled(enabled)
+        self.pricing_button.setEnabled(enabled)
+        self.validate_button.setEnabled(enabled)
+        self.merge_button.setEnabled(enabled)
             
     def update_button_labels(self):
         """Обновление заголовков кнопок в зависимости от типа файла"""
+        self.pricing_button.setVisible(self.file_type == "price" and bool(self.config_data))
+        self.validate_button.setVisible(self.file_type == "price" and bool(self.config_data))
+        self.merge_button.setVisible(bool(self.config_data))
         if self.file_type == "price":
             self.add_button.setText("➕ Добавить категорию")
             self.delete_button.setText("🗑️ Удалить категорию")
@@ -608,225 +771,15 @@ class TraderPlusEditor(QMainWindow):
             
 
                 
-    def filter_categories(self):
-        """Фильтрация категорий по поисковому запросу"""
+    def apply_filter(self):
+        """Немедленное применение поискового запроса к списку"""
         search_text = self.search_entry.text().lower().strip()
+        self.search_controller.run_now(search_text)
         
-        self.category_table.clear()
-        
-        if 'TraderCategories' in self.config_data:
-            display_index = 0
-            for category in self.config_data['TraderCategories']:
-                category_name = category['CategoryName']
-                product_count = len(category['Products'])
-                show_category = False
-                found_in_products = False
-                
-                # Если поиск пустой, показываем все
-                if not search_text:
-                    show_category = True
-                else:
-                    # Поиск в названии категории
-                    if search_text in category_name.lower():
-                        show_category = True
-                    
-                    # Поиск по товарам
-                    if not show_category:
-                        for product in category['Products']:
-                            # Разбираем строку товара
-                            parts = product.split(',')
-                            if len(parts) >= 6:
-                                product_text = ','.join(parts).lower()
-                                if search_text in product_text:
-                                    show_category = True
-                                    found_in_products = True
-                                    break
-                
-                if show_category:
-                    # Информация для отображения
-                    display_name = category_name
-                    product_info = f"Товаров: {product_count}"
-                    
-                    if search_text and found_in_products:
-                        # Ищем первый найденный товар для отображения его информации
-                        for product in category['Products']:
-                            parts = product.split(',')
-                            if len(parts) >= 6:
-                                product_text = ','.join(parts).lower()
-                                if search_text in product_text:
-                                    # Найден товар - формируем информацию о нем
-                                    classname = parts[0]
-                                    buy_price = parts[4]
-                                    sell_price = parts[5]
-                                    product_info = f"{classname} | Покупка:{buy_price} | Продажа:{sell_price}"
-                                    display_name = f"{category_name} ★"
-                                    break
-                    
-                    item = QTreeWidgetItem([display_name, product_info])
-                    
-                    # Применяем стили
-                    if search_text and "★" in display_name:
-                        # Подсветка найденных товаров - яркий золотистый цвет
-                        item.setBackground(0, QColor(255, 193, 7))  # Золотистый
-                        item.setBackground(1, QColor(255, 193, 7))
-                        item.setForeground(0, QColor(33, 37, 41))   # Темный текст
-                        item.setForeground(1, QColor(33, 37, 41))
-                        font = QFont()
-                        font.setBold(True)
-                        font.setPointSize(14)
-                        item.setFont(0, font)
-                        item.setFont(1, font)
-                        
-                        # Добавляем иконку к товару
-                        if "★" not in display_name:
-                            item.setText(0, f"⭐ {display_name}")
-                    else:
-                        # Чередующиеся цвета - более мягкие
-                        if display_index % 2 == 0:
-                            item.setBackground(0, QColor(248, 249, 250))  # Светло-серый
-                            item.setBackground(1, QColor(248, 249, 250))
-                        else:
-                            item.setBackground(0, QColor(255, 255, 255))  # Белый
-                            item.setBackground(1, QColor(255, 255, 255))
-                    
-                    self.category_table.addTopLevelItem(item)
-                    display_index += 1
-                        
-    def filter_traders(self):
-        """Фильтрация торговцев по поисковому запросу"""
-        search_text = self.search_entry.text().lower().strip()
-        
-        self.category_table.clear()
-        
-        if 'Traders' in self.config_data:
-            display_index = 0
-            for trader in self.config_data['Traders']:
-                trader_name = trader.get('GivenName', 'Неизвестный')
-                trader_role = trader.get('Role', 'Торговец')
-                trader_id = trader.get('Id', -1)
-                show_trader = False
-                
-                # Если поиск пустой, показываем все
-                if not search_text:
-                    show_trader = True
-                else:
-                    # Поиск в названии торговца
-                    if search_text in trader_name.lower():
-                        show_trader = True
-                    # Поиск в роли
-                    elif search_text in trader_role.lower():
-                        show_trader = True
-                    # Поиск в ID
-                    elif search_text in str(trader_id):
-                        show_trader = True
-                
-                if show_trader:
-                    # Информация для отображения
-                    display_name = trader_name
-                    trader_info = f"ID: {trader_id} | Роль: {trader_role}"
-                    
-                    if search_text and (search_text in trader_name.lower() or 
-                                      search_text in trader_role.lower() or 
-                                      search_text in str(trader_id)):
-                        display_name = f"{trader_name} ★"
-                    
-                    item = QTreeWidgetItem([display_name, trader_info])
-                    
-                    # Применяем стили
-                    if search_text and "★" in display_name:
-                        # Подсветка найденных торговцев - яркий золотистый цвет
-                        item.setBackground(0, QColor(255, 193, 7))  # Золотистый
-                        item.setBackground(1, QColor(255, 193, 7))
-                        item.setForeground(0, QColor(33, 37, 41))   # Темный текст
-                        item.setForeground(1, QColor(33, 37, 41))
-                        font = QFont()
-                        font.setBold(True)
-                        font.setPointSize(14)
-                        item.setFont(0, font)
-                        item.setFont(1, font)
-                    else:
-                        # Чередующиеся цвета - более мягкие
-                        if display_index % 2 == 0:
-                            item.setBackground(0, QColor(248, 249, 250))  # Светло-серый
-                            item.setBackground(1, QColor(248, 249, 250))
-                        else:
-                            item.setBackground(0, QColor(255, 255, 255))  # Белый
-                            item.setBackground(1, QColor(255, 255, 255))
-                    
-                    self.category_table.addTopLevelItem(item)
-                    display_index += 1
-                    
-    def filter_ids(self):
-        """Фильтрация ID торговцев по поисковому запросу"""
-        search_text = self.search_entry.text().lower().strip()
-        
-        self.category_table.clear()
-        
-        if 'IDs' in self.config_data:
-            display_index = 0
-            for trader_id in self.config_data['IDs']:
-                trader_id_value = trader_id.get('Id', -1)
-                categories = trader_id.get('Categories', [])
-                categories_count = len(categories)
-                show_trader = False
-                
-                # Если поиск пустой, показываем все
-                if not search_text:
-                    show_trader = True
-                else:
-                    # Поиск в ID торговца
-                    if search_text in str(trader_id_value):
-                        show_trader = True
-                    # Поиск в категориях
-                    else:
-                        for category in categories:
-                            if search_text in category.lower():
-                                show_trader = True
-                                break
-                
-                if show_trader:
-                    # Информация для отображения
-                    display_name = f"ID: {trader_id_value}"
-                    trader_info = f"Категорий: {categories_count}"
-                    
-                    if search_text and (search_text in str(trader_id_value) or 
-                                      any(search_text in cat.lower() for cat in categories)):
-                        display_name = f"ID: {trader_id_value} ★"
-                    
-                    item = QTreeWidgetItem([display_name, trader_info])
-                    
-                    # Применяем стили
-                    if search_text and "★" in display_name:
-                        # Подсветка найденных торговцев - яркий золотистый цвет
-                        item.setBackground(0, QColor(255, 193, 7))  # Золотистый
-                        item.setBackground(1, QColor(255, 193, 7))
-                        item.setForeground(0, QColor(33, 37, 41))   # Темный текст
-                        item.setForeground(1, QColor(33, 37, 41))
-                        font = QFont()
-                        font.setBold(True)
-                        font.setPointSize(14)
-                        item.setFont(0, font)
-                        item.setFont(1, font)
-                    else:
-                        # Чередующиеся цвета - более мягкие
-                        if display_index % 2 == 0:
-                            item.setBackground(0, QColor(248, 249, 250))  # Светло-серый
-                            item.setBackground(1, QColor(248, 249, 250))
-                        else:
-                            item.setBackground(0, QColor(255, 255, 255))  # Белый
-                            item.setBackground(1, QColor(255, 255, 255))
-                    
-                    self.category_table.addTopLevelItem(item)
-                    display_index += 1
-                    
     def on_search_change(self):
         """Обработчик изменения поискового запроса"""
-        if self.file_type == "price":
-            self.filter_categories()
-        elif self.file_type == "general":
-            self.filter_traders()
-        else:
-            self.filter_ids()
+        search_text = self.search_entry.text().lower().strip()
+        self.search_controller.schedule(search_text)
         
     def clear_search(self):
         """Очистка поискового запроса"""
@@ -838,75 +791,37 @@ class TraderPlusEditor(QMainWindow):
             self.show_drag_drop_hint()
         
 
-    def on_category_double_click(self, item):
+    def on_category_double_click(self, index):
         """Обработчик двойного клика по категории/торговцу"""
-        if not item or not self.config_data:
+        if not index.isValid() or not self.config_data or self.is_loading():
             return
             
-        item_name = item.text(0)
-        
-        # Убираем звездочку из названия, если она есть
-        if item_name.endswith(" ★"):
-            item_name = item_name[:-2]
+        # Строка исходной модели совпадает с индексом записи в конфиге
+        row = self.list_proxy.mapToSource(index).row()
         
         if self.file_type == "price":
             # Обработка для файла цен
-            # Находим индекс категории
-            category_index = None
-            for i, category in enumerate(self.config_data['TraderCategories']):
-                if category['CategoryName'] == item_name:
-                    category_index = i
-                    break
-            
-            if category_index is not None:
-                # Получаем текущий поисковый запрос
-                search_text = self.search_entry.text().strip()
+            search_text = self.list_proxy.search_text
             
             # Если поиск активен и товар найден в данной категории, сразу открываем редактор первого найденного товара
-            if search_text and "★" in item.text(0):
-                category = self.config_data['TraderCategories'][category_index]
-                for product_index, product in enumerate(category['Products']):
-                    parts = product.split(',')
-                    if len(parts) >= 6:
-                        # Ищем во всех полях товара
-                        product_text = f"{parts[0]},{parts[1]},{parts[2]},{parts[3]},{parts[4]},{parts[5]}".lower()
-                        if search_text.lower() in product_text:
-                            # Найден товар! Сразу открываем редактор
-                            self.edit_product_dialog(category_index, product_index, product)
-                            return
+            if search_text and self.list_proxy.is_highlighted(row):
+                numeric = is_numeric_query(search_text)
+                for product_index, product in enumerate(self.document.products(row)):
+                    # Ищем во всех полях товара
+                    if product_matches(product, search_text, numeric):
+                        # Найден товар! Сразу открываем редактор
+                        self.edit_product_dialog(row, product_index, product)
+                        return
             
             # Обычное открытие окна с товарами
-            self.open_product_window(category_index, item_name, search_text)
+            category_name = self.config_data['TraderCategories'][row]['CategoryName']
+            self.open_product_window(row, category_name, search_text)
         elif self.file_type == "general":
-            # Обработка для файла general
-            # Находим индекс торговца
-            trader_index = None
-            for i, trader in enumerate(self.config_data['Traders']):
-                if trader.get('GivenName', '') == item_name:
-                    trader_index = i
-                    break
-            
-            if trader_index is not None:
-                # Открываем диалог редактирования торговца
-                self.edit_trader_dialog(trader_index)
+            # Открываем диалог редактирования торговца
+            self.edit_trader_dialog(row)
         else:
-            # Обработка для файла IDs
-            # Извлекаем ID из названия (формат: "ID: X")
-            if item_name.startswith("ID: "):
-                try:
-                    trader_id_value = int(item_name[4:])  # Убираем "ID: "
-                    # Находим индекс торговца по ID
-                    trader_index = None
-                    for i, trader_id in enumerate(self.config_data['IDs']):
-                        if trader_id.get('Id') == trader_id_value:
-                            trader_index = i
-                            break
-                    
-                    if trader_index is not None:
-                        # Открываем диалог редактирования ID торговца
-                        self.edit_trader_id_dialog(trader_index)
-                except ValueError:
-                    pass
+            # Открываем диалог редактирования ID торговца
+            self.edit_trader_id_dialog(row)
                 
     def edit_trader_dialog(self, trader_index):
         """Диалог редактирования торговца"""
@@ -915,9 +830,7 @@ class TraderPlusEditor(QMainWindow):
         if dialog.exec_() == QDialog.Accepted:
             # Обновляем данные
             updated_trader = dialog.get_trader_data()
-            self.config_data['Traders'][trader_index] = updated_trader
-            
-            self.filter_traders()
+            self.list_model.set_row(trader_index, updated_trader)
             self.auto_save()
             self.status_bar.showMessage("Торговец отредактирован")
             
@@ -928,46 +841,248 @@ class TraderPlusEditor(QMainWindow):
         if dialog.exec_() == QDialog.Accepted:
             # Обновляем данные
             updated_trader_id = dialog.get_trader_id_data()
-            self.config_data['IDs'][trader_index] = updated_trader_id
-            
-            self.filter_ids()
+            self.list_model.set_row(trader_index, updated_trader_id)
             self.auto_save()
             self.status_bar.showMessage("ID торговца отредактирован")
             
-    def edit_product_dialog(self, category_index, product_index, product_str):
+    def edit_product_dialog(self, category_index, product_index, product):
         """Диалог редактирования товара"""
-        dialog = ProductEditDialog(self, product_str)
+        dialog = ProductEditDialog(self, product)
         if dialog.exec_() == QDialog.Accepted:
             # Обновляем данные
-            new_product_str = dialog.get_product_string()
-            category = self.config_data['TraderCategories'][category_index]
-            category['Products'][product_index] = new_product_str
+            self.document.set_product(category_index, product_index, dialog.get_product())
             
-            self.filter_categories()
+            self.list_model.update_row(category_index)
             self.auto_save()
             self.status_bar.showMessage("Товар отредактирован из поиска")
             
     def open_product_window(self, category_index, category_name, search_text=""):
         """Открытие окна с товарами"""
-        window = ProductWindow(self, self.config_data, category_index, category_name, search_text)
+        window = ProductWindow(self, self.document, category_index, category_name, search_text)
         window.exec_()
-        # Обновляем список категорий после закрытия окна
-        self.filter_categories()
+        # Обновляем строку категории после закрытия окна
+        self.list_model.update_row(category_index)
+        self.auto_save()
+        
+    def bulk_pricing(self):
+        """Массовое изменение цен товаров выбранных категорий"""
+        if self.file_type != "price" or self.is_loading():
+            return
+        from trader_pricing import apply_pricing, category_selection
+        # По умолчанию выбраны выделенные категории, иначе все видимые после поиска
+        rows = sorted({self.list_proxy.mapToSource(index).row()
+                       for index in self.category_table.selectionModel().selectedRows()})
+        if not rows:
+            rows = [self.list_proxy.mapToSource(self.list_proxy.index(row, 0)).row()
+                    for row in range(self.list_proxy.rowCount())]
+        dialog = BulkPricingDialog(self, self.document, rows)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        rows = dialog.selected_categories()
+        count = apply_pricing(self.document, category_selection(self.document, rows), dialog.get_operations())
+        if count:
+            for row in rows:
+                self.list_model.update_row(row)
+            self.auto_save()
+        self.status_bar.showMessage(f"Цены изменены у товаров: {count}")
+        
+    def merge_file(self):
+        """Перенос в документ изменений другой версии файла (трехстороннее слияние)"""
+        if self.is_loading() or not self.config_data:
+            return
+        from trader_merge import describe_conflict, plan_merge
+        dialog = MergeDialog(self, self.document)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        result = dialog.merge_result
+        plan = plan_merge(self.document, result.data)
+        if plan.steps:
+            # Записи и параметры файла - одна правка: отменяются одним действием
+            self.list_model.apply_steps(plan.steps, "Слияние версий")
+        if plan:
+            self.auto_save()
+        self.status_bar.showMessage(f"🔀 Перенесено изменений: {len(result.applied)}, "
+                                    f"обновлено записей: {len(plan.keys)}, конфликтов: {len(result.conflicts)}")
+        if result.conflicts:
+            lines = [describe_conflict(self.file_type, conflict) for conflict in result.conflicts[:20]]
+            if len(result.conflicts) > 20:
+                lines.append(f"... и еще {len(result.conflicts) - 20}")
+            kept = "другой версии" if result.prefer == 'theirs' else "текущего файла"
+            QMessageBox.information(self, "Конфликты слияния",
+                                    f"В конфликтах оставлены значения {kept}:\n\n" + "\n".join(lines))
+        
+    def validate_file(self):
+        """Проверка всего файла цен; находки показываются по мере готовности"""
+        if self.file_type != "price" or self.is_loading() or not self.config_data:
+            return
+        from trader_validation import ValidationResults, Validator
+        self.reset_validation()
+        if self.validator is None:
+            self.validator = Validator()
+        
+        # Правки во время проверки помечают категории для повторной проверки
+        self.validation_results = ValidationResults(self.document)
+        self.validation_results.listeners.append(self.revalidate_timer.start)
+        self.document.listeners.append(self.validation_results)
+        
+        # Поток проверки получает копии списков товаров, а находки
+        # сопоставляются с категориями документа на момент запуска
+        self._validation_categories = list(self.document.records())
+        snapshot = [{'CategoryName': category['CategoryName'], 'Products': list(category['Products'])}
+                    for category in self._validation_categories]
+        
+        self.validation_worker = ValidationWorker(self.validator, snapshot)
+        self.validation_thread = QThread(self)
+        self.validation_worker.moveToThread(self.validation_thread)
+        self.validation_thread.started.connect(self.validation_worker.run)
+        self.validation_worker.found.connect(self.on_findings)
+        self.validation_worker.finished.connect(self.on_validation_finished)
+        self.validation_worker.failed.connect(self.on_validation_failed)
+        for signal in (self.validation_worker.finished, self.validation_worker.failed):
+            signal.connect(self.validation_thread.quit)
+        self.validation_thread.finished.connect(self.validation_worker.deleteLater)
+        self.validation_thread.finished.connect(self.validation_thread.deleteLater)
+        
+        self.ensure_validation_panel()
+        self.validation_list.clear()
+        self.validation_label.setText("⏳ Проверка файла...")
+        self.validation_label.show()
+        self.validation_list.show()
+        self._validation_started = time.perf_counter()
+        self.validation_thread.start()
+        
+    def _is_current_validation(self):
+        # Находки прерванной проверки игнорируются
+        return self.validation_worker is not None and self.sender() is self.validation_worker
+        
+    def on_findings(self, findings):
+        """Очередная порция находок: сразу добавляем в список"""
+        if not self._is_current_validation():
+            return
+        self.validation_results.add(self._validation_categories, findings)
+        for finding in findings:
+            if self.validation_list.count() >= 1000:
+                break
+            category = self._validation_categories[finding.category_index]
+            self.validation_list.addItem(self.finding_item(category['CategoryName'], finding))
+        self.validation_label.setText(f"⏳ Проверка файла... найдено: {self.validation_list.count()}")
+        
+    def on_validation_finished(self):
+        """Проверка завершена: список упорядочивается по категориям"""
+        if not self._is_current_validation():
+            return
+        elapsed = (time.perf_counter() - self._validation_started) * 1000
+        self.validation_worker = None
+        self.validation_thread = None
+        self._validation_categories = []
+        self.validation_results.revalidate(self.validator)
+        self.update_validation_panel()
+        self.status_bar.showMessage(f"🔎 Проверка завершена за {elapsed:.0f} мс")
+        
+    def on_validation_failed(self, message):
+        """Ошибка в ходе проверки"""
+        if not self._is_current_validation():
+            return
+        self.reset_validation()
+        QMessageBox.critical(self, "Ошибка", f"Не удалось проверить файл: {message}")
+        
+    def revalidate_dirty(self):
+        """Повторная проверка категорий, измененных после последней проверки"""
+        if self.validation_results is None or self.validation_worker is not None:
+            # Во время полной проверки измененные категории проверятся по ее окончании
+            return
+        if self.validation_results.revalidate(self.validator):
+            self.update_validation_panel()
+            
+    def reset_validation(self):
+        """Прерывание проверки и скрытие ее результатов"""
+        if self.validation_worker is not None:
+            self.validation_worker.cancel()
+            self.validation_worker = None
+            self.validation_thread = None
+        if self.validation_results is not None:
+            if self.validation_results in self.validation_results.document.listeners:
+                self.validation_results.document.listeners.remove(self.validation_results)
+            self.validation_results = None
+        self._validation_categories = []
+        self.revalidate_timer.stop()
+        if self.validation_list is not None:
+            self.validation_list.clear()
+            self.validation_label.hide()
+            self.validation_list.hide()
+        
+    def finding_item(self, category_name, finding):
+        """Строка списка результатов проверки"""
+        from trader_validation import ERROR, SEVERITY_LABELS
+        item = QListWidgetItem(f"{SEVERITY_LABELS[finding.severity]}: {category_name}: {finding.message}")
+        item.setForeground(trader_theme.brush('error' if finding.severity == ERROR else 'warning'))
+        item.setData(Qt.UserRole, (finding.category_index, finding.product_index))
+        return item
+        
+    def update_validation_panel(self):
+        """Список находок проверки с текущими индексами категорий"""
+        from trader_validation import ERROR
+        self.validation_list.clear()
+        findings = self.validation_results.findings()
+        errors = sum(1 for finding in findings if finding.severity == ERROR)
+        if not findings:
+            self.validation_label.setText("✅ Проверка: проблем не найдено")
+            self.validation_list.hide()
+            return
+        self.validation_label.setText(f"🔎 Проверка: ошибок {errors}, предупреждений {len(findings) - errors}")
+        self.validation_list.show()
+        records = self.document.records()
+        for finding in findings[:1000]:
+            self.validation_list.addItem(self.finding_item(records[finding.category_index]['CategoryName'], finding))
+            
+    def on_finding_double_click(self, item):
+        """Переход к категории или товару из результатов проверки"""
+        if self.validation_worker is not None or self.is_loading():
+            return
+        category_index, product_index = item.data(Qt.UserRole)
+        records = self.document.records()
+        if category_index >= len(records):
+            return
+        products = self.document.products(category_index)
+        if product_index is not None and product_index < len(products) and products[product_index].is_valid:
+            self.edit_product_dialog(category_index, product_index, products[product_index])
+        else:
+            self.open_product_window(category_index, records[category_index]['CategoryName'])
+        
+    def undo(self):
+        """Отмена последней правки"""
+        if self.is_loading() or not self.config_data:
+            return
+        transaction = self.list_model.undo()
+        if transaction is None:
+            self.status_bar.showMessage("Нечего отменять")
+            return
         self.auto_save()
+        self.status_bar.showMessage(f"↶ Отменено: {transaction.label}")
+        
+    def redo(self):
+        """Повтор отмененной правки"""
+        if self.is_loading() or not self.config_data:
+            return
+        transaction = self.list_model.redo()
+        if transaction is None:
+            self.status_bar.showMessage("Нечего повторять")
+            return
+        self.auto_save()
+        self.status_bar.showMessage(f"↷ Повторено: {transaction.label}")
         
     def add_category(self):
         """Добавление новой категории/торговца"""
         if self.file_type == "price":
             name, ok = QInputDialog.getText(self, 'Новая категория', 'Введите название категории:')
-            if ok and name:
+            if ok and name and self.document.find_category(name) is not None:
+                QMessageBox.warning(self, "Предупреждение", f"Категория '{name}' уже существует")
+            elif ok and name:
                 new_category = {
                     "CategoryName": name,
                     "Products": []
                 }
-                if 'TraderCategories' not in self.config_data:
-                    self.config_data['TraderCategories'] = []
-                self.config_data['TraderCategories'].append(new_category)
-                self.filter_categories()
+                self.list_model.append_row(new_category)
                 self.auto_save()
                 self.status_bar.showMessage(f"Добавлена категория: {name}")
         elif self.file_type == "general":
@@ -995,11 +1110,7 @@ class TraderPlusEditor(QMainWindow):
         if dialog.exec_() == QDialog.Accepted:
             updated_trader = dialog.get_trader_data()
             
-            if 'Traders' not in self.config_data:
-                self.config_data['Traders'] = []
-            self.config_data['Traders'].append(updated_trader)
-            
-            self.filter_traders()
+            self.list_model.append_row(updated_trader)
             self.auto_save()
             self.status_bar.showMessage(f"Добавлен торговец: {updated_trader['GivenName']}")
             
@@ -1018,76 +1129,51 @@ class TraderPlusEditor(QMainWindow):
         if dialog.exec_() == QDialog.Accepted:
             updated_trader_id = dialog.get_trader_id_data()
             
-            if 'IDs' not in self.config_data:
-                self.config_data['IDs'] = []
-            self.config_data['IDs'].append(updated_trader_id)
-            
-            self.filter_ids()
+            self.list_model.append_row(updated_trader_id)
             self.auto_save()
             self.status_bar.showMessage(f"Добавлен ID торговца: {updated_trader_id['Id']}")
             
     def delete_category(self):
         """Удаление выбранной категории/торговца"""
-        current_item = self.category_table.currentItem()
-        if not current_item:
+        current_index = self.category_table.currentIndex()
+        if not current_index.isValid():
             QMessageBox.warning(self, "Предупреждение", "Выберите элемент для удаления")
             return
         
-        item_name = current_item.text(0)
-        if item_name.endswith(" ★"):
-            item_name = item_name[:-2]
+        row = self.list_proxy.mapToSource(current_index).row()
+        record = self.list_model.record(row)
         
         if self.file_type == "price":
+            item_name = record['CategoryName']
             reply = QMessageBox.question(self, 'Подтверждение', 
                                        f"Удалить категорию '{item_name}' и все товары в ней?",
                                        QMessageBox.Yes | QMessageBox.No)
             
             if reply == QMessageBox.Yes:
-                # Находим и удаляем категорию
-                for i, category in enumerate(self.config_data['TraderCategories']):
-                    if category['CategoryName'] == item_name:
-                        del self.config_data['TraderCategories'][i]
-                        break
-                
-                self.filter_categories()
+                self.list_model.remove_row(row)
                 self.auto_save()
                 self.status_bar.showMessage(f"Удалена категория: {item_name}")
         elif self.file_type == "general":
+            item_name = record.get('GivenName', '')
             reply = QMessageBox.question(self, 'Подтверждение', 
                                        f"Удалить торговца '{item_name}'?",
                                        QMessageBox.Yes | QMessageBox.No)
             
             if reply == QMessageBox.Yes:
-                # Находим и удаляем торговца
-                for i, trader in enumerate(self.config_data['Traders']):
-                    if trader.get('GivenName', '') == item_name:
-                        del self.config_data['Traders'][i]
-                        break
-                
-                self.filter_traders()
+                self.list_model.remove_row(row)
                 self.auto_save()
                 self.status_bar.showMessage(f"Удален торговец: {item_name}")
         else:
             # Удаление ID торговца
-            if item_name.startswith("ID: "):
-                try:
-                    trader_id_value = int(item_name[4:])  # Убираем "ID: "
-                    reply = QMessageBox.question(self, 'Подтверждение', 
-                                               f"Удалить ID торговца '{trader_id_value}'?",
-                                               QMessageBox.Yes | QMessageBox.No)
-                    
-                    if reply == QMessageBox.Yes:
-                        # Находим и удаляем ID торговца
-                        for i, trader_id in enumerate(self.config_data['IDs']):
-                            if trader_id.get('Id') == trader_id_value:
-                                del self.config_data['IDs'][i]
-                                break
-                        
-                        self.filter_ids()
-                        self.auto_save()
-                        self.status_bar.showMessage(f"Удален ID торговца: {trader_id_value}")
-                except ValueError:
-                    pass
+            trader_id_value = record.get('Id', -1)
+            reply = QMessageBox.question(self, 'Подтверждение', 
+                                       f"Удалить ID торговца '{trader_id_value}'?",
+                                       QMessageBox.Yes | QMessageBox.No)
+            
+            if reply == QMessageBox.Yes:
+                self.list_model.remove_row(row)
+                self.auto_save()
+                self.status_bar.showMessage(f"Удален ID торговца: {trader_id_value}")
             
     def open_file(self):
         """Открытие файла через диалог"""
@@ -1103,12 +1189,8 @@ class TraderPlusEditor(QMainWindow):
         if not self.current_file:
             return self.save_file_as()
         
-        try:
-            with open(self.current_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config_data, f, indent=4, ensure_ascii=False)
-            self.status_bar.showMessage(f"Файл сохранен: {os.path.basename(self.current_file)}")
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить файл: {str(e)}")
+        self._manual_save_requested = True
+        self.flush_auto_save()
             
     def save_file_as(self):
         """Сохранение файла как"""
@@ -1117,18 +1199,267 @@ class TraderPlusEditor(QMainWindow):
             "JSON files (*.json);;All files (*.*)"
         )
         if filename:
+            # Правки теперь пишутся в журнал нового файла
+            self.detach_journal()
+            journal = self.journals.pop(self.current_file, None)
+            if journal is not None:
+                journal.discard()
             self.current_file = filename
+            # Рабочая область тоже указывает на новый файл: иначе после
+            # переключения файлов правки снова шли бы в прежний
+            workspace = self.ensure_workspace()
+            if workspace.documents.get(self.file_type) is self.document:
+                workspace.paths[self.file_type] = filename
+            self.attach_journal(filename)
             self.save_file()
+            self.update_file_switcher()
+            
+    def attach_journal(self, filename, recovered=None):
+        """Подключение журнала правок файла к текущему документу"""
+        from trader_journal import EditJournal
+        journal = self.journals.get(filename)
+        if journal is None:
+            journal = self.journals[filename] = EditJournal(filename, recovered)
+        self.document.listeners.append(journal)
+        self.watch_file(filename)
+        
+    def detach_journal(self):
+        """Отключение журнала от документа (журнал удаляется после записи файла)"""
+        journal = self.journals.get(self.current_file)
+        if journal is None:
+            return
+        if journal in self.document.listeners:
+            self.document.listeners.remove(journal)
+        if not len(journal):
+            journal.close()
+            del self.journals[self.current_file]
+            
+    def recover_journal(self, filename):
+        """Применение правок из журнала, оставшегося после аварийного завершения.
+        
+        Возвращает восстановленный журнал или None.
+        """
+        if filename in self.journals:
+            # Журнал этого же сеанса: правки уже переданы на запись
+            return None
+        from trader_journal import discard_journal, journal_path, read_journal
+        recovered = read_journal(filename)
+        if recovered is None:
+            return None
+        if not len(recovered):
+            discard_journal(filename)
+            return None
+            
+        matches = recovered.matches(filename)
+        text = (f"Найдены несохраненные правки ({len(recovered)}), "
+                f"оставшиеся после аварийного завершения редактора.\n\nВосстановить их?")
+        if not matches:
+            text += "\n\n⚠️ Файл был изменен после записи журнала, правки могут примениться неверно."
+        answer = QMessageBox.question(self, "Восстановление правок", text,
+                                      QMessageBox.Yes | QMessageBox.No,
+                                      QMessageBox.Yes if matches else QMessageBox.No)
+        if answer != QMessageBox.Yes:
+            discard_journal(filename)
+            return None
             
+        try:
+            self.list_model.apply_steps(recovered.steps(self.file_type), "Восстановление из журнала")
+        except (IndexError, KeyError, ValueError, TypeError, AttributeError) as e:
+            # Откатываем частично примененные правки, журнал сохраняем для разбора
+            self.list_model.undo()
+            os.replace(journal_path(filename), journal_path(filename) + ".failed")
+            QMessageBox.critical(self, "Ошибка", f"Не удалось применить журнал правок: {e}")
+            return None
+        return recovered
+        
     def auto_save(self):
-        """Автоматическое сохранение файла"""
+        """Автоматическое сохранение файла.
+        
+        Запись откладывается на короткое время: серия правок подряд
+        сохраняется одной фоновой записью.
+        """
         if self.current_file:
-            try:
-                with open(self.current_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.config_data, f, indent=4, ensure_ascii=False)
-                self.status_bar.showMessage(f"Автосохранение: {os.path.basename(self.current_file)}")
-            except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить файл: {str(e)}")
+            self.save_timer.start()
+            
+    def flush_auto_save(self):
+        """Немедленная постановка отложенного сохранения в фоновую запись"""
+        pending = self.save_timer.isActive() or self._manual_save_requested
+        self.save_timer.stop()
+        if pending and self.current_file:
+            journal = self.journals.get(self.current_file)
+            base = self.file_bases.get(self.current_file)
+            self.save_worker.submit(self.current_file, snapshot_config(self.config_data),
+                                    self._manual_save_requested, journal.mark() if journal else None,
+                                    base.identity if base else None)
+        self._manual_save_requested = False
+        
+    def on_save_started(self, filename):
+        """Начало фоновой записи"""
+        self.status_bar.showMessage(f"💾 Сохранение: {os.path.basename(filename)}...")
+        
+    def on_save_finished(self, filename, size, manual, result):
+        """Фоновая запись завершена"""
+        mark, identity, base = result
+        self.file_bases[filename] = base
+        journal = self.journals.get(filename)
+        if journal is not None and mark is not None:
+            journal.compacted(mark, identity)
+            if not len(journal) and journal not in self.document.listeners:
+                # Журнал закрытого файла больше не нужен
+                journal.close()
+                del self.journals[filename]
+        if manual:
+            self.status_bar.showMessage(f"Файл сохранен: {os.path.basename(filename)}")
+        else:
+            self.status_bar.showMessage(f"Автосохранение: {os.path.basename(filename)}")
+            
+    def on_save_conflict(self, filename):
+        """Файл изменен другой программой после загрузки: запись отменена,
+        правки остаются в журнале до сверки с новой версией файла"""
+        self.status_bar.showMessage(f"⚠️ {os.path.basename(filename)} изменен на диске, сохранение отложено")
+        if filename == self.current_file:
+            self.check_external_change()
+            
+    def watch_file(self, filename):
+        """Отслеживание изменений одного файла (текущего)"""
+        watched = self.file_watcher.files()
+        if watched:
+            self.file_watcher.removePaths(watched)
+        if filename and os.path.exists(filename):
+            self.file_watcher.addPath(filename)
+            
+    def on_file_changed(self, path):
+        """Файл изменен на диске (в том числе нашей же записью - это проверяется позже)"""
+        if path == self.current_file:
+            self.external_timer.start()
+            
+    def check_external_change(self):
+        """Сверка текущего файла с диском: запуск фонового чтения новой версии"""
+        from trader_journal import file_identity
+        path = self.current_file
+        if not path or self.is_loading() or self.reload_worker is not None:
+            return
+        if path not in self.file_watcher.files() and os.path.exists(path):
+            # Атомарная замена файла другой программой снимает наблюдение
+            self.file_watcher.addPath(path)
+        base = self.file_bases.get(path)
+        identity = file_identity(path)
+        if base is None or identity is None or identity == base.identity:
+            return
+        if not self.save_worker.wait_idle(0) or identity == self.save_worker.written_identity(path):
+            # Своя запись еще идет или ее результат еще не обработан
+            self.external_timer.start()
+            return
+            
+        self.reload_worker = ReloadWorker(path)
+        self.reload_thread = QThread(self)
+        self.reload_worker.moveToThread(self.reload_thread)
+        self.reload_thread.started.connect(self.reload_worker.run)
+        self.reload_worker.ready.connect(self.on_reload_ready)
+        self.reload_worker.failed.connect(self.on_reload_failed)
+        for signal in (self.reload_worker.ready, self.reload_worker.failed):
+            signal.connect(self.reload_thread.quit)
+        self.reload_thread.finished.connect(self.reload_worker.deleteLater)
+        self.reload_thread.finished.connect(self.reload_thread.deleteLater)
+        self.reload_thread.start()
+        
+    def on_reload_failed(self, message):
+        """Новая версия файла не читается (например, запись еще не закончена)"""
+        if self.sender() is not self.reload_worker:
+            return
+        self.reload_worker = None
+        self.reload_thread = None
+        self.status_bar.showMessage(f"⚠️ Не удалось прочитать измененный файл: {message}")
+        
+    def on_reload_ready(self, result):
+        """Применение изменений с диска к документу"""
+        if self.sender() is not self.reload_worker:
+            return
+        self.reload_worker = None
+        self.reload_thread = None
+        path, disk_data, disk_base = result
+        base = self.file_bases.get(path)
+        if path != self.current_file or self.is_loading() or base is None:
+            return
+        if QApplication.activeModalWidget() is not None:
+            # Открыт диалог правки: сверяем после его закрытия
+            self.external_timer.start()
+            return
+        if disk_base.file_type != self.file_type:
+            QMessageBox.warning(self, "Предупреждение",
+                                f"Файл {os.path.basename(path)} заменен на диске файлом другого типа.\n"
+                                f"Откройте его заново, чтобы увидеть новую версию.")
+            return
+            
+        from trader_sync import plan_reload
+        plan = plan_reload(self.document, base, disk_data, disk_base)
+        if plan.conflicts and self.ask_take_disk(plan.conflicts):
+            plan = plan_reload(self.document, base, disk_data, disk_base, take_disk=True)
+        if plan.steps:
+            # Записи и параметры файла - одна правка: отменяются одним действием
+            self.list_model.apply_steps(plan.steps, "Изменения файла на диске")
+        self.file_bases[path] = disk_base
+        
+        # Свои несохраненные правки и оставленные конфликты записываются поверх новой версии
+        journal = self.journals.get(path)
+        if plan.steps or plan.conflicts or (journal is not None and len(journal)):
+            self.auto_save()
+        self.status_bar.showMessage(f"🔄 {os.path.basename(path)} изменен на диске: "
+                                    f"обновлено записей {len(plan.keys)}, конфликтов {len(plan.conflicts)}")
+        
+    def ask_take_disk(self, conflicts):
+        """Вопрос о записях, измененных и на диске, и в редакторе.
+        
+        Возвращает True, если нужно взять версию с диска.
+        """
+        from trader_merge import RECORD_LABELS
+        lines = []
+        for key in conflicts[:20]:
+            if isinstance(key, tuple):
+                lines.append(f"Параметр {key[1]}")
+            else:
+                lines.append(f"{RECORD_LABELS.get(self.file_type, 'Запись')} {key}")
+        if len(conflicts) > 20:
+            lines.append(f"... и еще {len(conflicts) - 20}")
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Warning)
+        box.setWindowTitle("Файл изменен на диске")
+        box.setText("Другая программа изменила записи, которые вы тоже изменили:\n\n" + "\n".join(lines))
+        keep = box.addButton("Оставить мои правки", QMessageBox.AcceptRole)
+        box.addButton("Взять с диска", QMessageBox.DestructiveRole)
+        box.setDefaultButton(keep)
+        box.exec_()
+        return box.clickedButton() is not keep
+        
+    def on_save_failed(self, filename, message):
+        """Ошибка фоновой записи"""
+        self.status_bar.showMessage(f"❌ Ошибка сохранения: {os.path.basename(filename)}")
+        QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить файл: {message}")
+        
+    def closeEvent(self, event):
+        """Дописываем все отложенные изменения перед выходом"""
+        if self.load_thread is not None:
+            self.load_worker.cancel()
+            self.load_thread.quit()
+            self.load_thread.wait()
+        if self.validation_thread is not None:
+            self.validation_worker.cancel()
+            self.validation_thread.quit()
+            self.validation_thread.wait()
+        if self.validator is not None:
+            self.validator.shutdown()
+        if self.reload_thread is not None:
+            self.reload_thread.quit()
+            self.reload_thread.wait()
+        self.flush_auto_save()
+        self.save_worker.wait_idle()
+        # Доставляем сигналы о завершенной записи, чтобы сжать журналы
+        QApplication.processEvents()
+        for journal in self.journals.values():
+            journal.close()
+        self.save_thread.quit()
+        self.save_thread.wait()
+        super().closeEvent(event)
                 
     def show_about_dialog(self):
         """Показать диалог 'О программе'"""
@@ -1169,11 +1500,669 @@ class TraderPlusEditor(QMainWindow):
         QMessageBox.about(self, "О программе", about_text)
 
 
+class LoadWorker(QObject):
+    """Чтение и разбор файла конфигурации в отдельном потоке.
+    
+    Сначала передается документ без записей, затем записи порциями
+    (для файла цен - уже с разобранными товарами). При lazy=True товары
+    остаются строками и разбираются документом при первом обращении.
+    Файлы от stream_bytes разбираются потоково через mmap: записи передаются
+    по мере разбора, а ключи, стоящие в файле после списка записей, -
+    сигналом tail_ready в конце.
+    """
+    
+    CHUNK_BYTES = 1 << 20
+    CHUNK_RECORDS = 50
+    
+    progress = pyqtSignal(int)
+    document_ready = pyqtSignal(object)
+    records_ready = pyqtSignal(object)
+    tail_ready = pyqtSignal(object)
+    base_ready = pyqtSignal(object)
+    finished = pyqtSignal()
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    
+    def __init__(self, filename, lazy=False, stream_bytes=None):
+        super().__init__()
+        self.filename = filename
+        self.lazy = lazy
+        self.stream_bytes = stream_bytes
+        self._cancel = threading.Event()
+        
+    def cancel(self):
+        """Запрос отмены (из потока интерфейса)"""
+        self._cancel.set()
+        
+    def run(self):
+        try:
+            self._run()
+        except Exception as e:
+            self.failed.emit(str(e))
+            
+    def _decode(self, key, chunk):
+        if key == 'TraderCategories' and not self.lazy:
+            for category in chunk:
+                category['Products'] = [Product.from_csv(product) for product in category['Products']]
+                
+    def _run(self):
+        if self.stream_bytes is not None and os.path.getsize(self.filename) >= self.stream_bytes:
+            self._run_streaming()
+            return
+            
+        from trader_journal import file_identity
+        from trader_sync import FileBase
+        # Чтение файла блоками - первые 40% прогресса
+        identity = file_identity(self.filename)
+        total = os.path.getsize(self.filename) or 1
+        blocks = []
+        done = 0
+        with open(self.filename, 'rb') as f:
+            while True:
+                if self._cancel.is_set():
+                    self.cancelled.emit()
+                    return
+                block = f.read(self.CHUNK_BYTES)
+                if not block:
+                    break
+                blocks.append(block)
+                done += len(block)
+                self.progress.emit(done * 40 // total)
+                
+        with trader_perf.recorder.span('parse_json') as span:
+            span.bytes = done
+            config_data = get_codec().loads(b''.join(blocks))
+        del blocks
+        self.progress.emit(50)
+        
+        # Документ без записей, записи передаются порциями
+        key = RECORD_KEYS.get(detect_file_type(config_data))
+        records = config_data.get(key, []) if key else []
+        if key:
+            config_data[key] = []
+        base = FileBase(detect_file_type(config_data), identity)
+        base.add_header(config_data)
+        self.document_ready.emit(config_data)
+        
+        count = len(records)
+        for start in range(0, count, self.CHUNK_RECORDS):
+            if self._cancel.is_set():
+                self.cancelled.emit()
+                return
+            chunk = records[start:start + self.CHUNK_RECORDS]
+            base.add_records(chunk)
+            self._decode(key, chunk)
+            self.records_ready.emit(chunk)
+            self.progress.emit(50 + 50 * (start + len(chunk)) // count)
+            
+        self.base_ready.emit(base)
+        self.progress.emit(100)
+        self.finished.emit()
+        
+    def _run_streaming(self):
+        # Большой файл: записи разбираются по одной и сразу передаются порциями
+        from trader_journal import file_identity
+        from trader_stream import ConfigStream
+        from trader_sync import FileBase
+        stream = ConfigStream(self.filename)
+        base = FileBase(None, file_identity(self.filename))
+        records = iter(stream)
+        config_data = None
+        chunk = []
+        try:
+            for record in records:
+                if self._cancel.is_set():
+                    self.cancelled.emit()
+                    return
+                if config_data is None:
+                    # Тип файла известен по первому ключу списка записей
+                    config_data = dict(stream.header)
+                    base.file_type = stream.file_type
+                    self.document_ready.emit(config_data)
+                chunk.append(record)
+                if len(chunk) >= self.CHUNK_RECORDS:
+                    base.add_records(chunk)
+                    self._decode(stream.record_key, chunk)
+                    self.records_ready.emit(chunk)
+                    self.progress.emit(stream.position * 100 // stream.size)
+                    chunk = []
+        finally:
+            records.close()
+            
+        if config_data is None:
+            config_data = dict(stream.header)
+            base.file_type = stream.file_type
+            self.document_ready.emit(config_data)
+        if chunk:
+            base.add_records(chunk)
+            self._decode(stream.record_key, chunk)
+            self.records_ready.emit(chunk)
+        tail = {key: value for key, value in stream.header.items() if key not in config_data}
+        if tail:
+            self.tail_ready.emit(tail)
+        base.add_header(stream.header)
+        self.base_ready.emit(base)
+        self.progress.emit(100)
+        self.finished.emit()
+
+
+class ValidationWorker(QObject):
+    """Проверка файла цен в отдельном потоке (большие файлы - в пуле процессов)"""
+    
+    found = pyqtSignal(object)
+    finished = pyqtSignal()
+    failed = pyqtSignal(str)
+    
+    def __init__(self, validator, categories):
+        super().__init__()
+        self.validator = validator
+        self.categories = categories
+        self._cancel = threading.Event()
+        
+    def cancel(self):
+        """Запрос отмены (из потока интерфейса)"""
+        self._cancel.set()
+        
+    def run(self):
+        try:
+            for findings in self.validator.run(self.categories, self._cancel.is_set):
+                if findings:
+                    self.found.emit(findings)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished.emit()
+
+
+class ReloadWorker(QObject):
+    """Чтение файла, измененного другой программой, в отдельном потоке.
+    
+    Товары не разбираются: документ разберет только примененные категории.
+    """
+    
+    ready = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    
+    def __init__(self, filename):
+        super().__init__()
+        self.filename = filename
+        
+    def run(self):
+        from trader_journal import file_identity
+        from trader_sync import FileBase
+        try:
+            identity = file_identity(self.filename)
+            config_data = load_config(self.filename)
+            self.ready.emit((self.filename, config_data, FileBase.from_config(config_data, identity)))
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class SaveWorker(QObject):
+    """Запись файла конфигурации в отдельном потоке.
+    
+    Хранится только последний запрошенный снимок: если запись уже идет,
+    новые запросы объединяются и файл перезаписывается один раз.
+    """
+    
+    started = pyqtSignal(str)
+    saved = pyqtSignal(str, int, bool, object)
+    failed = pyqtSignal(str, str)
+    conflict = pyqtSignal(str)
+    _wake = pyqtSignal()
+    
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._pending = None
+        self._written = {}
+        self._idle = threading.Event()
+        self._idle.set()
+        self._wake.connect(self._process)
+        
+    def submit(self, filename, snapshot, manual=False, mark=None, expected=None):
+        """Запрос записи снимка конфига (вызывается из потока интерфейса).
+        
+        mark - номер последней правки журнала, вошедшей в снимок; вместе с
+        размером и временем изменения записанного файла он возвращается в
+        сигнале saved, чтобы удалить записанные правки из журнала.
+        expected - размер и время изменения файла, на основе которого сделаны
+        правки: если файл с тех пор изменила другая программа, запись
+        отменяется сигналом conflict.
+        """
+        with self._lock:
+            if self._pending is not None:
+                manual = manual or self._pending[2]
+            self._pending = (filename, snapshot, manual, mark, expected)
+            self._idle.clear()
+        self._wake.emit()
+        
+    def wait_idle(self, timeout=None):
+        """Ожидание завершения всех запрошенных записей"""
+        return self._idle.wait(timeout)
+        
+    def written_identity(self, filename):
+        """Размер и время изменения файла после последней своей записи"""
+        with self._lock:
+            return self._written.get(filename)
+        
+    def _process(self):
+        with self._lock:
+            job = self._pending
+            self._pending = None
+        if job is None:
+            return
+            
+        from trader_journal import file_identity
+        from trader_sync import FileBase
+        filename, snapshot, manual, mark, expected = job
+        current = file_identity(filename)
+        if (expected is not None and current is not None and current != expected
+                and current != self.written_identity(filename)):
+            self.conflict.emit(filename)
+            with self._lock:
+                if self._pending is None:
+                    self._idle.set()
+            return
+            
+        self.started.emit(filename)
+        try:
+            with trader_perf.recorder.span('auto_save') as span:
+                size = save_config(filename, snapshot)
+                span.rows = len(snapshot.get(RECORD_KEYS.get(detect_file_type(snapshot)), ()))
+                span.bytes = size
+            identity = file_identity(filename)
+            with self._lock:
+                self._written[filename] = identity
+            # Новое состояние файла на диске для сверки с изменениями извне
+            base = FileBase.from_config(snapshot, identity)
+            self.saved.emit(filename, size, manual, (mark, identity, base))
+        except Exception as e:
+            self.failed.emit(filename, str(e))
+        finally:
+            with self._lock:
+                if self._pending is None:
+                    self._idle.set()
+
+
+class ConfigListModel(QAbstractTableModel):
+    """Модель главного списка: категории, торговцы или ID торговцев.
+    
+    Строки не хранятся отдельно - текст ячеек формируется из документа
+    только для тех строк, которые запрашивает представление.
+    """
+    
+    HEADERS = ["📂 Название категории", "📊 Информация о товарах"]
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.document = ConfigDocument()
+        self._changed_rows = set()
+        
+    @property
+    def file_type(self):
+        return self.document.file_type
+        
+    def set_document(self, document):
+        """Подключение документа к модели"""
+        self.beginResetModel()
+        self.document = document
+        self.endResetModel()
+        
+    def records(self):
+        """Список записей текущего типа файла"""
+        return self.document.records()
+        
+    def record(self, row):
+        """Запись конфига для строки модели"""
+        return self.document.record(row)
+        
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.records())
+        
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+        
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+        
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+            
+        record = self.records()[index.row()]
+        column = index.column()
+        
+        if self.file_type == "price":
+            if column == 0:
+                return record['CategoryName']
+            return f"Товаров: {len(record['Products'])}"
+        elif self.file_type == "general":
+            if column == 0:
+                return record.get('GivenName', 'Неизвестный')
+            return f"ID: {record.get('Id', -1)} | Роль: {record.get('Role', 'Торговец')}"
+        else:
+            if column == 0:
+                return f"ID: {record.get('Id', -1)}"
+            return f"Категорий: {len(record.get('Categories', []))}"
+            
+    def match_record(self, record, search_text):
+        """Проверка записи на соответствие поиску.
+        
+        Возвращает None, если запись не подходит, иначе кортеж
+        (подсветка, текст информации о найденном товаре или None).
+        """
+        if self.file_type == "price":
+            # Совпадение по названию категории показываем без подсветки
+            if search_text in record['CategoryName'].lower():
+                return (False, None)
+            # Неразобранная категория разбирается, только если запрос может в ней совпасть
+            if not self.document.is_decoded(record) and not self.document.decode_matching(search_text, [record]):
+                return None
+            numeric = is_numeric_query(search_text)
+            for product in record['Products']:
+                if product_matches(product, search_text, numeric):
+                    classname, _, _, _, buy_price, sell_price = product.fields()
+                    return (True, f"{classname} | Покупка:{buy_price} | Продажа:{sell_price}")
+            return None
+        elif self.file_type == "general":
+            if (search_text in record.get('GivenName', 'Неизвестный').lower() or
+                    search_text in record.get('Role', 'Торговец').lower() or
+                    search_text in str(record.get('Id', -1))):
+                return (True, None)
+            return None
+        else:
+            if (search_text in str(record.get('Id', -1)) or
+                    any(search_text in cat.lower() for cat in record.get('Categories', []))):
+                return (True, None)
+            return None
+            
+    def iter_search(self, search_text, candidates=None):
+        """Поиск по шагам: генератор пар (id записи, результат match_record или None).
+        
+        Между шагами поиск можно прервать. Если candidates задан (уточнение
+        запроса), проверяются только эти записи; иначе для файла цен совпадения
+        берутся из индексов документа, а остальные списки проверяются целиком.
+        Шаг без результата - None.
+        """
+        if self.file_type != "price" or candidates is not None:
+            for record in self.records() if candidates is None else candidates:
+                yield id(record), self.match_record(record, search_text)
+            return
+            
+        document = self.document
+        by_name = set()
+        for category in document.search_categories(search_text):
+            by_name.add(id(category))
+            yield id(category), (False, None)
+            
+        # Неразобранные категории, где может быть запрос, разбираются по одной
+        for category in document.undecoded_categories():
+            document.decode_matching(search_text, [category])
+            yield None
+            
+        # Для каждой категории нужен первый по порядку найденный товар
+        first_found = {}
+        for pairs in document.iter_matching_products(search_text):
+            for category, product in pairs:
+                if id(category) in by_name:
+                    continue
+                position = document.product_position(category, product)
+                found = first_found.get(id(category))
+                if found is None or position < found[0]:
+                    first_found[id(category)] = (position, product)
+            yield None
+            
+        for key, (_, product) in first_found.items():
+            classname, _, _, _, buy_price, sell_price = product.fields()
+            yield key, (True, f"{classname} | Покупка:{buy_price} | Продажа:{sell_price}")
+        
+    def update_row(self, row):
+        """Оповещение представления об изменении одной записи"""
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        
+    def set_row(self, row, record):
+        """Замена записи"""
+        self.document.set_record(row, record)
+        self.update_row(row)
+        
+    def append_row(self, record):
+        """Добавление записи в конец списка"""
+        row = len(self.records())
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.document.add_record(record)
+        self.endInsertRows()
+        
+    def append_rows(self, records):
+        """Добавление порции записей (при загрузке файла)"""
+        if not records:
+            return
+        row = len(self.records())
+        self.beginInsertRows(QModelIndex(), row, row + len(records) - 1)
+        self.document.extend_records(records)
+        self.endInsertRows()
+        
+    def remove_row(self, row):
+        """Удаление записи из списка"""
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.document.delete_record(row)
+        self.endRemoveRows()
+        
+    def insert_row(self, row, record):
+        """Вставка записи по индексу"""
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.document.insert_record(row, record)
+        self.endInsertRows()
+        
+    def apply_step(self, method, args):
+        """Выполнение шага отмены/повтора с оповещением представления"""
+        if method == 'add_record':
+            self.append_row(*args)
+        elif method == 'insert_record':
+            self.insert_row(*args)
+        elif method == 'delete_record':
+            self.remove_row(*args)
+        elif method == 'set_record':
+            self.set_row(*args)
+        elif method in HEADER_STEPS:
+            # Параметры файла не показываются в списке
+            self.document.apply_step(method, args)
+        else:
+            # Шаги над товарами: строки категорий обновляются одним сигналом в конце
+            self.document.apply_step(method, args)
+            self._changed_rows.add(args[0])
+            
+    def _replay(self, replay):
+        self._changed_rows = set()
+        transaction = replay(self.apply_step)
+        if self._changed_rows:
+            self.dataChanged.emit(self.index(min(self._changed_rows), 0),
+                                  self.index(max(self._changed_rows), self.columnCount() - 1))
+        return transaction
+        
+    def apply_steps(self, steps, label):
+        """Выполнение готовых шагов одной правкой (восстановление из журнала)"""
+        return self._replay(lambda apply: self.document.apply_steps(steps, label, apply))
+        
+    def undo(self):
+        """Отмена последней правки документа"""
+        return self._replay(self.document.undo)
+        
+    def redo(self):
+        """Повтор отмененной правки документа"""
+        return self._replay(self.document.redo)
+
+
+class ConfigFilterProxyModel(QSortFilterProxyModel):
+    """Фильтрация главного списка по результатам поиска и подсветка найденного"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.search_text = ""
+        # Результаты сопоставления по id записи: (подсветка, информация)
+        self._hits = {}
+        self._applying = False
+        # Общие объекты темы: одни и те же для каждой подсвеченной строки
+        self._highlight_brush = trader_theme.brush('highlight')
+        self._highlight_text = trader_theme.brush('highlight_text')
+        self._highlight_font = trader_theme.font('highlight')
+        
+    def apply_matches(self, search_text, hits):
+        """Применение готовых результатов поиска (без повторного сканирования)"""
+        self.search_text = search_text
+        self._hits = hits
+        self._applying = True
+        try:
+            self.invalidateFilter()
+        finally:
+            self._applying = False
+        
+    def _hit(self, source_row):
+        return self._hits.get(id(self.sourceModel().record(source_row)))
+        
+    def is_highlighted(self, source_row):
+        """Найден ли поисковый запрос внутри записи (строка со звездочкой)"""
+        hit = self._hit(source_row)
+        return bool(self.search_text and hit and hit[0])
+        
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not self.search_text:
+            return True
+        model = self.sourceModel()
+        record = model.record(source_row)
+        if self._applying:
+            return id(record) in self._hits
+        
+        # Измененная или добавленная запись - проверяем только ее
+        hit = model.match_record(record, self.search_text)
+        if hit is None:
+            self._hits.pop(id(record), None)
+            return False
+        self._hits[id(record)] = hit
+        return True
+        
+    def data(self, index, role=Qt.DisplayRole):
+        if self.search_text and index.isValid():
+            source_row = self.mapToSource(index).row()
+            if self.is_highlighted(source_row):
+                if role == Qt.DisplayRole:
+                    if index.column() == 0:
+                        return f"{super().data(index, role)} ★"
+                    info = self._hit(source_row)[1]
+                    if info is not None:
+                        return info
+                elif role == Qt.BackgroundRole:
+                    return self._highlight_brush
+                elif role == Qt.ForegroundRole:
+                    return self._highlight_text
+                elif role == Qt.FontRole:
+                    return self._highlight_font
+        return super().data(index, role)
+
+
+class SearchController(QObject):
+    """Отложенный и инкрементальный поиск по главному списку.
+    
+    Поиск стартует после паузы в наборе текста и идет порциями через цикл
+    событий (для файла цен - по поисковым индексам документа), поэтому новое
+    нажатие клавиши отменяет устаревший поиск. Если новый запрос содержит
+    предыдущий, проверяются только ранее найденные записи.
+    """
+    
+    DEFAULT_DELAY_MS = 250
+    CHUNK_SECONDS = 0.015
+    
+    def __init__(self, model, proxy, delay_ms=DEFAULT_DELAY_MS, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.proxy = proxy
+        
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self._start)
+        
+        self._generation = 0
+        self._requested_text = ""
+        self._pending = None
+        self._span = None
+        self.reset()
+        
+    def reset(self):
+        """Сброс накопленных результатов (например, после загрузки другого файла)"""
+        self._generation += 1
+        self._pending = None
+        self._applied_text = ""
+        self._applied_hits = {}
+        
+    def schedule(self, search_text):
+        """Запрос поиска после паузы; текущий поиск отменяется"""
+        self._generation += 1
+        self._pending = None
+        self._requested_text = search_text
+        self.timer.start()
+        
+    def run_now(self, search_text):
+        """Немедленный поиск без ожидания"""
+        self.timer.stop()
+        self._generation += 1
+        self._requested_text = search_text
+        self._start()
+        
+    def _start(self):
+        text = self._requested_text
+        # Замер от начала поиска до применения фильтра, в том числе по порциям
+        self._span = trader_perf.recorder.span(f'search/{self.model.file_type}')
+        records = self.model.records()
+        self._span.rows = len(records)
+        if not text:
+            self._finish(text, {})
+            return
+            
+        candidates = None
+        if self._applied_text and self._applied_text in text:
+            # Запрос уточнен - сужаем предыдущий результат
+            previous = self._applied_hits
+            candidates = [record for record in records if id(record) in previous]
+            self._span.rows = len(candidates)
+            
+        self._pending = (text, self.model.iter_search(text, candidates), {})
+        self._step(self._generation)
+        
+    def _step(self, generation):
+        if generation != self._generation or self._pending is None:
+            return  # Устаревший поиск
+            
+        text, steps, hits = self._pending
+        deadline = time.perf_counter() + self.CHUNK_SECONDS
+        for step in steps:
+            if step is not None and step[1] is not None:
+                hits[step[0]] = step[1]
+            if time.perf_counter() >= deadline:
+                QTimer.singleShot(0, lambda: self._step(generation))
+                return
+                
+        self._pending = None
+        self._finish(text, hits)
+        
+    def _finish(self, text, hits):
+        self._applied_text = text
+        self._applied_hits = hits
+        self.proxy.apply_matches(text, hits)
+        if self._span is not None:
+            self._span.finish()
+            self._span = None
+
+
 class ProductWindow(QDialog):
-    def __init__(self, parent, config_data, category_index, category_name, search_text=""):
+    def __init__(self, parent, document, category_index, category_name, search_text=""):
         super().__init__(parent)
         self.parent = parent
-        self.config_data = config_data
+        self.document = document
         self.category_index = category_index
         self.category_name = category_name
         self.search_text = search_text.lower()
@@ -1187,23 +2176,12 @@ class ProductWindow(QDialog):
         self.setModal(True)
         self.resize(1400, 800)
         
-        # Установка иконки окна
-        try:
-            icon_path = os.path.join(os.path.dirname(__file__), 'icon.ico')
-            if os.path.exists(icon_path):
-                self.setWindowIcon(QIcon(icon_path))
-            else:
-                pixmap = QPixmap(32, 32)
-                pixmap.fill(QColor(52, 152, 219))
-                self.setWindowIcon(QIcon(pixmap))
-        except Exception as e:
-            pixmap = QPixmap(32, 32)
-            pixmap.fill(QColor(52, 152, 219))
-            self.setWindowIcon(QIcon(pixmap))
         self.setMinimumSize(900, 700)
         
-        self.setup_ui()
-        self.load_products()
+        with trader_perf.recorder.span('load_products') as span:
+            self.setup_ui()
+            self.load_products()
+            span.rows = self.product_model.rowCount()
         
     def setup_ui(self):
         """Настройка интерфейса окна товаров"""
@@ -1213,75 +2191,42 @@ class ProductWindow(QDialog):
         header_layout = QHBoxLayout()
         
         title_label = QLabel(f"📦 Категория: {self.category_name}")
-        title_font = QFont()
-        title_font.setBold(True)
-        title_font.setPointSize(16)  # Увеличил размер
-        title_label.setFont(title_font)
-        title_label.setStyleSheet("""
-            QLabel {
-                color: #2c3e50;
-                font-size: 16px;
-                font-weight: bold;
-                padding: 10px;
-                margin: 5px;
-            }
-        """)
+        trader_theme.set_role(title_label, 'window_title')
         header_layout.addWidget(title_label)
         
         header_layout.addStretch()
         
-        # Стиль для кнопок в окне товаров
-        button_style = """
-            QPushButton {
-                font-size: 14px;
-                font-weight: bold;
-                padding: 12px 20px;
-                border: none;
-                border-radius: 8px;
-                color: white;
-                margin: 5px;
-                min-width: 130px;
-            }
-        """
-        
         add_button = QPushButton("➕ Добавить товар")
         add_button.clicked.connect(self.add_product)
-        add_button.setStyleSheet(button_style + """
-            QPushButton {
-                background-color: #27ae60;
-            }
-            QPushButton:hover {
-                background-color: #229954;
-            }
-            QPushButton:pressed {
-                background-color: #1e8449;
-            }
-        """)
+        trader_theme.set_role(add_button, 'window', 'green')
         header_layout.addWidget(add_button)
         
+        bulk_button = QPushButton("✏️ Изменить выбранные")
+        bulk_button.clicked.connect(self.bulk_edit)
+        trader_theme.set_role(bulk_button, 'window', 'blue')
+        header_layout.addWidget(bulk_button)
+        
+        transfer_button = QPushButton("📤 Перенести")
+        transfer_button.setToolTip("Копирование или перемещение выбранных товаров в другую категорию")
+        transfer_button.clicked.connect(self.transfer_products)
+        trader_theme.set_role(transfer_button, 'window', 'teal')
+        header_layout.addWidget(transfer_button)
+        
         delete_button = QPushButton("🗑️ Удалить товар")
         delete_button.clicked.connect(self.delete_product)
-        delete_button.setStyleSheet(button_style + """
-            QPushButton {
-                background-color: #e74c3c;
-            }
-            QPushButton:hover {
-                background-color: #c0392b;
-            }
-            QPushButton:pressed {
-                background-color: #a93226;
-            }
-        """)
+        trader_theme.set_role(delete_button, 'window', 'red')
         header_layout.addWidget(delete_button)
         
         layout.addLayout(header_layout)
         
         # Таблица товаров
-        self.product_table = QTreeWidget()
-        self.product_table.setHeaderLabels([
-            "🔹 Класснейм", "⚙️ Коэффициент", "📦 Макс. запас", 
-            "🔢 Кол-во", "💰 Цена покупки", "💵 Цена продажи"
-        ])
+        self.product_model = ProductTableModel(self, self.document, self.category_index)
+        self.product_proxy = ProductFilterProxyModel(self)
+        self.product_proxy.setSourceModel(self.product_model)
+        self.product_proxy.set_search_text(self.search_text)
+        
+        self.product_table = QTreeView()
+        self.product_table.setModel(self.product_proxy)
         
         # Настройка колонок
         header = self.product_table.header()
@@ -1303,215 +2248,256 @@ class ProductWindow(QDialog):
         # Настройка внешнего вида с увеличенным шрифтом
         self.product_table.setAlternatingRowColors(True)
         self.product_table.setRootIsDecorated(False)
-        self.product_table.setSelectionBehavior(QTreeWidget.SelectRows)
+        self.product_table.setUniformRowHeights(True)
+        self.product_table.setSelectionBehavior(QTreeView.SelectRows)
+        # Несколько товаров выделяются через Ctrl/Shift, все видимые - Ctrl+A
+        self.product_table.setSelectionMode(QAbstractItemView.ExtendedSelection)
         
         # Улучшенные стили для таблицы товаров
-        self.product_table.setStyleSheet("""
-            QTreeWidget {
-                font-size: 14px;
-                font-family: 'Segoe UI', Arial, sans-serif;
-                border: 2px solid #bdc3c7;
-                border-radius: 8px;
-                background-color: white;
-                alternate-background-color: #f8f9fa;
-                selection-background-color: #3498db;
-                gridline-color: #ecf0f1;
-                outline: none;
-            }
-            
-            QTreeWidget::item {
-                padding: 10px 8px;
-                border-bottom: 1px solid #ecf0f1;
-                font-size: 14px;
-                font-weight: normal;
-                height: 32px;
-            }
-            
-            QTreeWidget::item:selected {
-                background-color: #3498db;
-                color: white;
-                font-weight: bold;
-            }
-            
-            QTreeWidget::item:hover {
-                background-color: #e8f4f8;
-                color: #2c3e50;
-            }
-            
-            QHeaderView::section {
-                font-size: 13px;
-                font-weight: bold;
-                font-family: 'Segoe UI', Arial, sans-serif;
-                padding: 12px 8px;
-                border: none;
-                border-right: 1px solid #bdc3c7;
-                border-bottom: 3px solid #3498db;
-                background-color: #ecf0f1;
-                color: #2c3e50;
-                text-align: center;
-            }
-            
-            QHeaderView::section:hover {
-                background-color: #d5dbdb;
-            }
-            
-            QHeaderView::section:first {
-                text-align: left;
-            }
-        """)
+        trader_theme.set_role(self.product_table, 'products')
         
         # Подключение событий
-        self.product_table.itemDoubleClicked.connect(self.edit_product)
+        self.product_table.doubleClicked.connect(self.edit_product)
+        delete_action = QAction(self)
+        delete_action.setShortcut(QKeySequence.Delete)
+        delete_action.setShortcutContext(Qt.WidgetWithChildrenShortcut)
+        delete_action.triggered.connect(self.delete_product)
+        self.product_table.addAction(delete_action)
         
         layout.addWidget(self.product_table)
         
         # Статусная строка
-        self.status_label = QLabel("🖱️ Двойной клик для редактирования товара")
-        self.status_label.setStyleSheet("""
-            QLabel {
-                font-size: 14px;
-                background-color: #34495e;
-                color: white;
-                border: 2px solid #3498db;
-                border-radius: 6px;
-                padding: 10px;
-                font-weight: bold;
-            }
-        """)
+        self.status_label = QLabel("🖱️ Двойной клик для редактирования товара, "
+                                   "Ctrl/Shift - выбор нескольких товаров")
+        trader_theme.set_role(self.status_label, 'status')
         layout.addWidget(self.status_label)
         
     def load_products(self):
         """Загрузка товаров в таблицу"""
-        self.product_table.clear()
-        
-        category = self.config_data['TraderCategories'][self.category_index]
-        display_index = 0
-        first_found_item = None
-        
-        for i, product in enumerate(category['Products']):
-            parts = product.split(',')
-            if len(parts) >= 6:
-                classname = parts[0]
-                coefficient = parts[1]
-                maxstock = parts[2]
-                trade_quantity = parts[3]
-                buy_price = parts[4]
-                sell_price = parts[5]
-                
-                # Проверяем, соответствует ли товар поиску
-                show_product = True
-                is_found_item = False
-                
-                if self.search_text:
-                    # Ищем во всех полях товара
-                    product_text = f"{classname},{coefficient},{maxstock},{trade_quantity},{buy_price},{sell_price}".lower()
-                    if self.search_text in product_text:
-                        is_found_item = True
-                    else:
-                        # Если поиск активен, но товар не найден, пропускаем его
-                        show_product = False
-                
-                if show_product:
-                    item = QTreeWidgetItem([classname, coefficient, maxstock, trade_quantity, buy_price, sell_price])
-                    
-                    # Определяем стиль
-                    if is_found_item:
-                        # Стиль для найденных товаров - золотистый
-                        highlight_color = QColor(255, 193, 7)
-                        text_color = QColor(33, 37, 41)
-                        for col in range(6):
-                            item.setBackground(col, highlight_color)
-                            item.setForeground(col, text_color)
-                        font = QFont()
-                        font.setBold(True)
-                        font.setPointSize(14)
-                        for col in range(6):
-                            item.setFont(col, font)
-                    else:
-                        # Стандартные цвета для обычных строк
-                        pass  # Используем стандартное чередование из CSS
-                    
-                    self.product_table.addTopLevelItem(item)
-                    
-                    # Запоминаем первый найденный товар для автовыбора
-                    if is_found_item and first_found_item is None:
-                        first_found_item = item
-                    
-                    display_index += 1
-        
-        # Автоматически выбираем первый найденный товар
-        if first_found_item and self.search_text:
-            self.product_table.setCurrentItem(first_found_item)
-            self.product_table.scrollToItem(first_found_item)
-            
-    def edit_product(self, item):
+        # Ячейки строит модель по запросу представления, здесь только выбор найденного
+        if self.search_text and self.product_proxy.rowCount() > 0:
+            first_found = self.product_proxy.index(0, 0)
+            self.product_table.setCurrentIndex(first_found)
+            self.product_table.scrollTo(first_found)
+            
+    def edit_product(self, index):
         """Редактирование выбранного товара"""
-        if not item:
+        if not index.isValid():
             return
             
-        # Получаем данные товара
-        classname = item.text(0)
-        
-        # Находим индекс товара в данных
-        category = self.config_data['TraderCategories'][self.category_index]
-        product_index = None
-        product_str = None
+        # Строка исходной модели совпадает с индексом товара в категории
+        product_index = self.product_proxy.mapToSource(index).row()
+        product = self.product_model.product(product_index)
         
-        for i, product in enumerate(category['Products']):
-            if product.split(',')[0] == classname:
-                product_index = i
-                product_str = product
-                break
-        
-        if product_index is not None and product_str is not None:
-            dialog = ProductEditDialog(self, product_str)
-            if dialog.exec_() == QDialog.Accepted:
-                # Обновляем данные
-                new_product_str = dialog.get_product_string()
-                category['Products'][product_index] = new_product_str
-                
-                self.load_products()
-                self.parent.auto_save()
-                self.status_label.setText("✅ Товар успешно отредактирован")
-                
+        dialog = ProductEditDialog(self, product)
+        if dialog.exec_() == QDialog.Accepted:
+            # Обновляем только измененную строку
+            self.product_model.set_product(product_index, dialog.get_product())
+            self.parent.auto_save()
+            self.status_label.setText("✅ Товар успешно отредактирован")
+            
     def add_product(self):
         """Добавление нового товара"""
         dialog = ProductAddDialog(self)
         if dialog.exec_() == QDialog.Accepted:
-            new_product_str = dialog.get_product_string()
+            new_product = dialog.get_product()
             
-            category = self.config_data['TraderCategories'][self.category_index]
-            category['Products'].append(new_product_str)
+            if self.document.find_product_in_category(self.category_index, new_product.classname) is not None:
+                reply = QMessageBox.question(self, 'Подтверждение',
+                                           f"Товар '{new_product.classname}' уже есть в категории. Добавить еще один?",
+                                           QMessageBox.Yes | QMessageBox.No)
+                if reply != QMessageBox.Yes:
+                    return
             
-            self.load_products()
+            self.product_model.append_product(new_product)
             self.parent.auto_save()
-            classname = new_product_str.split(',')[0]
-            self.status_label.setText(f"✅ Товар добавлен: {classname}")
+            self.status_label.setText(f"✅ Товар добавлен: {new_product.classname}")
             
+    def selected_rows(self):
+        """Индексы выделенных товаров в категории (только видимые строки)"""
+        return sorted(self.product_proxy.mapToSource(index).row()
+                      for index in self.product_table.selectionModel().selectedRows())
+        
     def delete_product(self):
-        """Удаление выбранного товара"""
-        current_item = self.product_table.currentItem()
-        if not current_item:
+        """Удаление выделенных товаров одной правкой"""
+        rows = self.selected_rows()
+        if not rows:
             QMessageBox.warning(self, "Предупреждение", "Выберите товар для удаления")
             return
         
-        classname = current_item.text(0)
-        
-        reply = QMessageBox.question(self, 'Подтверждение', 
-                                   f"Удалить товар '{classname}'?",
+        if len(rows) == 1:
+            classname = self.product_model.product(rows[0]).classname
+            question = f"Удалить товар '{classname}'?"
+        else:
+            question = f"Удалить выбранные товары ({len(rows)})?"
+        reply = QMessageBox.question(self, 'Подтверждение', question,
                                    QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            # Находим и удаляем товар
-            category = self.config_data['TraderCategories'][self.category_index]
-            for i, product in enumerate(category['Products']):
-                if product.split(',')[0] == classname:
-                    del category['Products'][i]
-                    break
+            if len(rows) == 1:
+                self.product_model.remove_product(rows[0])
+                self.status_label.setText(f"🗑️ Товар удален: {classname}")
+            else:
+                self.product_model.remove_products(rows)
+                self.status_label.setText(f"🗑️ Удалено товаров: {len(rows)}")
+            self.parent.auto_save()
             
-            self.load_products()
+    def bulk_edit(self):
+        """Установка или пересчет поля у выделенных товаров одной правкой"""
+        rows = self.selected_rows()
+        products = [(self.category_index, row, self.product_model.product(row)) for row in rows]
+        if not products:
+            QMessageBox.warning(self, "Предупреждение", "Выберите товары для изменения")
+            return
+        dialog = ProductBulkEditDialog(self, products)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        changes = dialog.changes
+        if changes:
+            self.product_model.set_products(changes, "Изменение выбранных товаров")
+            self.parent.auto_save()
+        self.status_label.setText(f"✅ Изменено товаров: {len(changes)} из {len(products)}")
+        
+    def transfer_products(self):
+        """Копирование или перемещение выделенных товаров в другую категорию одной правкой"""
+        rows = self.selected_rows()
+        if not rows:
+            QMessageBox.warning(self, "Предупреждение", "Выберите товары для переноса")
+            return
+        dialog = ProductTransferDialog(self, self.document, self.parent.ensure_workspace(), self.category_index, len(rows))
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        target_index = dialog.target_index()
+        transferred, skipped = self.product_model.transfer_products(rows, target_index, dialog.move,
+                                                                    dialog.skip_duplicates())
+        if transferred:
+            self.parent.list_model.update_row(target_index)
             self.parent.auto_save()
-            self.status_label.setText(f"🗑️ Товар удален: {classname}")
+        action = "Перемещено" if dialog.move else "Скопировано"
+        text = f"📤 {action} в '{self.document.record(target_index)['CategoryName']}': {len(transferred)}"
+        if skipped:
+            text += f", пропущено (уже есть в категории): {len(skipped)}"
+        self.status_label.setText(text)
+
+
+class ProductTableModel(QAbstractTableModel):
+    """Модель товаров одной категории.
+    
+    Строка модели соответствует индексу товара в списке Products, ячейки
+    разбираются из строки товара только при отрисовке видимых строк.
+    """
+    
+    HEADERS = [
+        "🔹 Класснейм", "⚙️ Коэффициент", "📦 Макс. запас", 
+        "🔢 Кол-во", "💰 Цена покупки", "💵 Цена продажи"
+    ]
+    
+    def __init__(self, parent, document, category_index):
+        super().__init__(parent)
+        self.document = document
+        self.category_index = category_index
+        self.products = document.products(category_index)
+        
+    def product(self, row):
+        """Товар по индексу"""
+        return self.products[row]
+        
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.products)
+        
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+        
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+        
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return self.products[index.row()].fields()[index.column()]
+        
+    def set_product(self, row, product):
+        """Замена товара с обновлением одной строки"""
+        self.document.set_product(self.category_index, row, product)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        
+    def append_product(self, product):
+        """Добавление товара в конец категории"""
+        row = len(self.products)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.document.add_product(self.category_index, product)
+        self.endInsertRows()
+        
+    def remove_product(self, row):
+        """Удаление товара из категории"""
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.document.delete_product(self.category_index, row)
+        self.endRemoveRows()
+        
+    def transfer_products(self, rows, target_index, move, skip_duplicates):
+        """Копирование или перемещение товаров в другую категорию (см. ConfigDocument.transfer_products)"""
+        if not move:
+            return self.document.transfer_products(self.category_index, rows, target_index, False, skip_duplicates)
+        self.beginResetModel()
+        try:
+            return self.document.transfer_products(self.category_index, rows, target_index, True, skip_duplicates)
+        finally:
+            self.endResetModel()
+        
+    def set_products(self, changes, label):
+        """Замена нескольких товаров одной правкой и одним обновлением представления"""
+        self.document.set_products(changes, label)
+        rows = [row for _, row, _ in changes]
+        self.dataChanged.emit(self.index(min(rows), 0), self.index(max(rows), self.columnCount() - 1))
+        
+    def remove_products(self, rows):
+        """Удаление нескольких товаров одной правкой; представление перестраивается один раз"""
+        self.beginResetModel()
+        try:
+            self.document.delete_products(self.category_index, rows, "Удаление выбранных товаров")
+        finally:
+            self.endResetModel()
+
+
+class ProductFilterProxyModel(QSortFilterProxyModel):
+    """Скрывает некорректные строки и товары, не подходящие под поиск"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.search_text = ""
+        self.numeric_search = False
+        self._highlight_brush = trader_theme.brush('highlight')
+        self._highlight_text = trader_theme.brush('highlight_text')
+        self._highlight_font = trader_theme.font('highlight')
+        
+    def set_search_text(self, search_text):
+        """Установка поискового запроса и перефильтровка"""
+        if search_text == self.search_text:
+            return
+        self.search_text = search_text
+        self.numeric_search = is_numeric_query(search_text)
+        self.invalidateFilter()
+        
+    def filterAcceptsRow(self, source_row, source_parent):
+        product = self.sourceModel().product(source_row)
+        if not product.is_valid:
+            return False
+        return not self.search_text or product_matches(product, self.search_text, self.numeric_search)
+        
+    def data(self, index, role=Qt.DisplayRole):
+        # При активном поиске видны только найденные товары - подсвечиваем все
+        if self.search_text:
+            if role == Qt.BackgroundRole:
+                return self._highlight_brush
+            elif role == Qt.ForegroundRole:
+                return self._highlight_text
+            elif role == Qt.FontRole:
+                return self._highlight_font
+        return super().data(index, role)
 
 
 class ProductAddDialog(QDialog):
@@ -1522,20 +2508,6 @@ class ProductAddDialog(QDialog):
         self.resize(550, 480)
         self.setMinimumSize(500, 450)
         
-        # Установка иконки окна
-        try:
-            icon_path = os.path.join(os.path.dirname(__file__), 'icon.ico')
-            if os.path.exists(icon_path):
-                self.setWindowIcon(QIcon(icon_path))
-            else:
-                pixmap = QPixmap(32, 32)
-                pixmap.fill(QColor(52, 152, 219))
-                self.setWindowIcon(QIcon(pixmap))
-        except Exception as e:
-            pixmap = QPixmap(32, 32)
-            pixmap.fill(QColor(52, 152, 219))
-            self.setWindowIcon(QIcon(pixmap))
-        
         self.setup_ui()
         
     def setup_ui(self):
@@ -1546,15 +2518,7 @@ class ProductAddDialog(QDialog):
         
         # Заголовок
         title_label = QLabel("🛒 Добавление нового товара")
-        title_label.setStyleSheet("""
-            QLabel {
-                font-size: 16px;
-                font-weight: bold;
-                color: #2c3e50;
-                padding: 10px;
-                margin-bottom: 10px;
-            }
-        """)
+        trader_theme.set_role(title_label, 'dialog_title')
         layout.addWidget(title_label)
         
         # Форма
@@ -1562,66 +2526,40 @@ class ProductAddDialog(QDialog):
         form_layout.setSpacing(18)
         form_layout.setVerticalSpacing(15)
         
-        # Стиль для полей ввода
-        input_style = """
-            QLineEdit {
-                font-size: 14px;
-                padding: 12px 15px;
-                border: 2px solid #bdc3c7;
-                border-radius: 6px;
-                background-color: white;
-                min-height: 20px;
-                max-height: 40px;
-            }
-            QLineEdit:focus {
-                border-color: #3498db;
-            }
-        """
-        
-        # Стиль для меток
-        label_style = """
-            QLabel {
-                font-size: 14px;
-                font-weight: bold;
-                color: #34495e;
-                padding: 5px;
-            }
-        """
-        
         self.classname_edit = QLineEdit()
-        self.classname_edit.setStyleSheet(input_style)
+        trader_theme.set_role(self.classname_edit, 'field')
         label1 = QLabel("🔹 Класснейм:")
-        label1.setStyleSheet(label_style)
+        trader_theme.set_role(label1, 'field')
         form_layout.addRow(label1, self.classname_edit)
         
         self.coefficient_edit = QLineEdit("1")
-        self.coefficient_edit.setStyleSheet(input_style)
+        trader_theme.set_role(self.coefficient_edit, 'field')
         label2 = QLabel("⚙️ Коэффициент:")
-        label2.setStyleSheet(label_style)
+        trader_theme.set_role(label2, 'field')
         form_layout.addRow(label2, self.coefficient_edit)
         
         self.maxstock_edit = QLineEdit("100")
-        self.maxstock_edit.setStyleSheet(input_style)
+        trader_theme.set_role(self.maxstock_edit, 'field')
         label3 = QLabel("📦 Макс. запас:")
-        label3.setStyleSheet(label_style)
+        trader_theme.set_role(label3, 'field')
         form_layout.addRow(label3, self.maxstock_edit)
         
         self.trade_quantity_edit = QLineEdit("1")
-        self.trade_quantity_edit.setStyleSheet(input_style)
+        trader_theme.set_role(self.trade_quantity_edit, 'field')
         label4 = QLabel("🔢 Кол-во для торговли:")
-        label4.setStyleSheet(label_style)
+        trader_theme.set_role(label4, 'field')
         form_layout.addRow(label4, self.trade_quantity_edit)
         
         self.buy_price_edit = QLineEdit("100")
-        self.buy_price_edit.setStyleSheet(input_style)
+        trader_theme.set_role(self.buy_price_edit, 'field')
         label5 = QLabel("💰 Цена покупки:")
-        label5.setStyleSheet(label_style)
+        trader_theme.set_role(label5, 'field')
         form_layout.addRow(label5, self.buy_price_edit)
         
         self.sell_price_edit = QLineEdit("50")
-        self.sell_price_edit.setStyleSheet(input_style)
+        trader_theme.set_role(self.sell_price_edit, 'field')
         label6 = QLabel("💵 Цена продажи:")
-        label6.setStyleSheet(label_style)
+        trader_theme.set_role(label6, 'field')
         form_layout.addRow(label6, self.sell_price_edit)
         
         layout.addLayout(form_layout)
@@ -1630,39 +2568,11 @@ class ProductAddDialog(QDialog):
         button_layout = QHBoxLayout()
         
         save_button = QPushButton("Сохранить")
-        save_button.setStyleSheet("""
-            QPushButton {
-                font-size: 14px;
-                font-weight: bold;
-                padding: 10px 20px;
-                border: none;
-                border-radius: 6px;
-                background-color: #27ae60;
-                color: white;
-                min-width: 100px;
-            }
-            QPushButton:hover {
-                background-color: #229954;
-            }
-        """)
+        trader_theme.set_role(save_button, 'dialog', 'green')
         save_button.clicked.connect(self.validate_and_accept)
         
         cancel_button = QPushButton("Закрыть")
-        cancel_button.setStyleSheet("""
-            QPushButton {
-                font-size: 14px;
-                font-weight: bold;
-                padding: 10px 20px;
-                border: none;
-                border-radius: 6px;
-                background-color: #e74c3c;
-                color: white;
-                min-width: 100px;
-            }
-            QPushButton:hover {
-                background-color: #c0392b;
-            }
-        """)
+        trader_theme.set_role(cancel_button, 'dialog', 'red')
         cancel_button.clicked.connect(self.reject)
         
         button_layout.addStretch()
@@ -1680,36 +2590,22 @@ class ProductAddDialog(QDialog):
         
         self.accept()
         
-    def get_product_string(self):
-        """Получение строки товара из полей"""
-        return f"{self.classname_edit.text().strip()},{self.coefficient_edit.text().strip()}," \
-               f"{self.maxstock_edit.text().strip()},{self.trade_quantity_edit.text().strip()}," \
-               f"{self.buy_price_edit.text().strip()},{self.sell_price_edit.text().strip()}"
+    def get_product(self):
+        """Получение товара из полей"""
+        return Product.from_csv(f"{self.classname_edit.text().strip()},{self.coefficient_edit.text().strip()},"
+                                f"{self.maxstock_edit.text().strip()},{self.trade_quantity_edit.text().strip()},"
+                                f"{self.buy_price_edit.text().strip()},{self.sell_price_edit.text().strip()}")
 
 
 class ProductEditDialog(QDialog):
-    def __init__(self, parent, product_str):
+    def __init__(self, parent, product):
         super().__init__(parent)
-        self.product_str = product_str
+        self.product = product
         self.setWindowTitle("✏️ Редактирование товара")
         self.setModal(True)
         self.resize(550, 480)
         self.setMinimumSize(500, 450)
         
-        # Установка иконки окна
-        try:
-            icon_path = os.path.join(os.path.dirname(__file__), 'icon.ico')
-            if os.path.exists(icon_path):
-                self.setWindowIcon(QIcon(icon_path))
-            else:
-                pixmap = QPixmap(32, 32)
-                pixmap.fill(QColor(52, 152, 219))
-                self.setWindowIcon(QIcon(pixmap))
-        except Exception as e:
-            pixmap = QPixmap(32, 32)
-            pixmap.fill(QColor(52, 152, 219))
-            self.setWindowIcon(QIcon(pixmap))
-        
         self.setup_ui()
         self.load_product_data()
         
@@ -1721,15 +2617,7 @@ class ProductEditDialog(QDialog):
         
         # Заголовок
         title_label = QLabel("✏️ Редактирование товара")
-        title_label.setStyleSheet("""
-            QLabel {
-                font-size: 16px;
-                font-weight: bold;
-                color: #2c3e50;
-                padding: 10px;
-                margin-bottom: 10px;
-            }
-        """)
+        trader_theme.set_role(title_label, 'dialog_title')
         layout.addWidget(title_label)
         
         # Форма
@@ -1737,66 +2625,40 @@ class ProductEditDialog(QDialog):
         form_layout.setSpacing(18)
         form_layout.setVerticalSpacing(15)
         
-        # Стиль для полей ввода
-        input_style = """
-            QLineEdit {
-                font-size: 14px;
-                padding: 12px 15px;
-                border: 2px solid #bdc3c7;
-                border-radius: 6px;
-                background-color: white;
-                min-height: 20px;
-                max-height: 40px;
-            }
-            QLineEdit:focus {
-                border-color: #3498db;
-            }
-        """
-        
-        # Стиль для меток
-        label_style = """
-            QLabel {
-                font-size: 14px;
-                font-weight: bold;
-                color: #34495e;
-                padding: 5px;
-            }
-        """
-        
         self.classname_edit = QLineEdit()
-        self.classname_edit.setStyleSheet(input_style)
+        trader_theme.set_role(self.classname_edit, 'field')
         label1 = QLabel("🔹 Класснейм:")
-        label1.setStyleSheet(label_style)
+        trader_theme.set_role(label1, 'field')
         form_layout.addRow(label1, self.classname_edit)
         
         self.coefficient_edit = QLineEdit()
-        self.coefficient_edit.setStyleSheet(input_style)
+        trader_theme.set_role(self.coefficient_edit, 'field')
         label2 = QLabel("⚙️ Коэффициент:")
-        label2.setStyleSheet(label_style)
+        trader_theme.set_role(label2, 'field')
         form_layout.addRow(label2, self.coefficient_edit)
         
         self.maxstock_edit = QLineEdit()
-        self.maxstock_edit.setStyleSheet(input_style)
+        trader_theme.set_role(self.maxstock_edit, 'field')
         label3 = QLabel("📦 Макс. запас:")
-        label3.setStyleSheet(label_style)
+        trader_theme.set_role(label3, 'field')
         form_layout.addRow(label3, self.maxstock_edit)
         
         self.trade_quantity_edit = QLineEdit()
-        self.trade_quantity_edit.setStyleSheet(input_style)
+        trader_theme.set_role(self.trade_quantity_edit, 'field')
         label4 = QLabel("🔢 Кол-во для торговли:")
-        label4.setStyleSheet(label_style)
+        trader_theme.set_role(label4, 'field')
         form_layout.addRow(label4, self.trade_quantity_edit)
         
         self.buy_price_edit = QLineEdit()
-        self.buy_price_edit.setStyleSheet(input_style)
+        trader_theme.set_role(self.buy_price_edit, 'field')
         label5 = QLabel("💰 Цена покупки:")
-        label5.setStyleSheet(label_style)
+        trader_theme.set_role(label5, 'field')
         form_layout.addRow(label5, self.buy_price_edit)
         
         self.sell_price_edit = QLineEdit()
-        self.sell_price_edit.setStyleSheet(input_style)
+        trader_theme.set_role(self.sell_price_edit, 'field')
         label6 = QLabel("💵 Цена продажи:")
-        label6.setStyleSheet(label_style)
+        trader_theme.set_role(label6, 'field')
         form_layout.addRow(label6, self.sell_price_edit)
         
         layout.addLayout(form_layout)
@@ -1805,39 +2667,11 @@ class ProductEditDialog(QDialog):
         button_layout = QHBoxLayout()
         
         save_button = QPushButton("Сохранить")
-        save_button.setStyleSheet("""
-            QPushButton {
-                font-size: 14px;
-                font-weight: bold;
-                padding: 10px 20px;
-                border: none;
-                border-radius: 6px;
-                background-color: #27ae60;
-                color: white;
-                min-width: 100px;
-            }
-            QPushButton:hover {
-                background-color: #229954;
-            }
-        """)
+        trader_theme.set_role(save_button, 'dialog', 'green')
         save_button.clicked.connect(self.accept)
         
         cancel_button = QPushButton("Закрыть")
-        cancel_button.setStyleSheet("""
-            QPushButton {
-                font-size: 14px;
-                font-weight: bold;
-                padding: 10px 20px;
-                border: none;
-                border-radius: 6px;
-                background-color: #e74c3c;
-                color: white;
-                min-width: 100px;
-            }
-            QPushButton:hover {
-                background-color: #c0392b;
-            }
-        """)
+        trader_theme.set_role(cancel_button, 'dialog', 'red')
         cancel_button.clicked.connect(self.reject)
         
         button_layout.addStretch()
@@ -1847,8 +2681,8 @@ class ProductEditDialog(QDialog):
         
     def load_product_data(self):
         """Загрузка данных товара в поля"""
-        parts = self.product_str.split(',')
-        if len(parts) >= 6:
+        if self.product.is_valid:
+            parts = self.product.fields()
             self.classname_edit.setText(parts[0])
             self.coefficient_edit.setText(parts[1])
             self.maxstock_edit.setText(parts[2])
@@ -1856,11 +2690,527 @@ class ProductEditDialog(QDialog):
             self.buy_price_edit.setText(parts[4])
             self.sell_price_edit.setText(parts[5])
             
-    def get_product_string(self):
-        """Получение строки товара из полей"""
-        return f"{self.classname_edit.text()},{self.coefficient_edit.text()}," \
-               f"{self.maxstock_edit.text()},{self.trade_quantity_edit.text()}," \
-               f"{self.buy_price_edit.text()},{self.sell_price_edit.text()}"
+    def get_product(self):
+        """Получение товара из полей"""
+        product = Product.from_csv(f"{self.classname_edit.text()},{self.coefficient_edit.text()},"
+                                   f"{self.maxstock_edit.text()},{self.trade_quantity_edit.text()},"
+                                   f"{self.buy_price_edit.text()},{self.sell_price_edit.text()}")
+        # Дополнительные поля исходной строки сохраняем без изменений
+        if product.is_valid and self.product.tail is not None:
+            product = product.replace(tail=self.product.tail)
+        return product
+
+
+class BulkPricingDialog(QDialog):
+    FIELD_LABELS = {
+        'buy': "Цена покупки",
+        'sell': "Цена продажи",
+        'coef': "Коэффициент",
+        'maxstock': "Макс. запас",
+    }
+    
+    PLACEHOLDERS = {
+        'scale': "например 1.15",
+        'markup': "например 15 или -10",
+        'ratio': "например 0.5",
+        'round': "например 10",
+        'clamp': "нижняя граница (пусто - без ограничения)",
+    }
+    
+    NEGATIVE_HINT = "Отрицательные значения (-1) не изменяются"
+    
+    def __init__(self, parent, document, selected_rows):
+        super().__init__(parent)
+        self.document = document
+        self.setWindowTitle("Массовое изменение цен")
+        self.setModal(True)
+        self.resize(550, 600)
+        self.setup_ui(selected_rows)
+        
+    def setup_ui(self, selected_rows):
+        """Настройка интерфейса"""
+        layout = QVBoxLayout(self)
+        
+        # Категории
+        layout.addWidget(QLabel("Категории:"))
+        self.category_list = QListWidget()
+        self.category_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.category_list.addItems([category['CategoryName'] for category in self.document.records()])
+        for row in selected_rows:
+            self.category_list.item(row).setSelected(True)
+        layout.addWidget(self.category_list)
+        self.setup_operation_form(layout)
+        
+    def setup_operation_form(self, layout):
+        """Выбор операции, поля и значений с кнопками диалога"""
+        from trader_pricing import PRICING_FIELDS
+        form_layout = QFormLayout()
+        self.operation_combo = QComboBox()
+        for name, label in self.operations().items():
+            self.operation_combo.addItem(label, name)
+        self.field_combo = QComboBox()
+        self.source_combo = QComboBox()
+        for name, label in self.FIELD_LABELS.items():
+            self.field_combo.addItem(label, name)
+            if name in PRICING_FIELDS:
+                self.source_combo.addItem(label, name)
+        self.value_edit = QLineEdit()
+        self.high_edit = QLineEdit()
+        
+        form_layout.addRow("Операция:", self.operation_combo)
+        form_layout.addRow("Поле:", self.field_combo)
+        form_layout.addRow("От поля:", self.source_combo)
+        form_layout.addRow("Значение:", self.value_edit)
+        form_layout.addRow("Верхняя граница:", self.high_edit)
+        layout.addLayout(form_layout)
+        
+        self.preview_label = QLabel(self.NEGATIVE_HINT)
+        layout.addWidget(self.preview_label)
+        
+        self.operation_combo.currentIndexChanged.connect(self.update_form)
+        self.update_form()
+        
+        # Кнопки
+        button_layout = QHBoxLayout()
+        preview_button = QPushButton("Предпросмотр")
+        apply_button = QPushButton("Применить")
+        cancel_button = QPushButton("Отмена")
+        
+        preview_button.clicked.connect(self.preview)
+        apply_button.clicked.connect(self.validate_and_accept)
+        cancel_button.clicked.connect(self.reject)
+        
+        button_layout.addWidget(preview_button)
+        button_layout.addWidget(apply_button)
+        button_layout.addWidget(cancel_button)
+        layout.addLayout(button_layout)
+        
+    def operations(self):
+        """Операции списка: имя -> подпись"""
+        from trader_pricing import OPERATIONS
+        return OPERATIONS
+        
+    def update_form(self):
+        """Подсказки полей ввода для выбранной операции"""
+        operation = self.operation_combo.currentData()
+        self.source_combo.setEnabled(operation == 'ratio')
+        self.high_edit.setEnabled(operation == 'clamp')
+        self.value_edit.setPlaceholderText(self.PLACEHOLDERS[operation])
+        
+    def selected_categories(self):
+        """Индексы выбранных категорий"""
+        return sorted(self.category_list.row(item) for item in self.category_list.selectedItems())
+        
+    def get_operations(self):
+        """Список операций для trader_pricing (ValueError при неверном значении)"""
+        operation = self.operation_combo.currentData()
+        field = self.field_combo.currentData()
+        value = self.value_edit.text().strip().replace(',', '.')
+        if operation == 'clamp':
+            high = self.high_edit.text().strip().replace(',', '.')
+            return [(operation, field, float(value) if value else None, float(high) if high else None)]
+        if operation == 'ratio':
+            return [(operation, field, self.source_combo.currentData(), float(value))]
+        return [(operation, field, float(value))]
+        
+    def plan(self):
+        """Изменения без записи в документ (ValueError при неверном значении)"""
+        from trader_pricing import category_selection, plan_pricing
+        operations = self.get_operations()
+        return plan_pricing(category_selection(self.document, self.selected_categories()), operations)
+        
+    def count_changes(self):
+        """Количество товаров, которые изменит операция"""
+        try:
+            return len(self.plan())
+        except ValueError as e:
+            QMessageBox.warning(self, "Предупреждение", f"Неверное значение: {e}")
+            return None
+        
+    def preview(self):
+        """Подсчет изменяемых товаров без применения"""
+        count = self.count_changes()
+        if count is not None:
+            self.preview_label.setText(f"Будет изменено товаров: {count}")
+            
+    def validate_and_accept(self):
+        """Проверка значений и принятие диалога"""
+        if not self.selected_categories():
+            QMessageBox.warning(self, "Предупреждение", "Выберите хотя бы одну категорию")
+            return
+        try:
+            # Проверка параметров операции без расчета
+            from trader_pricing import plan_pricing
+            plan_pricing([], self.get_operations())
+        except ValueError as e:
+            QMessageBox.warning(self, "Предупреждение", f"Неверное значение: {e}")
+            return
+        self.accept()
+
+
+class ProductBulkEditDialog(BulkPricingDialog):
+    """Изменение одного поля у выделенных в окне товаров.
+    
+    Кроме операций пересчета цен можно установить одно значение всем
+    товарам. Изменения рассчитываются при нажатии "Применить" и лежат
+    в changes в виде (индекс категории, индекс товара, новый товар).
+    """
+    
+    FIELD_LABELS = dict(BulkPricingDialog.FIELD_LABELS, qty="Кол-во для торговли")
+    
+    PLACEHOLDERS = dict(BulkPricingDialog.PLACEHOLDERS, set="например 100 или -1")
+    
+    def __init__(self, parent, products):
+        self.products = products
+        self.changes = []
+        super().__init__(parent, None, [])
+        self.setWindowTitle(f"Изменение выбранных товаров ({len(products)})")
+        self.resize(450, 280)
+        
+    def setup_ui(self, selected_rows):
+        """Настройка интерфейса (без списка категорий)"""
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"Выбрано товаров: {len(self.products)}"))
+        self.setup_operation_form(layout)
+        
+    def operations(self):
+        return dict({'set': "Установить значение"}, **super().operations())
+        
+    def update_form(self):
+        super().update_form()
+        if self.operation_combo.currentData() == 'set':
+            self.preview_label.setText("Значение ставится всем выбранным товарам, в том числе с -1")
+        else:
+            self.preview_label.setText(self.NEGATIVE_HINT)
+        
+    def plan(self):
+        from trader_pricing import PRICING_FIELDS, plan_pricing, plan_set
+        operation = self.operation_combo.currentData()
+        field = self.field_combo.currentData()
+        if operation == 'set':
+            text = self.value_edit.text().strip().replace(',', '.')
+            try:
+                value = int(text)
+            except ValueError:
+                value = float(text)
+            return plan_set(self.products, dict(PRICING_FIELDS, qty='quantity')[field], value)
+        if field not in PRICING_FIELDS:
+            raise ValueError("количество для торговли можно только установить")
+        return plan_pricing(self.products, self.get_operations())
+        
+    def validate_and_accept(self):
+        """Расчет изменений и принятие диалога"""
+        try:
+            self.changes = self.plan()
+        except ValueError as e:
+            QMessageBox.warning(self, "Предупреждение", f"Неверное значение: {e}")
+            return
+        self.accept()
+
+
+class ProductTransferDialog(QDialog):
+    """Выбор категории, в которую копируются или перемещаются товары.
+    
+    Если открыт файл IDs, сначала показываются только категории торговцев
+    исходной категории; флажок открывает категории остальных торговцев.
+    """
+    
+    def __init__(self, parent, document, workspace, source_index, count):
+        super().__init__(parent)
+        self.document = document
+        self.move = False
+        self.setWindowTitle(f"Перенос товаров ({count})")
+        self.setModal(True)
+        self.resize(550, 600)
+        
+        traders = workspace.category_traders()
+        self.source_traders = set(traders.get(document.record(source_index)['CategoryName'], []))
+        # (индекс категории, название для фильтра, подпись, Id торговцев)
+        self.categories = []
+        for index, record in enumerate(document.records()):
+            if index == source_index:
+                continue
+            name = record['CategoryName']
+            trader_ids = traders.get(name, [])
+            label = name
+            if trader_ids:
+                label += f"  ({', '.join(workspace.trader_label(trader_id) for trader_id in trader_ids)})"
+            self.categories.append((index, name.lower(), label, set(trader_ids)))
+        
+        self.setup_ui(count)
+        self.update_list()
+        
+    def setup_ui(self, count):
+        """Настройка интерфейса"""
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"Выбрано товаров: {count}. Целевая категория:"))
+        
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Фильтр по названию категории...")
+        self.filter_edit.textChanged.connect(self.update_list)
+        layout.addWidget(self.filter_edit)
+        
+        self.category_list = QListWidget()
+        self.category_list.itemDoubleClicked.connect(lambda item: self.accept_with(False))
+        layout.addWidget(self.category_list)
+        
+        self.other_traders_check = QCheckBox("Показать категории других торговцев")
+        self.other_traders_check.toggled.connect(self.update_list)
+        self.other_traders_check.setVisible(bool(self.source_traders))
+        layout.addWidget(self.other_traders_check)
+        
+        self.skip_check = QCheckBox("Пропускать товары, которые уже есть в целевой категории")
+        self.skip_check.setChecked(True)
+        layout.addWidget(self.skip_check)
+        
+        button_layout = QHBoxLayout()
+        copy_button = QPushButton("Копировать")
+        move_button = QPushButton("Переместить")
+        cancel_button = QPushButton("Отмена")
+        copy_button.clicked.connect(lambda: self.accept_with(False))
+        move_button.clicked.connect(lambda: self.accept_with(True))
+        cancel_button.clicked.connect(self.reject)
+        button_layout.addWidget(copy_button)
+        button_layout.addWidget(move_button)
+        button_layout.addWidget(cancel_button)
+        layout.addLayout(button_layout)
+        
+    def update_list(self):
+        """Список категорий по фильтру и группе торговцев"""
+        text = self.filter_edit.text().strip().lower()
+        same_traders = bool(self.source_traders) and not self.other_traders_check.isChecked()
+        self.category_list.clear()
+        for index, name, label, trader_ids in self.categories:
+            if text and text not in name:
+                continue
+            if same_traders and not trader_ids & self.source_traders:
+                continue
+            item = QListWidgetItem(label)
+            item.setData(Qt.UserRole, index)
+            self.category_list.addItem(item)
+        if self.category_list.count():
+            self.category_list.setCurrentRow(0)
+            
+    def target_index(self):
+        """Индекс выбранной категории или None"""
+        item = self.category_list.currentItem()
+        return item.data(Qt.UserRole) if item is not None else None
+        
+    def skip_duplicates(self):
+        return self.skip_check.isChecked()
+        
+    def accept_with(self, move):
+        """Принятие диалога с выбранным действием"""
+        if self.target_index() is None:
+            QMessageBox.warning(self, "Предупреждение", "Выберите целевую категорию")
+            return
+        self.move = move
+        self.accept()
+
+
+class PerfDialog(QDialog):
+    """Счетчики горячих путей: процентили по последним замерам каждой операции"""
+    
+    HEADERS = ["Операция", "Вызовов", "p50, мс", "p90, мс", "p99, мс", "Макс., мс", "Строк", "Байт"]
+    FIELDS = ['calls', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms', 'rows', 'bytes']
+    
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setWindowTitle("Производительность")
+        self.resize(800, 400)
+        self.setup_ui()
+        
+        # Пока окно открыто, таблица обновляется раз в секунду
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(1000)
+        self.refresh_timer.timeout.connect(self.refresh)
+        
+    def setup_ui(self):
+        """Настройка интерфейса"""
+        layout = QVBoxLayout(self)
+        
+        self.enabled_check = QCheckBox("Вести замеры")
+        self.enabled_check.setChecked(trader_perf.recorder.enabled)
+        self.enabled_check.toggled.connect(self.set_enabled)
+        layout.addWidget(self.enabled_check)
+        
+        self.table = QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+        
+        # Кнопки
+        button_layout = QHBoxLayout()
+        reset_button = QPushButton("Сбросить")
+        export_button = QPushButton("Экспорт в JSON...")
+        close_button = QPushButton("Закрыть")
+        
+        reset_button.clicked.connect(self.reset)
+        export_button.clicked.connect(self.export)
+        close_button.clicked.connect(self.close)
+        
+        button_layout.addWidget(reset_button)
+        button_layout.addWidget(export_button)
+        button_layout.addStretch()
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+        
+    def showEvent(self, event):
+        self.refresh()
+        self.refresh_timer.start()
+        super().showEvent(event)
+        
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+        
+    def set_enabled(self, enabled):
+        trader_perf.recorder.enabled = enabled
+        QSettings("TraderPlusEditor", "TraderPlusEditor").setValue("perf/enabled", enabled)
+        
+    def reset(self):
+        trader_perf.recorder.reset()
+        self.refresh()
+        
+    def refresh(self):
+        """Перестроение таблицы по текущим счетчикам"""
+        snapshot = trader_perf.recorder.snapshot()
+        self.table.setRowCount(len(snapshot))
+        for row, (name, stats) in enumerate(snapshot.items()):
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            for column, field in enumerate(self.FIELDS, 1):
+                value = stats[field]
+                item = QTableWidgetItem(f"{value:.2f}" if isinstance(value, float) else str(value))
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+                
+    def export(self):
+        """Выгрузка счетчиков в файл JSON"""
+        filename, _ = QFileDialog.getSaveFileName(self, "Экспорт счетчиков", "perf.json",
+                                                  "JSON files (*.json);;All files (*.*)")
+        if not filename:
+            return
+        try:
+            trader_perf.recorder.export(filename)
+        except OSError as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось записать файл:\n{e}")
+
+
+class MergeDialog(QDialog):
+    """Сравнение открытого файла с другой версией и трехстороннее слияние"""
+    
+    DIFF_LIST_LIMIT = 1000
+    
+    def __init__(self, parent, document):
+        super().__init__(parent)
+        self.document = document
+        self.merge_result = None
+        self.setWindowTitle("Сравнение и слияние")
+        self.setModal(True)
+        self.resize(700, 550)
+        self.setup_ui()
+        
+    def setup_ui(self):
+        """Настройка интерфейса"""
+        layout = QVBoxLayout(self)
+        
+        form_layout = QFormLayout()
+        self.theirs_edit = QLineEdit()
+        self.theirs_edit.setPlaceholderText("файл, изменения которого нужно перенести")
+        self.base_edit = QLineEdit()
+        self.base_edit.setPlaceholderText("общая исходная версия (нужна только для слияния)")
+        form_layout.addRow("Другая версия:", self.file_row(self.theirs_edit))
+        form_layout.addRow("Исходная версия:", self.file_row(self.base_edit))
+        layout.addLayout(form_layout)
+        
+        self.prefer_theirs_check = QCheckBox("В конфликтах брать значения другой версии")
+        layout.addWidget(self.prefer_theirs_check)
+        
+        self.summary_label = QLabel("Товары сопоставляются по класснейму, категории - по названию, "
+                                    "торговцы и ID - по Id")
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+        self.change_list = QListWidget()
+        layout.addWidget(self.change_list)
+        
+        # Кнопки
+        button_layout = QHBoxLayout()
+        diff_button = QPushButton("Сравнить")
+        merge_button = QPushButton("Объединить")
+        cancel_button = QPushButton("Отмена")
+        
+        diff_button.clicked.connect(self.show_diff)
+        merge_button.clicked.connect(self.merge_and_accept)
+        cancel_button.clicked.connect(self.reject)
+        
+        button_layout.addWidget(diff_button)
+        button_layout.addWidget(merge_button)
+        button_layout.addWidget(cancel_button)
+        layout.addLayout(button_layout)
+        
+    def file_row(self, edit):
+        """Поле пути с кнопкой выбора файла"""
+        row = QWidget()
+        row_layout = QHBoxLayout(row)
+        row_layout.setContentsMargins(0, 0, 0, 0)
+        row_layout.addWidget(edit)
+        browse_button = QPushButton("Обзор...")
+        browse_button.clicked.connect(lambda: self.browse(edit))
+        row_layout.addWidget(browse_button)
+        return row
+        
+    def browse(self, edit):
+        filename, _ = QFileDialog.getOpenFileName(self, "Выбор версии файла", "",
+                                                  "JSON files (*.json);;All files (*.*)")
+        if filename:
+            edit.setText(filename)
+            
+    def load_version(self, edit, label):
+        """Чтение файла из поля; None и предупреждение при ошибке"""
+        path = edit.text().strip()
+        if not path:
+            QMessageBox.warning(self, "Предупреждение", f"Укажите {label}")
+            return None
+        try:
+            return load_config(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось прочитать {path}:\n{e}")
+            return None
+            
+    def show_diff(self):
+        """Изменения другой версии относительно открытого файла"""
+        theirs = self.load_version(self.theirs_edit, "другую версию")
+        if theirs is None:
+            return
+        from trader_merge import describe_change, diff_configs
+        try:
+            changes = diff_configs(self.document.data, theirs)
+        except ValueError as e:
+            QMessageBox.warning(self, "Ошибка", str(e))
+            return
+        self.change_list.clear()
+        self.change_list.addItems([describe_change(self.document.file_type, change)
+                                   for change in changes[:self.DIFF_LIST_LIMIT]])
+        self.summary_label.setText(f"Отличий от открытого файла: {len(changes)}")
+        
+    def merge_and_accept(self):
+        """Слияние: изменения другой версии относительно исходной переносятся в открытый файл"""
+        theirs = self.load_version(self.theirs_edit, "другую версию")
+        if theirs is None:
+            return
+        base = self.load_version(self.base_edit, "исходную версию")
+        if base is None:
+            return
+        prefer = 'theirs' if self.prefer_theirs_check.isChecked() else None
+        from trader_merge import merge_configs
+        try:
+            self.merge_result = merge_configs(base, self.document.data, theirs, prefer)
+        except ValueError as e:
+            QMessageBox.warning(self, "Ошибка", str(e))
+            return
+        self.accept()
 
 
 class TraderEditDialog(QDialog):
@@ -2036,15 +3386,12 @@ class TraderIDEditDialog(QDialog):
 
 
 def main():
+    # Пакетный режим и процессы пула проверки обрабатываются в начале файла,
+    # до импорта PyQt5
     app = QApplication(sys.argv)
     
-    # Настройка стиля приложения
-    app.setStyle('Fusion')
-    
-    # Увеличиваем базовый шрифт приложения
-    font = QFont()
-    font.setPointSize(11)  # Базовый размер шрифта
-    app.setFont(font)
+    # Стиль, шрифт, иконка и таблица стилей - один раз на все окна
+    trader_theme.apply(app)
     
     # Создание и отображение главного окна
     window = TraderPlusEditor()
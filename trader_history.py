@@ -0,0 +1,94 @@
+"""История правок документа для отмены и повтора.
+
+Каждая правка хранится как пара списков шагов: шаги повтора и обратные шаги
+отмены. Шаг - это имя метода ConfigDocument и его аргументы. Аргументы
+ссылаются на те же объекты товаров и записей, что и сам конфиг (они не
+меняются на месте), поэтому запись в истории стоит столько же, сколько сама
+правка, а не копия всего файла.
+"""
+
+
+class Transaction:
+    """Одна отменяемая правка (может состоять из многих шагов)"""
+
+    __slots__ = ('label', 'redo_steps', 'undo_steps')
+
+    def __init__(self, label):
+        self.label = label
+        self.redo_steps = []
+        self.undo_steps = []
+
+    def __len__(self):
+        return len(self.redo_steps)
+
+
+class History:
+    """Стеки отмены и повтора"""
+
+    DEFAULT_LIMIT = 500
+
+    def __init__(self, limit=DEFAULT_LIMIT):
+        self.limit = limit
+        self._undo = []
+        self._redo = []
+        self._current = None
+        self._depth = 0
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+
+    def begin(self, label):
+        """Начало группы шагов, которая отменяется одним действием"""
+        if self._depth == 0:
+            self._current = Transaction(label)
+        self._depth += 1
+
+    def end(self):
+        """Завершение группы шагов"""
+        self._depth -= 1
+        if self._depth == 0:
+            transaction, self._current = self._current, None
+            if transaction:
+                self._push(transaction)
+
+    def record(self, label, redo_step, undo_step):
+        """Запись шага правки (вне группы - отдельная правка)"""
+        if self._current is not None:
+            self._current.redo_steps.append(redo_step)
+            self._current.undo_steps.append(undo_step)
+            return
+        transaction = Transaction(label)
+        transaction.redo_steps.append(redo_step)
+        transaction.undo_steps.append(undo_step)
+        self._push(transaction)
+
+    def _push(self, transaction):
+        self._undo.append(transaction)
+        self._redo.clear()
+        if len(self._undo) > self.limit:
+            del self._undo[0]
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def undo_label(self):
+        return self._undo[-1].label if self._undo else None
+
+    def redo_label(self):
+        return self._redo[-1].label if self._redo else None
+
+    def take_undo(self):
+        """Правка для отмены (переносится в стек повтора)"""
+        transaction = self._undo.pop()
+        self._redo.append(transaction)
+        return transaction
+
+    def take_redo(self):
+        """Правка для повтора (переносится в стек отмены)"""
+        transaction = self._redo.pop()
+        self._undo.append(transaction)
+        return transaction
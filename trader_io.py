@@ -0,0 +1,212 @@
+"""Чтение и запись файлов конфигурации TraderPlus.
+
+Разбор и сериализация JSON идут через кодек: если установлен orjson или ujson,
+используется он, иначе стандартный модуль json. Текст JSON всегда совпадает
+с json.dump(indent=4, ensure_ascii=False), а переводы строк при сохранении
+берутся из уже существующего файла (CRLF или LF); новый файл пишется
+с переводом строки системы, как при записи в текстовом режиме.
+Кодек можно выбрать явно переменной окружения TRADERPLUS_JSON (json, orjson, ujson).
+"""
+
+import json
+import math
+import os
+import tempfile
+
+from trader_store import Product, json_default
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# Сколько байт начала файла читать, чтобы определить перевод строки
+NEWLINE_PROBE = 4096
+
+
+class StdlibJsonCodec:
+    """Кодек на стандартном модуле json"""
+
+    name = "json"
+
+    def loads(self, data):
+        """Разбор JSON из байтов или строки"""
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        return json.loads(data)
+
+    def dumps(self, config_data):
+        """Сериализация конфига в байты UTF-8 в формате TraderPlus"""
+        return json.dumps(config_data, indent=4, ensure_ascii=False, default=json_default).encode('utf-8')
+
+
+class UjsonCodec(StdlibJsonCodec):
+    """Кодек с разбором через ujson.
+
+    Запись остается стандартной: ujson форматирует числа с плавающей точкой
+    иначе, чем json, а файл должен совпадать побайтно.
+    """
+
+    name = "ujson"
+
+    def loads(self, data):
+        return ujson.loads(data)
+
+
+class OrjsonCodec(StdlibJsonCodec):
+    """Кодек на orjson.
+
+    orjson умеет только отступ в 2 пробела, поэтому ведущие пробелы каждой
+    строки удваиваются (переводов строк внутри строк JSON не бывает - они
+    экранируются). Если в данных есть значения, которые orjson записал бы
+    иначе, чем json (экспоненциальная запись, NaN, очень большие целые),
+    запись выполняется стандартным кодеком.
+    """
+
+    name = "orjson"
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+    def dumps(self, config_data):
+        if not _orjson_compatible(config_data):
+            return super().dumps(config_data)
+        try:
+            data = orjson.dumps(config_data, default=json_default, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            return super().dumps(config_data)
+        lines = data.split(b'\n')
+        return b'\n'.join([b' ' * (len(line) - len(line.lstrip(b' '))) + line for line in lines])
+
+
+def _orjson_compatible(value):
+    """Совпадет ли вывод orjson с json для всех чисел в данных"""
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            # Списки товаров и строк проверять не нужно
+            if value and isinstance(value[0], (Product, str)):
+                if all(isinstance(item, (Product, str)) for item in value):
+                    continue
+            stack.extend(value)
+        elif isinstance(value, float):
+            if not math.isfinite(value):
+                return False
+            if value != 0 and not 1e-4 <= abs(value) < 1e16:
+                return False
+        elif isinstance(value, int) and not isinstance(value, bool):
+            if not -2 ** 63 <= value < 2 ** 64:
+                return False
+    return True
+
+
+CODECS = {"json": StdlibJsonCodec}
+if ujson is not None:
+    CODECS["ujson"] = UjsonCodec
+if orjson is not None:
+    CODECS["orjson"] = OrjsonCodec
+
+_codec = None
+
+
+def get_codec():
+    """Самый быстрый доступный кодек (или заданный в TRADERPLUS_JSON)"""
+    global _codec
+    if _codec is None:
+        name = os.environ.get("TRADERPLUS_JSON", "")
+        if name not in CODECS:
+            name = "orjson" if "orjson" in CODECS else "ujson" if "ujson" in CODECS else "json"
+        _codec = CODECS[name]()
+    return _codec
+
+
+def load_config(path):
+    """Чтение и разбор файла конфигурации"""
+    with open(path, 'rb') as f:
+        return get_codec().loads(f.read())
+
+
+def file_newline(path):
+    """Перевод строки существующего файла (CRLF или LF); для нового файла - системный"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(NEWLINE_PROBE)
+    except OSError:
+        head = b''
+    index = head.find(b'\n')
+    if index < 0:
+        return os.linesep.encode('ascii')
+    return b'\r\n' if head[index - 1:index] == b'\r' else b'\n'
+
+
+def dump_config(config_data, newline=b'\n'):
+    """Сериализация конфига в байты в формате TraderPlus (отступ 4, кириллица без экранирования).
+
+    Переводов строк внутри строк JSON нет (они экранируются), поэтому
+    newline заменяет только переводы строк между строками файла.
+    """
+    data = get_codec().dumps(config_data)
+    if newline != b'\n':
+        data = data.replace(b'\n', newline)
+    return data
+
+
+def atomic_write(path, data):
+    """Атомарная запись файла: временный файл рядом с исходным и os.replace.
+
+    Байты записываются как есть, без преобразования переводов строк.
+    При сбое во время записи исходный файл остается нетронутым.
+    Возвращает количество записанных байт.
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            try:
+                os.chmod(temp_path, os.stat(path).st_mode & 0o7777)
+            except OSError:
+                pass
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return len(data)
+
+
+def snapshot_config(config_data):
+    """Снимок конфига для сериализации в другом потоке.
+
+    Копируются только списки и словари верхних уровней: товары и записи
+    торговцев при правке заменяются новыми объектами, а не меняются на месте,
+    поэтому снимок не зависит от дальнейших изменений в интерфейсе.
+    """
+    snapshot = dict(config_data)
+    if 'TraderCategories' in snapshot:
+        snapshot['TraderCategories'] = [dict(category, Products=list(category['Products']))
+                                        for category in snapshot['TraderCategories']]
+    for key in ('Traders', 'IDs'):
+        if key in snapshot:
+            snapshot[key] = list(snapshot[key])
+    return snapshot
+
+
+def save_config(path, config_data):
+    """Сохранение конфига с переводами строк исходного файла, возвращает количество записанных байт"""
+    return atomic_write(path, dump_config(config_data, file_newline(path)))
@@ -0,0 +1,202 @@
+"""Журнал правок рядом с файлом конфигурации.
+
+Каждая правка дописывается в конец файла "<конфиг>.journal" одной строкой
+JSON сразу после выполнения, поэтому ее сохранность не зависит от размера
+конфига. Полная перезапись конфига (сжатие журнала) выполняется реже и в
+фоне; после нее записанные правки удаляются из журнала. Если редактор
+завершился до сжатия, правки из журнала применяются при следующем открытии файла.
+
+Первая строка журнала - заголовок с размером и временем изменения конфига,
+к которому относятся правки: по нему видно, не был ли файл изменен извне.
+"""
+
+import json
+import os
+
+from trader_io import atomic_write
+from trader_store import Product, json_default
+
+JOURNAL_SUFFIX = '.journal'
+JOURNAL_VERSION = 1
+
+# Методы документа, последний аргумент которых - товар или запись
+PRODUCT_STEPS = ('set_product', 'add_product', 'insert_product')
+RECORD_STEPS = ('add_record', 'insert_record', 'set_record')
+
+
+def journal_path(config_path):
+    return config_path + JOURNAL_SUFFIX
+
+
+def file_identity(path):
+    """Размер и время изменения файла (None, если файла нет)"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def encode_line(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=json_default).encode('utf-8') + b'\n'
+
+
+def encode_step(step):
+    """Один шаг документа в JSON (кодируется сразу, пока объекты не изменились)"""
+    method, args = step
+    return json.dumps([method, list(args)], ensure_ascii=False, separators=(',', ':'),
+                      default=json_default).encode('utf-8')
+
+
+def decode_steps(line, file_type):
+    """Шаги документа из строки журнала"""
+    steps = []
+    for method, args in json.loads(line):
+        if args and method in PRODUCT_STEPS:
+            args[-1] = Product.from_csv(args[-1])
+        elif args and method in RECORD_STEPS and file_type == "price":
+            args[-1]['Products'] = [Product.from_csv(text) for text in args[-1].get('Products', [])]
+        steps.append((method, tuple(args)))
+    return steps
+
+
+class RecoveredJournal:
+    """Журнал, оставшийся после аварийного завершения"""
+
+    def __init__(self, header, lines):
+        self.header = header
+        self.lines = lines
+
+    def __len__(self):
+        return len(self.lines)
+
+    def matches(self, config_path):
+        """Относится ли журнал к текущему состоянию файла"""
+        return self.header.get('identity') == file_identity(config_path)
+
+    def steps(self, file_type):
+        """Все шаги журнала по порядку"""
+        steps = []
+        for line in self.lines:
+            steps.extend(decode_steps(line, file_type))
+        return steps
+
+
+def read_journal(config_path):
+    """Чтение журнала файла или None, если журнала нет.
+
+    Незавершенная последняя строка (сбой во время записи) отбрасывается.
+    """
+    try:
+        with open(journal_path(config_path), 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    lines = data.split(b'\n')
+    # После последнего перевода строки остается пустая или оборванная строка
+    lines = [line + b'\n' for line in lines[:-1]]
+    if not lines:
+        return None
+    try:
+        header = json.loads(lines[0])
+    except ValueError:
+        return None
+    if header.get('journal') != JOURNAL_VERSION:
+        return None
+    entries = []
+    for line in lines[1:]:
+        try:
+            json.loads(line)
+        except ValueError:
+            break
+        entries.append(line)
+    return RecoveredJournal(header, entries)
+
+
+def discard_journal(config_path):
+    """Удаление журнала файла"""
+    try:
+        os.remove(journal_path(config_path))
+    except OSError:
+        pass
+
+
+class EditJournal:
+    """Журнал правок открытого файла.
+
+    Подключается к документу как слушатель: on_step() получает каждый шаг,
+    on_commit() - конец правки, после чего правка дописывается одной строкой.
+    mark() - номер последней записанной правки: снимок конфига, переданный
+    на сохранение, содержит все правки до этого номера, и после успешной
+    записи они удаляются из журнала вызовом compacted().
+    """
+
+    def __init__(self, config_path, recovered=None):
+        self.config_path = config_path
+        self.path = journal_path(config_path)
+        self._file = None
+        self._lines = list(recovered.lines) if recovered is not None else []
+        self._header = recovered.header if recovered is not None else None
+        self._compacted = 0
+        self._pending = []
+
+    def __len__(self):
+        return len(self._lines)
+
+    def mark(self):
+        return self._compacted + len(self._lines)
+
+    def _open(self):
+        if self._header is None:
+            # Новый журнал начинается с заголовка текущего состояния файла
+            self._header = {'journal': JOURNAL_VERSION, 'identity': file_identity(self.config_path)}
+            self._file = open(self.path, 'wb')
+            self._file.write(encode_line(self._header))
+        else:
+            self._file = open(self.path, 'ab')
+
+    def on_step(self, step, undo_step):
+        self._pending.append(encode_step(step))
+
+    def on_commit(self):
+        if self._pending:
+            line = b'[' + b','.join(self._pending) + b']\n'
+            self._pending = []
+            self.append(line)
+
+    def append(self, line):
+        """Запись одной правки на диск (flush и fsync)"""
+        if self._file is None:
+            self._open()
+        self._file.write(line)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._lines.append(line)
+
+    def compacted(self, mark, identity):
+        """Конфиг записан со всеми правками до mark: журнал переписывается без них"""
+        count = mark - self._compacted
+        if count <= 0:
+            return
+        self.close()
+        self._lines = self._lines[count:]
+        self._compacted = mark
+        self._header = {'journal': JOURNAL_VERSION, 'identity': identity}
+        if self._lines:
+            atomic_write(self.path, encode_line(self._header) + b''.join(self._lines))
+        else:
+            self._header = None
+            discard_journal(self.config_path)
+
+    def close(self):
+        """Закрытие файла журнала (сам журнал остается на диске)"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """Закрытие и удаление журнала"""
+        self.close()
+        self._lines = []
+        self._header = None
+        discard_journal(self.config_path)
@@ -0,0 +1,320 @@
+"""Структурное сравнение и трехстороннее слияние конфигов TraderPlus.
+
+Записи сопоставляются по ключам, а не по строкам текста: категории - по
+CategoryName, товары внутри категории - по класснейму, торговцы и записи
+IDs - по Id. Каждая версия файла один раз раскладывается в словари по
+ключам, одинаковые категории отсекаются сравнением списков строк товаров
+без разбора, поэтому сравнение файлов по 50 тысяч товаров занимает
+миллисекунды. При слиянии изменения, сделанные только в одной из версий,
+переносятся автоматически, а по-разному измененные значения становятся
+конфликтами.
+"""
+
+import json
+from collections import namedtuple
+from itertools import repeat
+
+from trader_store import RECORD_KEYS, detect_file_type, is_raw_products
+from trader_sync import RECORD_ID_FIELDS, ReloadPlan, record_fingerprint
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+CHANGE_LABELS = {ADDED: "Добавлено", REMOVED: "Удалено", CHANGED: "Изменено"}
+
+RECORD_LABELS = {"price": "Категория", "general": "Торговец Id", "ids": "ID"}
+
+# path - кортеж: ('header', ключ), ('record', запись), ('record', запись, поле)
+# или ('record', категория, 'Products', класснейм); повторы ключей - (ключ, номер)
+Change = namedtuple('Change', 'kind path old new')
+Conflict = namedtuple('Conflict', 'path base ours theirs')
+
+_MISSING = object()
+
+
+def product_text(product):
+    """Строка товара: из файла как есть или разобранный товар в формате файла"""
+    return product if type(product) is str else product.to_csv()
+
+
+def _keyed(items, key_func):
+    """Словарь (ключ, номер повтора) -> элемент в порядке списка"""
+    keys = [key_func(item) for item in items]
+    if len(set(keys)) == len(keys):
+        # Обычный случай - ключи без повторов
+        return dict(zip(zip(keys, repeat(0)), items))
+    keyed = {}
+    counts = {}
+    for key, item in zip(keys, items):
+        number = counts.get(key, 0)
+        counts[key] = number + 1
+        keyed[key, number] = item
+    return keyed
+
+
+def _classname(text):
+    return text.partition(',')[0]
+
+
+def _normalized(file_type, config_data):
+    """Ключи верхнего уровня и записи по ключам; товары - строками"""
+    record_key = RECORD_KEYS.get(file_type)
+    header = {key: value for key, value in config_data.items() if key != record_key}
+    records = config_data.get(record_key, []) if record_key else []
+    if file_type == "price":
+        records = [category if is_raw_products(category['Products'])
+                   else dict(category, Products=[product_text(product) for product in category['Products']])
+                   for category in records]
+    field = RECORD_ID_FIELDS.get(file_type)
+    return header, _keyed(records, lambda record: record.get(field))
+
+
+def _file_type(*configs):
+    file_types = {detect_file_type(config_data) for config_data in configs}
+    if len(file_types) != 1:
+        raise ValueError("Файлы разных типов")
+    return file_types.pop()
+
+
+# --- Сравнение ---
+
+def diff_configs(old, new):
+    """Список изменений (Change), превращающих old в new"""
+    file_type = _file_type(old, new)
+    old_header, old_records = _normalized(file_type, old)
+    new_header, new_records = _normalized(file_type, new)
+    changes = []
+    _diff_map(('header',), {(key, 0): value for key, value in old_header.items()},
+              {(key, 0): value for key, value in new_header.items()}, None, changes)
+    _diff_map(('record',), old_records, new_records, _diff_record, changes)
+    return changes
+
+
+def _diff_map(path, old, new, diff_item, changes):
+    for key, before in old.items():
+        after = new.get(key, _MISSING)
+        if after is _MISSING:
+            changes.append(Change(REMOVED, path + (key,), before, None))
+        elif before != after:
+            if diff_item is None:
+                changes.append(Change(CHANGED, path + (key,), before, after))
+            else:
+                diff_item(path + (key,), before, after, changes)
+    for key, after in new.items():
+        if key not in old:
+            changes.append(Change(ADDED, path + (key,), None, after))
+
+
+def _diff_record(path, old, new, changes):
+    old_fields = {(key, 0): value for key, value in old.items()}
+    new_fields = {(key, 0): value for key, value in new.items()}
+    old_products = old_fields.get(('Products', 0))
+    new_products = new_fields.get(('Products', 0))
+    if isinstance(old_products, list) and isinstance(new_products, list):
+        # Товары сравниваются по класснеймам, остальные поля - целиком
+        del old_fields['Products', 0], new_fields['Products', 0]
+    _diff_map(path, old_fields, new_fields, None, changes)
+    if ('Products', 0) not in old_fields and old_products != new_products:
+        # По класснеймам сопоставляются только строки, которых нет в другой версии
+        old_texts = set(old_products)
+        new_texts = set(new_products)
+        removed = [text for text in old_products if text not in new_texts]
+        added = [text for text in new_products if text not in old_texts]
+        _diff_map(path + (('Products', 0),), _keyed(removed, _classname), _keyed(added, _classname), None, changes)
+
+
+# --- Слияние ---
+
+class MergeResult:
+    """Результат слияния: data - объединенный конфиг (товары строками),
+    conflicts - по-разному измененные значения (Conflict), applied - пути
+    значений, взятых из другой версии.
+    """
+
+    def __init__(self, file_type, prefer=None):
+        self.file_type = file_type
+        self.prefer = prefer
+        self.data = {}
+        self.conflicts = []
+        self.applied = []
+
+    def _resolve(self, path, base, ours, theirs):
+        """Значение по трем версиям; _MISSING - значения нет"""
+        if ours == theirs or theirs == base:
+            return ours
+        if ours == base:
+            self.applied.append(path)
+            return theirs
+        self.conflicts.append(Conflict(path, base, ours, theirs))
+        if self.prefer == 'theirs':
+            return theirs
+        return ours
+
+    def _merge_map(self, path, base, ours, theirs, merge_item):
+        """Слияние словарей по ключам; порядок - как в нашей версии,
+        добавленное в другой версии встает после предыдущего там элемента"""
+        merged = {}
+        for key, mine in ours.items():
+            old = base.get(key, _MISSING)
+            other = theirs.get(key, _MISSING)
+            if other is not _MISSING and merge_item is not None:
+                value = merge_item(path + (key,), old, mine, other)
+            else:
+                value = self._resolve(path + (key,), old, mine, other)
+            if value is not _MISSING:
+                merged[key] = value
+
+        # Добавленное подряд встает после последнего общего элемента перед ним
+        inserted = {}
+        anchor = None
+        for key, other in theirs.items():
+            if key in merged:
+                anchor = key
+            elif key not in ours:
+                value = self._resolve(path + (key,), base.get(key, _MISSING), _MISSING, other)
+                if value is not _MISSING:
+                    inserted.setdefault(anchor, []).append((key, value))
+        if not inserted:
+            return merged
+
+        result = dict(inserted.pop(None, ()))
+        for key, value in merged.items():
+            result[key] = value
+            result.update(inserted.get(key, ()))
+        return result
+
+    def _merge_record(self, path, base, ours, theirs):
+        if ours == theirs or theirs == base or ours == base:
+            return self._resolve(path, base, ours, theirs)
+        if base is _MISSING:
+            base = {}
+        fields = self._merge_map(path, {(key, 0): value for key, value in base.items()},
+                                 {(key, 0): value for key, value in ours.items()},
+                                 {(key, 0): value for key, value in theirs.items()}, self._merge_field)
+        return {key: value for (key, _), value in fields.items()}
+
+    def _merge_field(self, path, base, ours, theirs):
+        if path[-1] != ('Products', 0) or self.file_type != "price":
+            return self._resolve(path, base, ours, theirs)
+        if ours == theirs or theirs == base or ours == base:
+            return self._resolve(path, base, ours, theirs)
+        products = self._merge_map(path, _keyed(base if base is not _MISSING else [], _classname),
+                                   _keyed(ours, _classname), _keyed(theirs, _classname), None)
+        return list(products.values())
+
+
+def merge_configs(base, ours, theirs, prefer=None):
+    """Трехстороннее слияние: base - общая исходная версия, ours и theirs -
+    две версии, измененные независимо.
+
+    В конфликтах остается наше значение, при prefer='theirs' - значение
+    другой версии; сами конфликты перечисляются в результате в любом случае.
+    """
+    file_type = _file_type(base, ours, theirs)
+    result = MergeResult(file_type, prefer)
+    base_header, base_records = _normalized(file_type, base)
+    our_header, our_records = _normalized(file_type, ours)
+    their_header, their_records = _normalized(file_type, theirs)
+
+    header = result._merge_map(('header',), {(key, 0): value for key, value in base_header.items()},
+                               {(key, 0): value for key, value in our_header.items()},
+                               {(key, 0): value for key, value in their_header.items()}, None)
+    records = result._merge_map(('record',), base_records, our_records, their_records, result._merge_record)
+
+    # Порядок ключей верхнего уровня - как в нашей версии
+    record_key = RECORD_KEYS.get(file_type)
+    for key in ours:
+        if key == record_key:
+            result.data[key] = list(records.values())
+        elif (key, 0) in header:
+            result.data[key] = header[key, 0]
+    for (key, _), value in header.items():
+        result.data.setdefault(key, value)
+    return result
+
+
+def plan_merge(document, config_data):
+    """Шаги документа, приводящие его к объединенному конфигу config_data.
+
+    Измененные записи заменяются на месте, новые добавляются в конец,
+    ключи верхнего уровня меняются шагами set_header/delete_header;
+    возвращается ReloadPlan без конфликтов.
+    """
+    plan = ReloadPlan()
+    field = RECORD_ID_FIELDS.get(document.file_type)
+    if field is None:
+        return plan
+    current = _keyed(range(len(document.records())), lambda row: document.record(row).get(field))
+    merged = _keyed(config_data.get(RECORD_KEYS[document.file_type], []), lambda record: record.get(field))
+
+    sets, deletes, adds = [], [], []
+    for key, row in current.items():
+        record = merged.get(key)
+        if record is None:
+            deletes.append(row)
+            plan.keys.append(key[0])
+        elif record_fingerprint(record) != record_fingerprint(document.record(row)):
+            sets.append(('set_record', (row, record)))
+            plan.keys.append(key[0])
+    for key, record in merged.items():
+        if key not in current:
+            adds.append(('add_record', (record,)))
+            plan.keys.append(key[0])
+    plan.steps = sets + [('delete_record', (row,)) for row in sorted(deletes, reverse=True)] + adds
+
+    record_key = RECORD_KEYS[document.file_type]
+    # Новые ключи добавляются в порядке объединенного конфига
+    for key in list(document.data) + [key for key in config_data if key not in document.data]:
+        if key == record_key:
+            continue
+        if key not in config_data:
+            plan.steps.append(('delete_header', (key,)))
+        elif key not in document.data or document.data[key] != config_data[key]:
+            plan.steps.append(('set_header', (key, config_data[key])))
+    return plan
+
+
+# --- Описание для вывода ---
+
+def _key_label(key):
+    name, number = key
+    return str(name) if number == 0 else f"{name} ({number + 1})"
+
+
+def describe_path(file_type, path):
+    """Текстовое описание пути изменения или конфликта"""
+    if path[0] == 'header':
+        return f"Параметр {_key_label(path[1])}"
+    text = f"{RECORD_LABELS.get(file_type, 'Запись')} {_key_label(path[1])}"
+    if len(path) == 3:
+        text += f": поле {_key_label(path[2])}"
+    elif len(path) == 4:
+        text += f": товар {_key_label(path[3])}"
+    return text
+
+
+def describe_value(value):
+    """Короткое текстовое представление значения"""
+    if value is _MISSING or value is None:
+        return "нет"
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return "запись"
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= 80 else text[:77] + "..."
+
+
+def describe_change(file_type, change):
+    text = f"{CHANGE_LABELS[change.kind]}: {describe_path(file_type, change.path)}"
+    if change.kind == CHANGED:
+        text += f": {describe_value(change.old)} -> {describe_value(change.new)}"
+    elif len(change.path) == 4:
+        text += f" ({describe_value(change.old if change.kind == REMOVED else change.new)})"
+    return text
+
+
+def describe_conflict(file_type, conflict):
+    return (f"{describe_path(file_type, conflict.path)}: было {describe_value(conflict.base)}, "
+            f"у нас {describe_value(conflict.ours)}, в другой версии {describe_value(conflict.theirs)}")
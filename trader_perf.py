@@ -0,0 +1,169 @@
+"""Замеры времени горячих путей редактора.
+
+Точки замера (загрузка файла, определение типа, поиск, открытие товаров
+категории, сохранение) сообщают время выполнения, количество обработанных
+строк и прочитанных или записанных байт. Для каждой операции хранятся
+последние WINDOW замеров, по ним считаются процентили; накопленные счетчики
+можно выгрузить в JSON. Пока замеры выключены (по умолчанию), точка замера
+стоит одной проверки флага.
+"""
+
+import json
+import math
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+WINDOW = 1000
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(sorted_values, percent):
+    """Процентиль отсортированного списка (ближайший ранг)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values), math.ceil(percent / 100 * len(sorted_values))) - 1)
+    return sorted_values[rank]
+
+
+class Counter:
+    """Счетчики одной операции: все время и скользящее окно последних замеров"""
+
+    def __init__(self, window=WINDOW):
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.max_seconds = 0.0
+        self.recent = deque(maxlen=window)
+
+    def add(self, seconds, rows, nbytes):
+        self.calls += 1
+        self.seconds += seconds
+        self.rows += rows
+        self.bytes += nbytes
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.recent.append(seconds)
+
+    def stats(self):
+        """Сводка в миллисекундах; процентили - по окну последних замеров"""
+        recent = sorted(self.recent)
+        result = {
+            'calls': self.calls,
+            'total_ms': self.seconds * 1000,
+            'max_ms': self.max_seconds * 1000,
+            'rows': self.rows,
+            'bytes': self.bytes,
+        }
+        for percent in PERCENTILES:
+            result[f'p{percent}_ms'] = percentile(recent, percent) * 1000
+        return result
+
+
+class Span:
+    """Замер одного выполнения; rows и bytes заполняет измеряемый код"""
+
+    __slots__ = ('recorder', 'name', 'rows', 'bytes', 'start')
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+        self.rows = 0
+        self.bytes = 0
+        self.start = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.finish()
+
+    def finish(self):
+        self.recorder.record(self.name, time.perf_counter() - self.start, self.rows, self.bytes)
+
+
+class _NullSpan:
+    """Замер при выключенных замерах: ничего не делает"""
+
+    __slots__ = ()
+    rows = 0
+    bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def finish(self):
+        pass
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class PerfRecorder:
+    """Счетчики всех операций; record() можно вызывать из любого потока"""
+
+    def __init__(self, window=WINDOW):
+        self.enabled = False
+        self.window = window
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        """Замер блока: with recorder.span('save') as span: ... span.bytes = size"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name)
+
+    def record(self, name, seconds, rows=0, nbytes=0):
+        with self._lock:
+            counter = self._counters.get(name)
+            if counter is None:
+                counter = self._counters[name] = Counter(self.window)
+            counter.add(seconds, rows, nbytes)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+    def snapshot(self):
+        """Сводка по операциям: имя -> Counter.stats()"""
+        with self._lock:
+            return {name: counter.stats() for name, counter in sorted(self._counters.items())}
+
+    def export(self, path):
+        """Выгрузка сводки в файл JSON"""
+        report = {
+            'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'window': self.window,
+            'operations': self.snapshot(),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+# Общие счетчики приложения
+recorder = PerfRecorder()
+
+
+def timed(name):
+    """Декоратор замера функции (без подсчета строк и байт)"""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not recorder.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorder.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
@@ -0,0 +1,246 @@
+"""Массовое изменение цен товаров.
+
+Числовые поля выбранных товаров собираются в столбцы, и каждая операция
+выполняется над столбцом целиком: через numpy, если он установлен, иначе
+обычными циклами Python с тем же результатом. Новые товары создаются только
+для тех позиций, где значение действительно изменилось, и записываются
+в документ одной операцией.
+
+Отрицательные значения (-1: товар не продается или склад без ограничения)
+операциями не меняются.
+"""
+
+import math
+
+from trader_store import Product
+
+# numpy импортируется при первом расчете (см. load_numpy): сам импорт
+# занимает десятки миллисекунд и не нужен при запуске редактора
+numpy = None
+_numpy_checked = False
+
+PRICING_FIELDS = {
+    'buy': 'buy_price',
+    'sell': 'sell_price',
+    'coef': 'coefficient',
+    'maxstock': 'maxstock',
+}
+
+OPERATIONS = {
+    'scale': "Умножить на коэффициент",
+    'markup': "Наценка, %",
+    'ratio': "Доля от другого поля",
+    'round': "Округлить до шага",
+    'clamp': "Ограничить диапазоном",
+}
+
+_floor = math.floor
+_maximum = max
+_minimum = min
+
+
+def _python_where(condition, value, default):
+    return value if condition else default
+
+
+_where = _python_where
+
+
+def load_numpy():
+    """Импорт numpy при первом обращении; None, если он не установлен"""
+    global numpy, _numpy_checked, _floor, _maximum, _minimum, _where
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy as module
+        except ImportError:
+            return None
+        numpy = module
+        _floor, _maximum, _minimum, _where = module.floor, module.maximum, module.minimum, module.where
+    return numpy
+
+
+def _compute(func, *columns):
+    """Применение функции к столбцам: целиком для numpy, поэлементно без него"""
+    if numpy is not None:
+        return func(*columns)
+    return [func(*values) for values in zip(*columns)]
+
+
+def numeric_value(value):
+    """Значение поля как число или None, если поле не числовое"""
+    if type(value) is str:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return value
+
+
+def is_integer_value(value):
+    """Записано ли поле целым числом (результат тогда тоже округляется до целого)"""
+    return type(value) is int or (type(value) is str and value.lstrip('-').isdigit())
+
+
+class PriceColumns:
+    """Столбцы числовых полей выбранных товаров"""
+
+    def __init__(self, selection):
+        load_numpy()
+        selection = list(selection)
+        self.locations = [(category_index, product_index) for category_index, product_index, _ in selection]
+        self.products = [product for _, _, product in selection]
+        self.raw = {field: [getattr(product, attribute) for product in self.products]
+                    for field, attribute in PRICING_FIELDS.items()}
+
+        # Поля, записанные в файле нестандартно, хранятся строкой: такие
+        # значения разбираются отдельно, нечисловые товары пропускаются
+        if any(str in map(type, column) for column in self.raw.values()):
+            rows = [row for row in range(len(self.products))
+                    if all(numeric_value(column[row]) is not None for column in self.raw.values())]
+            self.locations = [self.locations[row] for row in rows]
+            self.products = [self.products[row] for row in rows]
+            self.raw = {field: [column[row] for row in rows] for field, column in self.raw.items()}
+            values = {field: [numeric_value(value) for value in column] for field, column in self.raw.items()}
+            integer = {field: [is_integer_value(value) for value in column] for field, column in self.raw.items()}
+        else:
+            values = self.raw
+            integer = {field: [type(value) is int for value in column] for field, column in self.raw.items()}
+
+        if numpy is not None:
+            values = {field: numpy.array(column, dtype=numpy.float64) for field, column in values.items()}
+            integer = {field: numpy.array(column, dtype=bool) for field, column in integer.items()}
+        else:
+            values = {field: list(column) for field, column in values.items()}
+        self.columns = values
+        self.integer = integer
+        self.original = dict(self.columns)
+
+    def __len__(self):
+        return len(self.products)
+
+    def _update(self, field, func, source=None):
+        """Новое значение столбца там, где исходные значения неотрицательны.
+
+        Поля, записанные целыми числами, сразу округляются, чтобы следующая
+        операция работала с теми же значениями, что попадут в файл.
+        """
+        if source is None:
+            def masked(current, is_integer):
+                value = func(current)
+                return _where(current >= 0, _where(is_integer, _floor(value + 0.5), value), current)
+            self.columns[field] = _compute(masked, self.columns[field], self.integer[field])
+        else:
+            def masked(current, is_integer, base):
+                value = func(base)
+                return _where((current >= 0) & (base >= 0), _where(is_integer, _floor(value + 0.5), value), current)
+            self.columns[field] = _compute(masked, self.columns[field], self.integer[field], self.columns[source])
+
+    def scale(self, field, factor):
+        """Умножение значений на коэффициент"""
+        self._update(field, lambda value: value * factor)
+
+    def markup(self, field, percent):
+        """Наценка в процентах (отрицательная - скидка)"""
+        self.scale(field, 1 + percent / 100.0)
+
+    def ratio(self, field, source, ratio):
+        """Значение как доля другого поля, например цена продажи = 0.5 * цены покупки"""
+        self._update(field, lambda value: value * ratio, source)
+
+    def round(self, field, step):
+        """Округление до шага (например до 10)"""
+        if step <= 0:
+            raise ValueError("Шаг округления должен быть больше нуля")
+        self._update(field, lambda value: _floor(value / step + 0.5) * step)
+
+    def clamp(self, field, low=None, high=None):
+        """Ограничение значений снизу и/или сверху"""
+        low = -math.inf if low is None else low
+        high = math.inf if high is None else high
+        if low > high:
+            raise ValueError("Нижняя граница больше верхней")
+        self._update(field, lambda value: _minimum(_maximum(value, low), high))
+
+    def apply(self, operation):
+        """Выполнение операции вида ('markup', 'buy', 15)"""
+        name, *arguments = operation
+        if name not in OPERATIONS:
+            raise ValueError(f"Неизвестная операция: {name}")
+        getattr(self, name)(*arguments)
+
+    def _changed_rows(self, field):
+        new, old = self.columns[field], self.original[field]
+        if numpy is not None:
+            rows = numpy.flatnonzero(new != old)
+            return rows.tolist(), new[rows].tolist(), self.integer[field][rows].tolist()
+        rows = [row for row in range(len(new)) if new[row] != old[row]]
+        integer = self.integer[field]
+        return rows, [new[row] for row in rows], [integer[row] for row in rows]
+
+    def changes(self):
+        """Измененные товары: список (индекс категории, индекс товара, новый товар)"""
+        columns = {}
+        changed = set()
+        for field in PRICING_FIELDS:
+            if self.columns[field] is self.original[field]:
+                columns[field] = self.raw[field]
+                continue
+            rows, values, integer = self._changed_rows(field)
+            column = columns[field] = list(self.raw[field])
+            # math.floor дает int, numpy.floor - float: дробные поля приводятся
+            # к float, чтобы файл не зависел от того, установлен ли numpy
+            for row, value, is_integer in zip(rows, values, integer):
+                column[row] = int(value) if is_integer else float(round(value, 6))
+            changed.update(rows)
+
+        buy, sell, coefficient, maxstock = (columns[field] for field in PRICING_FIELDS)
+        result = []
+        for row in sorted(changed):
+            product = self.products[row]
+            category_index, product_index = self.locations[row]
+            result.append((category_index, product_index,
+                           Product(product.classname, coefficient[row], maxstock[row], product.quantity,
+                                   buy[row], sell[row], product.tail)))
+        return result
+
+
+def plan_pricing(selection, operations):
+    """Расчет изменений без записи в документ"""
+    columns = PriceColumns(selection)
+    for operation in operations:
+        columns.apply(operation)
+    return columns.changes()
+
+
+def apply_pricing(document, selection, operations):
+    """Выполнение операций над выбранными товарами одним изменением документа.
+
+    selection - товары в виде (индекс категории, индекс товара, товар),
+    operations - список операций вида ('markup', 'buy', 15).
+    Возвращает количество измененных товаров.
+    """
+    changes = plan_pricing(selection, operations)
+    if changes:
+        document.set_products(changes, "Массовое изменение цен")
+    return len(changes)
+
+
+def plan_set(selection, attribute, value):
+    """Установка поля товаров одним значением без записи в документ.
+
+    В отличие от операций меняются и отрицательные значения; возвращается
+    список (индекс категории, индекс товара, новый товар) только для товаров,
+    где значение действительно другое.
+    """
+    return [(category_index, product_index, product.replace(**{attribute: value}))
+            for category_index, product_index, product in selection
+            if product.is_valid and getattr(product, attribute) != value]
+
+
+def category_selection(document, category_indexes):
+    """Все товары указанных категорий в формате selection"""
+    for category_index in category_indexes:
+        for product_index, product in enumerate(document.products(category_index)):
+            if product.is_valid:
+                yield category_index, product_index, product
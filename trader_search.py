@@ -0,0 +1,98 @@
+"""Поисковый индекс для быстрого поиска подстроки в класснеймах и названиях категорий."""
+
+
+def trigrams(text):
+    """Множество триграмм строки"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """Триграммный индекс строковых ключей.
+
+    Для запроса из трех и более символов кандидаты находятся пересечением
+    списков триграмм, после чего проверяются обычным вхождением подстроки.
+    Более короткие запросы проверяются по всем ключам (их обычно намного
+    меньше, чем товаров, так как одинаковые класснеймы хранятся один раз).
+    Списки триграмм строятся при первом поиске, чтобы не замедлять загрузку.
+    """
+
+    def __init__(self):
+        self._postings = None
+        self._keys = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def add(self, key):
+        """Добавление ключа в индекс"""
+        if key in self._keys:
+            return
+        text = key.lower()
+        self._keys[key] = text
+        if self._postings is not None:
+            for gram in trigrams(text):
+                self._postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        """Удаление ключа из индекса"""
+        text = self._keys.pop(key, None)
+        if text is None or self._postings is None:
+            return
+        for gram in trigrams(text):
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+
+    def query(self, substring):
+        """Ключи, содержащие подстроку (без учета регистра)"""
+        substring = substring.lower()
+        if len(substring) < 3:
+            return [key for key, text in self._keys.items() if substring in text]
+
+        if self._postings is None:
+            self._build()
+
+        postings = []
+        for gram in trigrams(substring):
+            keys = self._postings.get(gram)
+            if not keys:
+                return []
+            postings.append(keys)
+        postings.sort(key=len)
+
+        candidates = postings[0]
+        for keys in postings[1:]:
+            candidates = candidates & keys
+            if not candidates:
+                return []
+        return [key for key in candidates if substring in self._keys[key]]
+
+
+    def _build(self):
+        self._postings = {}
+        for key, text in self._keys.items():
+            for gram in trigrams(text):
+                self._postings.setdefault(gram, set()).add(key)
+
+
+def is_numeric_query(text):
+    """Может ли запрос совпасть с числовыми полями товара, а не только с класснеймом.
+
+    Запрос с запятой захватывает границу полей. Иначе запрос должен разбираться
+    как число (1e-05, -1 или начало дробного 25.) и содержать цифру, поэтому
+    "-" и "." без цифр ищутся только в класснеймах.
+    """
+    if ',' in text:
+        return True
+    if not any(char in '0123456789' for char in text):
+        return False
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
@@ -0,0 +1,777 @@
+"""Хранение товаров TraderPlusPriceConfig.json в разобранном виде.
+
+Строки товаров "classname,coef,maxstock,qty,buy,sell" разбираются один раз
+(при загрузке файла или, в отложенном режиме, при первом обращении к категории)
+и превращаются обратно в строки только при сохранении.
+"""
+
+import sys
+from contextlib import contextmanager
+
+from trader_history import History
+from trader_perf import timed
+from trader_search import TrigramIndex, is_numeric_query
+
+
+def parse_number(text):
+    """Разбор числового поля товара.
+
+    Число возвращается только если при обратном форматировании получится
+    та же самая строка, иначе поле хранится строкой как есть - так при
+    сохранении файл не меняется.
+    """
+    try:
+        value = int(text)
+        if str(value) == text:
+            return value
+    except ValueError:
+        pass
+    try:
+        value = float(text)
+        if repr(value) == text:
+            return value
+    except ValueError:
+        pass
+    return text
+
+
+def format_number(value):
+    """Форматирование числового поля товара обратно в текст"""
+    if isinstance(value, str):
+        return value
+    return repr(value)
+
+
+class Product:
+    """Товар категории.
+
+    Записи не изменяются на месте: правка создает новый объект через replace(),
+    поэтому на один и тот же объект можно безопасно ссылаться из разных мест.
+    """
+
+    __slots__ = ('classname', 'coefficient', 'maxstock', 'quantity', 'buy_price', 'sell_price', 'tail')
+
+    FIELDS = ('classname', 'coefficient', 'maxstock', 'quantity', 'buy_price', 'sell_price')
+
+    def __init__(self, classname, coefficient, maxstock, quantity, buy_price, sell_price, tail=None):
+        self.classname = classname
+        self.coefficient = coefficient
+        self.maxstock = maxstock
+        self.quantity = quantity
+        self.buy_price = buy_price
+        self.sell_price = sell_price
+        # Лишние поля после шестого (хвост строки без изменений)
+        self.tail = tail
+
+    @classmethod
+    def from_csv(cls, text):
+        """Разбор строки товара из файла конфигурации"""
+        parts = text.split(',')
+        if len(parts) < 6:
+            # Некорректная строка сохраняется целиком в classname
+            return cls(text, None, None, None, None, None)
+        tail = ','.join(parts[6:]) if len(parts) > 6 else None
+        # Одинаковые класснеймы из разных категорий хранятся одной строкой
+        return cls(sys.intern(parts[0]), parse_number(parts[1]), parse_number(parts[2]),
+                   parse_number(parts[3]), parse_number(parts[4]), parse_number(parts[5]), tail)
+
+    @property
+    def is_valid(self):
+        """Содержит ли строка все шесть полей"""
+        return self.coefficient is not None
+
+    def fields(self):
+        """Шесть полей товара в текстовом виде"""
+        return [self.classname, format_number(self.coefficient), format_number(self.maxstock),
+                format_number(self.quantity), format_number(self.buy_price), format_number(self.sell_price)]
+
+    def to_csv(self):
+        """Строка товара в формате файла конфигурации"""
+        if self.coefficient is None:
+            return self.classname
+        text = ','.join(self.fields())
+        if self.tail is not None:
+            text += ',' + self.tail
+        return text
+
+    def search_text(self):
+        """Текст для поиска по всем полям товара"""
+        return self.to_csv().lower()
+
+    def replace(self, **changes):
+        """Копия товара с измененными полями"""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return Product(**values)
+
+    def __repr__(self):
+        return f"Product({self.to_csv()!r})"
+
+
+def product_matches(product, search_text, numeric=None):
+    """Совпадение товара с поисковым запросом (в нижнем регистре).
+
+    Запрос, который не может быть числом, совпадает только с класснеймом,
+    поэтому числовые поля проверяются лишь для "числовых" запросов.
+    numeric - заранее вычисленный is_numeric_query(search_text) для цикла по товарам.
+    """
+    if not product.is_valid:
+        return False
+    if numeric is None:
+        numeric = is_numeric_query(search_text)
+    if numeric:
+        return search_text in product.search_text()
+    return search_text in product.classname.lower()
+
+
+def decode_products(config_data):
+    """Разбор строк товаров всех категорий на месте"""
+    for category in config_data.get('TraderCategories', []):
+        category['Products'] = [Product.from_csv(product) for product in category['Products']]
+    return config_data
+
+
+def is_raw_products(products):
+    """Список товаров еще не разобран (строки из файла)"""
+    return bool(products) and type(products[0]) is str
+
+
+def raw_products_match(products, search_text):
+    """Может ли запрос совпасть с каким-либо товаром неразобранной категории.
+
+    Проверка грубая (по всей строке товара): лишнее совпадение только
+    приводит к разбору категории, а точный поиск идет уже по индексам.
+    """
+    return search_text.lower() in '\n'.join(products).lower()
+
+
+def json_default(obj):
+    """Обработчик json.dump для объектов товаров"""
+    if isinstance(obj, Product):
+        return obj.to_csv()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+RECORD_KEYS = {"price": 'TraderCategories', "general": 'Traders', "ids": 'IDs'}
+
+# Шаги документа над ключами верхнего уровня (Version, EnableAutoCalculation и т.п.)
+HEADER_STEPS = ('set_header', 'delete_header', 'insert_header')
+
+
+@timed('detect_file_type')
+def detect_file_type(config_data):
+    """Определение типа файла конфигурации по ключам верхнего уровня"""
+    if 'TraderCategories' in config_data:
+        return "price"
+    elif 'Traders' in config_data:
+        return "general"
+    elif 'IDs' in config_data:
+        return "ids"
+    return "unknown"
+
+
+def _remove_identity(items, obj):
+    """Удаление из списка именно этого объекта (без сравнения по значению)"""
+    for i, item in enumerate(items):
+        if item is obj:
+            del items[i]
+            return
+
+
+class _Positions:
+    """Ленивая карта объект -> позиция в списке.
+
+    Строится при первом запросе, сбрасывается при удалении из середины списка.
+    """
+
+    def __init__(self, items):
+        self.items = items
+        self._map = None
+
+    def index(self, obj):
+        if self._map is None:
+            self._map = {id(item): i for i, item in enumerate(self.items)}
+        return self._map.get(id(obj))
+
+    def appended(self, obj):
+        if self._map is not None:
+            self._map[id(obj)] = len(self.items) - 1
+
+    def replaced(self, old, new, position):
+        if self._map is not None:
+            self._map.pop(id(old), None)
+            self._map[id(new)] = position
+
+    def invalidate(self):
+        self._map = None
+
+
+class ConfigDocument:
+    """Загруженный файл конфигурации TraderPlus с хеш-индексами.
+
+    Все изменения записей проходят через методы документа, которые
+    поддерживают индексы в актуальном состоянии:
+    название категории, класснейм товара, Id и GivenName торговца, Id записи IDs,
+    а также триграммные индексы названий категорий и класснеймов для поиска.
+    При lazy=True товары категорий остаются строками из файла до первого
+    обращения к категории через products()/category_products() или до
+    совпадения с поисковым запросом; индексы товаров строятся при разборе.
+    Каждое изменение записывается в историю (history) для отмены и повтора
+    и передается слушателям (listeners): их метод on_step() получает каждый
+    шаг вместе с обратным ему (в нем прежнее значение измененной записи),
+    on_commit() вызывается по окончании правки или группы правок.
+    """
+
+    STEP_LABELS = {
+        'add_record': "Добавление записи",
+        'insert_record': "Добавление записи",
+        'set_record': "Изменение записи",
+        'delete_record': "Удаление записи",
+        'set_product': "Изменение товара",
+        'add_product': "Добавление товара",
+        'insert_product': "Добавление товара",
+        'delete_product': "Удаление товара",
+        'set_header': "Изменение параметра файла",
+        'delete_header': "Удаление параметра файла",
+        'insert_header': "Добавление параметра файла",
+    }
+
+    def __init__(self, config_data=None, lazy=False):
+        self.lazy = lazy
+        self.history = History()
+        self.listeners = []
+        self._replaying = False
+        self._loading = False
+        self._batch_depth = 0
+        self.load(config_data if config_data is not None else {})
+
+    def load(self, config_data):
+        """Подключение данных конфига и построение индексов"""
+        self.history.clear()
+        self.data = config_data
+        self.file_type = detect_file_type(config_data)
+        if self.file_type == "price" and not self.lazy:
+            decode_products(config_data)
+        self.rebuild_index()
+
+    def records(self):
+        """Список записей текущего типа файла"""
+        key = RECORD_KEYS.get(self.file_type)
+        if key is None:
+            return []
+        return self.data.get(key, [])
+
+    def record(self, row):
+        """Запись по индексу"""
+        return self.records()[row]
+
+    def products(self, category_index):
+        """Список товаров категории (неразобранная категория разбирается)"""
+        return self.category_products(self.records()[category_index])
+
+    def category_products(self, category):
+        """Список товаров записи категории (неразобранная категория разбирается)"""
+        if id(category) in self._undecoded:
+            self.decode_category(category)
+        return category['Products']
+
+    # --- Отложенный разбор товаров ---
+
+    def is_decoded(self, category):
+        """Разобраны ли товары категории"""
+        return id(category) not in self._undecoded
+
+    def decoded_count(self):
+        """Количество разобранных категорий"""
+        return len(self.records()) - len(self._undecoded)
+
+    def decode_category(self, category):
+        """Разбор товаров категории и добавление их в индексы"""
+        if self._undecoded.pop(id(category), None) is None:
+            return
+        category['Products'] = [Product.from_csv(product) for product in category['Products']]
+        self._product_positions.pop(id(category), None)
+        for product in category['Products']:
+            self._index_product(category, product)
+
+    def decode_matching(self, search_text, categories=None):
+        """Разбор неразобранных категорий, товары которых могут совпасть с запросом"""
+        if categories is None:
+            categories = list(self._undecoded.values())
+        count = 0
+        for category in categories:
+            if id(category) in self._undecoded and raw_products_match(category['Products'], search_text):
+                self.decode_category(category)
+                count += 1
+        return count
+
+    def decode_classname(self, classname):
+        """Разбор неразобранных категорий, в которых есть товар с этим класснеймом.
+
+        Категории находятся по индексу класснеймов неразобранных строк: он
+        строится при первом вызове и дальше только дополняется.
+        """
+        if ',' in classname:
+            # Так хранится только некорректная строка товара целиком
+            categories = [category for category in self._undecoded.values() if classname in category['Products']]
+        else:
+            if self._raw_classnames is None:
+                self._raw_classnames = {}
+                for category in self._undecoded.values():
+                    self._index_raw_classnames(category)
+            categories = self._raw_classnames.pop(classname, ())
+        count = 0
+        for category in categories:
+            # Уже разобранные или удаленные категории остаются в списке до запроса
+            if self._undecoded.get(id(category)) is category:
+                self.decode_category(category)
+                count += 1
+        return count
+
+    def _index_raw_classnames(self, category):
+        raw_classnames = self._raw_classnames
+        # Текст до первой запятой; для некорректной строки это может быть лишний
+        # ключ, который приведет только к лишнему разбору категории
+        for classname in {text.partition(',')[0] for text in category['Products']}:
+            raw_classnames.setdefault(classname, []).append(category)
+
+    def decode_all(self):
+        """Разбор всех категорий"""
+        for category in list(self._undecoded.values()):
+            self.decode_category(category)
+
+    # --- Индексы ---
+
+    def rebuild_index(self):
+        """Полное построение индексов (только при загрузке)"""
+        self.categories_by_name = {}
+        self.product_locations = {}
+        self.traders_by_id = {}
+        self.traders_by_name = {}
+        self.ids_by_id = {}
+        self.category_name_index = TrigramIndex()
+        self.classname_index = TrigramIndex()
+        self._record_positions = _Positions(self.records())
+        self._product_positions = {}
+        self._undecoded = {}
+        self._raw_classnames = None
+        for record in self.records():
+            self._index_record(record)
+
+    def _index_record(self, record):
+        if self.file_type == "price":
+            self.categories_by_name.setdefault(record['CategoryName'], []).append(record)
+            self.category_name_index.add(record['CategoryName'])
+            if is_raw_products(record['Products']):
+                self._undecoded[id(record)] = record
+                if self._raw_classnames is not None:
+                    self._index_raw_classnames(record)
+                return
+            for product in record['Products']:
+                self._index_product(record, product)
+        elif self.file_type == "general":
+            self.traders_by_id.setdefault(record.get('Id'), []).append(record)
+            self.traders_by_name.setdefault(record.get('GivenName', ''), []).append(record)
+        elif self.file_type == "ids":
+            self.ids_by_id.setdefault(record.get('Id'), []).append(record)
+
+    def _unindex_record(self, record):
+        if self.file_type == "price":
+            self._multimap_remove(self.categories_by_name, record['CategoryName'], record)
+            if record['CategoryName'] not in self.categories_by_name:
+                self.category_name_index.remove(record['CategoryName'])
+            if self._undecoded.pop(id(record), None) is not None:
+                return
+            for product in record['Products']:
+                self._unindex_product(product)
+            self._product_positions.pop(id(record), None)
+        elif self.file_type == "general":
+            self._multimap_remove(self.traders_by_id, record.get('Id'), record)
+            self._multimap_remove(self.traders_by_name, record.get('GivenName', ''), record)
+        elif self.file_type == "ids":
+            self._multimap_remove(self.ids_by_id, record.get('Id'), record)
+
+    def _index_product(self, category, product):
+        locations = self.product_locations.get(product.classname)
+        if locations is None:
+            locations = self.product_locations[product.classname] = []
+            if product.is_valid:
+                self.classname_index.add(product.classname)
+        locations.append((category, product))
+
+    def _unindex_product(self, product):
+        locations = self.product_locations.get(product.classname)
+        if locations is None:
+            return
+        for i, (_, indexed) in enumerate(locations):
+            if indexed is product:
+                del locations[i]
+                break
+        if not locations:
+            del self.product_locations[product.classname]
+            self.classname_index.remove(product.classname)
+
+    @staticmethod
+    def _multimap_remove(mapping, key, record):
+        records = mapping.get(key)
+        if records is None:
+            return
+        _remove_identity(records, record)
+        if not records:
+            del mapping[key]
+
+    def _positions_in(self, category):
+        positions = self._product_positions.get(id(category))
+        if positions is None:
+            positions = self._product_positions[id(category)] = _Positions(category['Products'])
+        return positions
+
+    # --- Поиск по индексам ---
+
+    def find_category(self, name):
+        """Индекс категории по названию или None"""
+        categories = self.categories_by_name.get(name)
+        if not categories:
+            return None
+        return self._record_positions.index(categories[0])
+
+    def find_products(self, classname):
+        """Все места товара: список пар (индекс категории, индекс товара)"""
+        if self._undecoded:
+            self.decode_classname(classname)
+        result = []
+        for category, product in self.product_locations.get(classname, []):
+            result.append((self._record_positions.index(category),
+                           self._positions_in(category).index(product)))
+        return result
+
+    def find_product_in_category(self, category_index, classname):
+        """Индекс товара в категории по класснейму или None"""
+        category = self.records()[category_index]
+        self.category_products(category)
+        for owner, product in self.product_locations.get(classname, []):
+            if owner is category:
+                return self._positions_in(category).index(product)
+        return None
+
+    def product_position(self, category, product):
+        """Индекс товара внутри своей категории"""
+        return self._positions_in(category).index(product)
+
+    def record_position(self, record):
+        """Индекс записи в списке или None, если записи в документе нет"""
+        return self._record_positions.index(record)
+
+    def search_categories(self, search_text):
+        """Категории, в названии которых есть подстрока"""
+        result = []
+        for name in self.category_name_index.query(search_text):
+            result.extend(self.categories_by_name[name])
+        return result
+
+    def search_products(self, search_text):
+        """Товары, в строке которых есть подстрока: список пар (категория, товар).
+
+        Класснеймы ищутся по триграммному индексу. Запрос, который может
+        совпасть с числовыми полями, проверяется по всем товарам.
+        Неразобранные категории, в строках которых есть запрос, разбираются.
+        """
+        self.decode_matching(search_text)
+        result = []
+        for pairs in self.iter_matching_products(search_text):
+            result.extend(pairs)
+        return result
+
+    def undecoded_categories(self):
+        """Категории, товары которых еще хранятся строками"""
+        return list(self._undecoded.values())
+
+    def iter_matching_products(self, search_text):
+        """Найденные товары разобранных категорий порциями: списки пар (категория, товар).
+
+        Порция - одна категория (числовой запрос) или один класснейм, поэтому
+        вызывающий код может прерывать поиск между порциями.
+        """
+        if is_numeric_query(search_text):
+            for category in self.records():
+                if id(category) not in self._undecoded:
+                    yield [(category, product) for product in category['Products']
+                           if product_matches(product, search_text, True)]
+            return
+        for classname in self.classname_index.query(search_text):
+            yield self.product_locations[classname]
+
+    def find_trader(self, trader_id=None, given_name=None):
+        """Индекс торговца по Id или отображаемому имени"""
+        if trader_id is not None:
+            traders = self.traders_by_id.get(trader_id)
+        else:
+            traders = self.traders_by_name.get(given_name)
+        if not traders:
+            return None
+        return self._record_positions.index(traders[0])
+
+    def find_id(self, trader_id):
+        """Индекс записи IDs по Id торговца или None"""
+        entries = self.ids_by_id.get(trader_id)
+        if not entries:
+            return None
+        return self._record_positions.index(entries[0])
+
+    # --- История правок ---
+
+    def _record(self, redo_step, undo_step):
+        if self._loading:
+            return
+        if not self._replaying:
+            self.history.record(self.STEP_LABELS[redo_step[0]], redo_step, undo_step)
+        for listener in self.listeners:
+            listener.on_step(redo_step, undo_step)
+        if not self._batch_depth:
+            self._commit()
+
+    def _commit(self):
+        for listener in self.listeners:
+            listener.on_commit()
+
+    @contextmanager
+    def _batch(self):
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._commit()
+
+    @contextmanager
+    def transaction(self, label):
+        """Группа изменений, которая отменяется одним действием"""
+        self.history.begin(label)
+        try:
+            with self._batch():
+                yield
+        finally:
+            self.history.end()
+
+    def apply_steps(self, steps, label, apply=None):
+        """Выполнение готовых шагов одной правкой (например, из журнала)"""
+        with self.transaction(label):
+            for method, args in steps:
+                (apply or self.apply_step)(method, args)
+
+    def apply_step(self, method, args):
+        """Выполнение шага истории"""
+        return getattr(self, method)(*args)
+
+    def _replay(self, steps, apply):
+        self._replaying = True
+        try:
+            with self._batch():
+                for method, args in steps:
+                    apply(method, args)
+        finally:
+            self._replaying = False
+
+    def undo(self, apply=None):
+        """Отмена последней правки, возвращает ее (или None).
+
+        apply - функция выполнения шага (method, args); по умолчанию apply_step,
+        интерфейс передает свою, чтобы заодно оповестить представление.
+        """
+        if not self.history.can_undo():
+            return None
+        transaction = self.history.take_undo()
+        self._replay(reversed(transaction.undo_steps), apply or self.apply_step)
+        return transaction
+
+    def redo(self, apply=None):
+        """Повтор отмененной правки, возвращает ее (или None)"""
+        if not self.history.can_redo():
+            return None
+        transaction = self.history.take_redo()
+        self._replay(transaction.redo_steps, apply or self.apply_step)
+        return transaction
+
+    # --- Изменения записей ---
+
+    def add_record(self, record):
+        """Добавление категории/торговца/ID в конец списка, возвращает индекс"""
+        records = self.data.setdefault(RECORD_KEYS[self.file_type], [])
+        if self._record_positions.items is not records:
+            self._record_positions = _Positions(records)
+        records.append(record)
+        self._record_positions.appended(record)
+        self._index_record(record)
+        self._record(('add_record', (record,)), ('delete_record', (len(records) - 1,)))
+        return len(records) - 1
+
+    def extend_records(self, records):
+        """Добавление порции записей в конец списка при загрузке файла (не попадает в историю)"""
+        self._loading = True
+        try:
+            for record in records:
+                self.add_record(record)
+        finally:
+            self._loading = False
+
+    def insert_record(self, row, record):
+        """Вставка записи по индексу"""
+        records = self.data.setdefault(RECORD_KEYS[self.file_type], [])
+        if self._record_positions.items is not records:
+            self._record_positions = _Positions(records)
+        records.insert(row, record)
+        self._record_positions.invalidate()
+        self._index_record(record)
+        self._record(('insert_record', (row, record)), ('delete_record', (row,)))
+
+    def set_record(self, row, record):
+        """Замена записи по индексу"""
+        records = self.records()
+        old = records[row]
+        self._unindex_record(old)
+        records[row] = record
+        self._record_positions.replaced(old, record, row)
+        self._index_record(record)
+        self._record(('set_record', (row, record)), ('set_record', (row, old)))
+
+    def delete_record(self, row):
+        """Удаление записи по индексу"""
+        records = self.records()
+        old = records[row]
+        self._unindex_record(old)
+        del records[row]
+        self._record_positions.invalidate()
+        self._record(('delete_record', (row,)), ('insert_record', (row, old)))
+
+    def set_product(self, category_index, product_index, product):
+        """Замена товара в категории"""
+        category = self.records()[category_index]
+        old = self.category_products(category)[product_index]
+        category['Products'][product_index] = product
+        self._positions_in(category).replaced(old, product, product_index)
+        if old.classname == product.classname and old.is_valid == product.is_valid:
+            # Класснейм не изменился: достаточно заменить товар в списке мест
+            locations = self.product_locations[product.classname]
+            for i, (_, indexed) in enumerate(locations):
+                if indexed is old:
+                    locations[i] = (category, product)
+                    break
+        else:
+            self._unindex_product(old)
+            self._index_product(category, product)
+        self._record(('set_product', (category_index, product_index, product)),
+                     ('set_product', (category_index, product_index, old)))
+
+    def set_products(self, changes, label="Изменение товаров"):
+        """Замена нескольких товаров одним изменением: список (индекс категории, индекс товара, товар)"""
+        with self.transaction(label):
+            for category_index, product_index, product in changes:
+                self.set_product(category_index, product_index, product)
+
+    def delete_products(self, category_index, product_indexes, label="Удаление товаров"):
+        """Удаление нескольких товаров категории одним изменением, возвращает количество"""
+        product_indexes = sorted(set(product_indexes), reverse=True)
+        with self.transaction(label):
+            # С конца списка: индексы еще не удаленных товаров не сдвигаются
+            for product_index in product_indexes:
+                self.delete_product(category_index, product_index)
+        return len(product_indexes)
+
+    def transfer_products(self, source_index, product_indexes, target_index, move=False, skip_duplicates=True):
+        """Копирование или перемещение товаров в другую категорию одним изменением.
+
+        Товары задаются индексами в исходной категории. При skip_duplicates
+        товары, класснейм которых уже есть в целевой категории (или среди
+        перенесенных раньше), пропускаются и при перемещении остаются на месте;
+        проверка - по множеству класснеймов целевой категории. Возвращает
+        (индексы перенесенных товаров, индексы пропущенных).
+        """
+        if source_index == target_index:
+            raise ValueError("Исходная и целевая категории совпадают")
+        products = self.products(source_index)
+        present = None
+        if skip_duplicates:
+            present = {product.classname for product in self.products(target_index) if product.is_valid}
+        transferred, skipped = [], []
+        for product_index in sorted(set(product_indexes)):
+            product = products[product_index]
+            if present is not None and product.is_valid:
+                if product.classname in present:
+                    skipped.append(product_index)
+                    continue
+                present.add(product.classname)
+            transferred.append(product_index)
+        if not transferred:
+            return transferred, skipped
+
+        selected = [products[product_index] for product_index in transferred]
+        with self.transaction("Перемещение товаров" if move else "Копирование товаров"):
+            if move:
+                for product_index in reversed(transferred):
+                    self.delete_product(source_index, product_index)
+            for product in selected:
+                # Копия - отдельный объект: индексы различают товары по идентичности
+                self.add_product(target_index, product if move else product.replace())
+        return transferred, skipped
+
+    def add_product(self, category_index, product):
+        """Добавление товара в конец категории, возвращает индекс"""
+        category = self.records()[category_index]
+        self.category_products(category).append(product)
+        self._positions_in(category).appended(product)
+        self._index_product(category, product)
+        product_index = len(category['Products']) - 1
+        self._record(('add_product', (category_index, product)), ('delete_product', (category_index, product_index)))
+        return product_index
+
+    def insert_product(self, category_index, product_index, product):
+        """Вставка товара в категорию по индексу"""
+        category = self.records()[category_index]
+        self.category_products(category).insert(product_index, product)
+        self._positions_in(category).invalidate()
+        self._index_product(category, product)
+        self._record(('insert_product', (category_index, product_index, product)),
+                     ('delete_product', (category_index, product_index)))
+
+    def delete_product(self, category_index, product_index):
+        """Удаление товара из категории"""
+        category = self.records()[category_index]
+        old = self.category_products(category)[product_index]
+        self._unindex_product(old)
+        del category['Products'][product_index]
+        self._positions_in(category).invalidate()
+        self._record(('delete_product', (category_index, product_index)),
+                     ('insert_product', (category_index, product_index, old)))
+
+    # --- Ключи верхнего уровня ---
+
+    def _check_header_key(self, key):
+        if key == RECORD_KEYS.get(self.file_type):
+            raise ValueError(f"{key} - список записей, а не параметр файла")
+
+    def set_header(self, key, value):
+        """Значение ключа верхнего уровня; новый ключ добавляется в конец"""
+        self._check_header_key(key)
+        if key in self.data:
+            undo_step = ('set_header', (key, self.data[key]))
+        else:
+            undo_step = ('delete_header', (key,))
+        self.data[key] = value
+        self._record(('set_header', (key, value)), undo_step)
+
+    def delete_header(self, key):
+        """Удаление ключа верхнего уровня"""
+        self._check_header_key(key)
+        position = list(self.data).index(key)
+        old = self.data.pop(key)
+        self._record(('delete_header', (key,)), ('insert_header', (position, key, old)))
+
+    def insert_header(self, position, key, value):
+        """Вставка ключа верхнего уровня на место (отмена удаления сохраняет порядок ключей в файле)"""
+        self._check_header_key(key)
+        items = list(self.data.items())
+        items.insert(position, (key, value))
+        self.data.clear()
+        self.data.update(items)
+        self._record(('insert_header', (position, key, value)), ('delete_header', (key,)))
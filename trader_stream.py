@@ -0,0 +1,173 @@
+"""Потоковый разбор файла конфигурации TraderPlus через mmap.
+
+Файл отображается в память и просматривается регулярными выражениями:
+границы каждого элемента списка записей (TraderCategories, Traders или IDs)
+находятся по скобкам вне строк, и элемент разбирается кодеком отдельно.
+Поэтому весь файл никогда не находится в памяти ни текстом, ни объектами
+Python целиком, а записи можно показывать по мере разбора.
+"""
+
+import mmap
+import re
+
+from trader_io import get_codec
+from trader_store import RECORD_KEYS
+
+# Ключ списка записей -> тип файла (как в detect_file_type)
+RECORD_TYPES = {key: file_type for file_type, key in RECORD_KEYS.items()}
+
+_WHITESPACE = re.compile(rb'[ \t\r\n]*')
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+_SCALAR = re.compile(rb'[^,}\][ \t\r\n]+')
+# Все до ближайшей скобки вне строки JSON; группа - сама скобка
+_BRACKET = re.compile(rb'(?:[^"\[\]{}]|"[^"\\]*(?:\\.[^"\\]*)*")*([\[\]{}])')
+
+_BOM = b'\xef\xbb\xbf'
+
+
+class ConfigStream:
+    """Потоковое чтение файла конфигурации.
+
+    Перебор выдает записи основного списка по одной. Тип файла (file_type)
+    становится известен, как только встречается ключ списка записей; значения
+    остальных ключей верхнего уровня собираются в header в порядке файла.
+    position - сколько байт файла уже разобрано (для индикатора прогресса).
+    """
+
+    def __init__(self, path, codec=None):
+        self.path = path
+        self.codec = codec or get_codec()
+        self.file_type = "unknown"
+        self.record_key = None
+        self.header = {}
+        self.size = 0
+        self.position = 0
+        self._data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def open(self):
+        with open(self.path, 'rb') as f:
+            self.size = f.seek(0, 2)
+            if self.size == 0:
+                raise ValueError("Файл пуст")
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        """Освобождение отображения файла (пока оно открыто, файл нельзя заменить в Windows)"""
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+
+    def __iter__(self):
+        if self._data is None:
+            self.open()
+        try:
+            yield from self._parse()
+        finally:
+            self.close()
+
+    # --- Разбор ---
+
+    def _skip(self, position):
+        return _WHITESPACE.match(self._data, position).end()
+
+    def _expect(self, position, chars):
+        char = self._data[position:position + 1]
+        if not char or char not in chars:
+            found = char.decode('latin-1') if char else "конец файла"
+            raise ValueError(f"Ошибка JSON в позиции {position}: ожидалось {chars.decode()}, найдено {found!r}")
+        return char
+
+    def _value_end(self, position):
+        """Позиция сразу после значения JSON, начинающегося в position"""
+        data = self._data
+        char = data[position:position + 1]
+        if char == b'"':
+            match = _STRING.match(data, position)
+        elif char in (b'{', b'['):
+            depth = 0
+            while True:
+                match = _BRACKET.match(data, position)
+                if match is None:
+                    break
+                position = match.end()
+                depth += 1 if match.group(1) in (b'{', b'[') else -1
+                if depth == 0:
+                    return position
+        else:
+            match = _SCALAR.match(data, position)
+        if match is None:
+            raise ValueError(f"Ошибка JSON в позиции {position}: незавершенное значение")
+        return match.end()
+
+    def _load(self, start, end):
+        return self.codec.loads(self._data[start:end])
+
+    def _parse(self):
+        data = self._data
+        position = self._skip(len(_BOM) if data[:len(_BOM)] == _BOM else 0)
+        self._expect(position, b'{')
+        position = self._skip(position + 1)
+        if data[position:position + 1] == b'}':
+            self.position = self.size
+            return
+
+        while True:
+            self._expect(position, b'"')
+            end = self._value_end(position)
+            key = self._load(position, end)
+            position = self._skip(end)
+            self._expect(position, b':')
+            position = self._skip(position + 1)
+
+            if key in RECORD_TYPES and self.record_key is None and data[position:position + 1] == b'[':
+                # Тип файла определяется по первому ключу списка записей
+                self.record_key = key
+                self.file_type = RECORD_TYPES[key]
+                self.header[key] = []
+                position = yield from self._records(position)
+            else:
+                end = self._value_end(position)
+                self.header[key] = self._load(position, end)
+                position = end
+
+            position = self._skip(position)
+            if self._expect(position, b',}') == b'}':
+                break
+            position = self._skip(position + 1)
+        self.position = self.size
+
+    def _records(self, position):
+        """Элементы списка по одному; возвращает позицию после списка"""
+        data = self._data
+        position = self._skip(position + 1)
+        if data[position:position + 1] == b']':
+            return position + 1
+        while True:
+            end = self._value_end(position)
+            record = self._load(position, end)
+            self.position = end
+            yield record
+            position = self._skip(end)
+            if self._expect(position, b',]') == b']':
+                return position + 1
+            position = self._skip(position + 1)
+
+
+def stream_records(path):
+    """Записи файла по одной (без заголовка)"""
+    yield from ConfigStream(path)
+
+
+def load_config_streaming(path):
+    """Полная загрузка файла через потоковый разбор (тот же результат, что load_config)"""
+    stream = ConfigStream(path)
+    records = list(stream)
+    if stream.record_key is not None:
+        stream.header[stream.record_key] = records
+    return stream.header
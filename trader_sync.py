@@ -0,0 +1,150 @@
+"""Сверка открытого документа с файлом, измененным на диске другой программой.
+
+Для файла запоминается его состояние на момент последней загрузки или
+записи (FileBase): отпечатки каждой записи по ключу (CategoryName для
+категорий, Id для торговцев и IDs) и ключей верхнего уровня. Когда файл
+меняется извне, новая версия сравнивается с этим состоянием и с документом:
+записи, измененные только на диске, применяются к документу, а измененные
+и на диске, и несохраненными правками в редакторе - считаются конфликтом.
+"""
+
+import json
+
+from trader_store import RECORD_KEYS, detect_file_type
+
+# Поле записи, по которому записи сопоставляются между версиями файла
+RECORD_ID_FIELDS = {"price": 'CategoryName', "general": 'Id', "ids": 'Id'}
+
+
+def record_fingerprint(record):
+    """Отпечаток записи, не зависящий от того, разобраны ли товары и от порядка ключей"""
+    items = []
+    for key in sorted(record):
+        value = record[key]
+        if key == 'Products':
+            value = tuple(product if type(product) is str else product.to_csv() for product in value)
+        else:
+            value = json.dumps(value, ensure_ascii=False, sort_keys=True)
+        items.append((key, value))
+    return hash(tuple(items))
+
+
+def value_fingerprint(value):
+    return hash(json.dumps(value, ensure_ascii=False, sort_keys=True))
+
+
+class FileBase:
+    """Состояние файла на диске, с которым сверяется документ.
+
+    records - ключ записи -> список отпечатков записей с этим ключом
+    (в порядке файла), header - ключ верхнего уровня -> отпечаток значения.
+    """
+
+    def __init__(self, file_type, identity=None):
+        self.file_type = file_type
+        self.identity = identity
+        self.records = {}
+        self.header = {}
+
+    @classmethod
+    def from_config(cls, config_data, identity=None):
+        base = cls(detect_file_type(config_data), identity)
+        base.add_header(config_data)
+        base.add_records(config_data.get(RECORD_KEYS.get(base.file_type), []))
+        return base
+
+    def add_header(self, config_data):
+        """Отпечатки ключей верхнего уровня, кроме списка записей"""
+        record_key = RECORD_KEYS.get(self.file_type)
+        for key, value in config_data.items():
+            if key != record_key:
+                self.header[key] = value_fingerprint(value)
+
+    def add_records(self, records):
+        """Отпечатки очередной порции записей"""
+        field = RECORD_ID_FIELDS.get(self.file_type)
+        if field is None:
+            return
+        for record in records:
+            self.records.setdefault(record.get(field), []).append(record_fingerprint(record))
+
+
+class ReloadPlan:
+    """Изменения с диска, которые нужно применить к документу.
+
+    steps - шаги документа (замена, удаление и добавление записей,
+    изменение ключей верхнего уровня),
+    conflicts - ключи записей, измененных и на диске, и в редакторе
+    (ключи верхнего уровня - в виде ('header', имя)),
+    keys - ключи записей, которые будут изменены.
+    """
+
+    def __init__(self):
+        self.steps = []
+        self.conflicts = []
+        self.keys = []
+
+    def __bool__(self):
+        return bool(self.steps or self.conflicts)
+
+
+def plan_reload(document, base, disk_data, disk_base, take_disk=False):
+    """Трехсторонняя сверка по записям: base - прежнее состояние файла,
+    disk_data/disk_base - новое, document - текущие данные редактора.
+
+    При take_disk=True конфликтующие записи тоже заменяются версией с диска.
+    """
+    plan = ReloadPlan()
+    field = RECORD_ID_FIELDS.get(document.file_type)
+    if field is None:
+        return plan
+
+    local_rows = {}
+    for row, record in enumerate(document.records()):
+        local_rows.setdefault(record.get(field), []).append(row)
+    disk_records = {}
+    for record in disk_data.get(RECORD_KEYS[document.file_type], []):
+        disk_records.setdefault(record.get(field), []).append(record)
+
+    sets, deletes, adds = [], [], []
+    for key in list(base.records) + [key for key in disk_base.records if key not in base.records]:
+        before = base.records.get(key)
+        after = disk_base.records.get(key)
+        if before == after:
+            continue
+        rows = local_rows.get(key, [])
+        local = [record_fingerprint(document.record(row)) for row in rows] or None
+        if local == after:
+            continue
+        if local != before:
+            plan.conflicts.append(key)
+            if not take_disk:
+                continue
+        plan.keys.append(key)
+        records = disk_records.get(key, [])
+        for row, record in zip(rows, records):
+            sets.append(('set_record', (row, record)))
+        deletes.extend(rows[len(records):])
+        adds.extend(('add_record', (record,)) for record in records[len(rows):])
+
+    # Удаления с конца, чтобы индексы остальных строк не сдвигались
+    plan.steps = sets + [('delete_record', (row,)) for row in sorted(deletes, reverse=True)] + adds
+
+    record_key = RECORD_KEYS[document.file_type]
+    for key in list(base.header) + [key for key in disk_base.header if key not in base.header]:
+        before = base.header.get(key)
+        after = disk_base.header.get(key)
+        if before == after:
+            continue
+        local = value_fingerprint(document.data[key]) if key in document.data and key != record_key else None
+        if local == after:
+            continue
+        if local != before:
+            plan.conflicts.append(('header', key))
+            if not take_disk:
+                continue
+        if key in disk_data:
+            plan.steps.append(('set_header', (key, disk_data[key])))
+        else:
+            plan.steps.append(('delete_header', (key,)))
+    return plan
@@ -0,0 +1,437 @@
+"""Общее оформление редактора: таблица стилей, иконки, шрифты, цвета и кисти.
+
+Таблица стилей приложения собирается один раз и ставится на QApplication
+(apply). Виджеты выбирают оформление свойствами role и tone (set_role)
+вместо собственных setStyleSheet, поэтому открытие окон и диалогов не
+разбирает стили заново. Иконки, шрифты, цвета и кисти создаются
+при первом запросе и дальше раздаются из кэша: модели отдают один и тот же
+объект для каждой строки.
+"""
+
+import os
+
+from PyQt5.QtGui import QBrush, QColor, QFont, QIcon, QPixmap
+
+ICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'icon.ico')
+
+# Именованные цвета для кода (таблица стилей пишет цвета напрямую)
+COLORS = {
+    'accent': "#3498db",
+    'highlight': "#ffc107",       # Золотистый фон найденных строк
+    'highlight_text': "#212529",  # Темный текст найденных строк
+    'error': "#c0392b",
+    'warning': "#b9770e",
+}
+
+# Шрифты: размер в пунктах и жирность
+FONTS = {
+    'app': (11, False),
+    'highlight': (14, True),
+}
+
+# Цвета кнопок: обычный, при наведении, при нажатии
+BUTTON_TONES = {
+    'green': ("#27ae60", "#229954", "#1e8449"),
+    'red': ("#e74c3c", "#c0392b", "#a93226"),
+    'teal': ("#16a085", "#138d75", "#117a65"),
+    'purple': ("#8e44ad", "#7d3c98", "#6c3483"),
+    'dark': ("#2c3e50", "#273746", "#212f3c"),
+    'orange': ("#f39c12", "#e67e22", "#d35400"),
+    'violet': ("#9b59b6", "#8e44ad", "#7d3c98"),
+    'gray': ("#7f8c8d", "#707b7c", "#616a6b"),
+    'blue': ("#3498db", "#2980b9", "#21618c"),
+}
+
+BASE_STYLE = """
+QMainWindow {
+    background-color: #f5f5f5;
+}
+
+QLabel {
+    font-size: 13px;
+    color: #333;
+}
+
+QLineEdit {
+    font-size: 13px;
+    padding: 8px 12px;
+    border: 2px solid #ddd;
+    border-radius: 6px;
+    background-color: white;
+}
+
+QLineEdit:focus {
+    border-color: #4CAF50;
+    outline: none;
+}
+
+QPushButton {
+    font-size: 13px;
+    font-weight: bold;
+    padding: 10px 20px;
+    border: none;
+    border-radius: 6px;
+    background-color: #4CAF50;
+    color: white;
+    min-width: 100px;
+}
+
+QPushButton:hover {
+    background-color: #45a049;
+}
+
+QPushButton:pressed {
+    background-color: #3d8b40;
+}
+
+QTreeView {
+    font-size: 13px;
+    border: 1px solid #ddd;
+    border-radius: 6px;
+    background-color: white;
+    alternate-background-color: #f8f9fa;
+    selection-background-color: #e3f2fd;
+}
+
+QTreeView::item {
+    padding: 8px;
+    border-bottom: 1px solid #eeeeee;
+}
+
+QTreeView::item:selected {
+    background-color: #2196F3;
+    color: white;
+}
+
+QTreeView::item:hover {
+    background-color: #e8f4f8;
+}
+
+QHeaderView::section {
+    font-size: 14px;
+    font-weight: bold;
+    padding: 12px;
+    border: none;
+    border-right: 1px solid #ddd;
+    border-bottom: 2px solid #4CAF50;
+    background-color: #fafafa;
+}
+
+QStatusBar {
+    font-size: 13px;
+    background-color: #34495e;
+    color: white;
+    border-top: 2px solid #3498db;
+    padding: 8px;
+    font-weight: bold;
+}
+"""
+
+# Надписи и поля ввода: role
+WIDGET_STYLE = """
+QLabel[role="file"] {
+    font-size: 13px;
+    color: #7f8c8d;
+    background-color: #ecf0f1;
+    padding: 8px 15px;
+    border-radius: 6px;
+    border: 1px solid #bdc3c7;
+}
+
+QLabel[role="file"][state="open"] {
+    color: #27ae60;
+    background-color: #d5f4e6;
+    border: 1px solid #27ae60;
+    font-weight: bold;
+}
+
+QLabel[role="drag_hint"] {
+    font-size: 16px;
+    color: #3498db;
+    background-color: #f8f9fa;
+    padding: 40px 30px;
+    border: 3px dashed #3498db;
+    border-radius: 15px;
+    margin: 10px;
+    font-weight: bold;
+}
+
+QLabel[role="search"] {
+    font-size: 14px;
+    font-weight: bold;
+    color: #34495e;
+    margin-right: 5px;
+}
+
+QLabel[role="problems"] {
+    font-size: 13px;
+    font-weight: bold;
+    color: #c0392b;
+}
+
+QLabel[role="validation"] {
+    font-size: 13px;
+    font-weight: bold;
+    color: #d35400;
+}
+
+QLabel[role="window_title"] {
+    color: #2c3e50;
+    font-size: 16px;
+    font-weight: bold;
+    padding: 10px;
+    margin: 5px;
+}
+
+QLabel[role="dialog_title"] {
+    font-size: 16px;
+    font-weight: bold;
+    color: #2c3e50;
+    padding: 10px;
+    margin-bottom: 10px;
+}
+
+QLabel[role="status"] {
+    font-size: 14px;
+    background-color: #34495e;
+    color: white;
+    border: 2px solid #3498db;
+    border-radius: 6px;
+    padding: 10px;
+    font-weight: bold;
+}
+
+QLabel[role="field"] {
+    font-size: 14px;
+    font-weight: bold;
+    color: #34495e;
+    padding: 5px;
+}
+
+QLineEdit[role="search"] {
+    font-size: 14px;
+    padding: 12px 16px;
+    border: 2px solid #bdc3c7;
+    border-radius: 8px;
+    background-color: white;
+}
+
+QLineEdit[role="search"]:focus {
+    border-color: #3498db;
+}
+
+QLineEdit[role="field"] {
+    font-size: 14px;
+    padding: 12px 15px;
+    border: 2px solid #bdc3c7;
+    border-radius: 6px;
+    background-color: white;
+    min-height: 20px;
+    max-height: 40px;
+}
+
+QLineEdit[role="field"]:focus {
+    border-color: #3498db;
+}
+"""
+
+# Таблицы: role="categories" (главное окно) и role="products" (окно товаров)
+TABLE_STYLE = """
+QTreeView[role="categories"], QTreeView[role="products"] {
+    font-size: 14px;
+    border: 2px solid #bdc3c7;
+    border-radius: 8px;
+    background-color: white;
+    alternate-background-color: #f8f9fa;
+    selection-background-color: #3498db;
+    gridline-color: #ecf0f1;
+}
+
+QTreeView[role="products"] {
+    font-family: 'Segoe UI', Arial, sans-serif;
+    outline: none;
+}
+
+QTreeView[role="categories"]::item {
+    padding: 12px 8px;
+    border-bottom: 1px solid #ecf0f1;
+    font-size: 14px;
+}
+
+QTreeView[role="products"]::item {
+    padding: 10px 8px;
+    border-bottom: 1px solid #ecf0f1;
+    font-size: 14px;
+    font-weight: normal;
+    height: 32px;
+}
+
+QTreeView[role="categories"]::item:selected, QTreeView[role="products"]::item:selected {
+    background-color: #3498db;
+    color: white;
+    font-weight: bold;
+}
+
+QTreeView[role="categories"]::item:hover, QTreeView[role="products"]::item:hover {
+    background-color: #e8f4f8;
+    color: #2c3e50;
+}
+
+QTreeView[role="categories"] QHeaderView::section, QTreeView[role="products"] QHeaderView::section {
+    font-weight: bold;
+    border: none;
+    border-right: 1px solid #bdc3c7;
+    border-bottom: 3px solid #3498db;
+    background-color: #ecf0f1;
+    color: #2c3e50;
+}
+
+QTreeView[role="categories"] QHeaderView::section {
+    font-size: 15px;
+    padding: 15px 10px;
+}
+
+QTreeView[role="products"] QHeaderView::section {
+    font-size: 13px;
+    font-family: 'Segoe UI', Arial, sans-serif;
+    padding: 12px 8px;
+    text-align: center;
+}
+
+QTreeView[role="products"] QHeaderView::section:first {
+    text-align: left;
+}
+
+QTreeView[role="categories"] QHeaderView::section:hover, QTreeView[role="products"] QHeaderView::section:hover {
+    background-color: #d5dbdb;
+}
+"""
+
+# Кнопки: размер задает role, цвет - tone (BUTTON_TONES)
+BUTTON_STYLE = """
+QPushButton[role="action"] {
+    font-size: 14px;
+    padding: 15px 25px;
+    border-radius: 8px;
+    margin: 5px;
+    min-width: 150px;
+}
+
+QPushButton[role="window"] {
+    font-size: 14px;
+    padding: 12px 20px;
+    border-radius: 8px;
+    margin: 5px;
+    min-width: 130px;
+}
+
+QPushButton[role="dialog"] {
+    font-size: 14px;
+}
+
+QPushButton[role="clear"] {
+    padding: 12px 20px;
+    border-radius: 8px;
+    margin-left: 10px;
+}
+"""
+
+TONE_STYLE = """
+QPushButton[tone="{tone}"] {{
+    background-color: {normal};
+}}
+
+QPushButton[tone="{tone}"]:hover {{
+    background-color: {hover};
+}}
+
+QPushButton[tone="{tone}"]:pressed {{
+    background-color: {pressed};
+}}
+"""
+
+_stylesheet = None
+_applied = None
+_icons = {}
+_fonts = {}
+_colors = {}
+_brushes = {}
+
+
+def stylesheet():
+    """Таблица стилей приложения (собирается один раз)"""
+    global _stylesheet
+    if _stylesheet is None:
+        tones = [TONE_STYLE.format(tone=tone, normal=normal, hover=hover, pressed=pressed)
+                 for tone, (normal, hover, pressed) in BUTTON_TONES.items()]
+        _stylesheet = "".join([BASE_STYLE, WIDGET_STYLE, TABLE_STYLE, BUTTON_STYLE] + tones)
+    return _stylesheet
+
+
+def apply(app):
+    """Оформление приложения; повторный вызов для того же приложения ничего не делает"""
+    global _applied
+    if app is None or _applied is app:
+        return
+    _applied = app
+    app.setStyle('Fusion')
+    app.setFont(font('app'))
+    app.setWindowIcon(icon())
+    app.setStyleSheet(stylesheet())
+
+
+def set_role(widget, role, tone=None):
+    """Выбор оформления виджета из таблицы стилей (до первого показа)"""
+    widget.setProperty('role', role)
+    if tone is not None:
+        widget.setProperty('tone', tone)
+
+
+def set_state(widget, state):
+    """Смена состояния уже показанного виджета: перерисовывается только он"""
+    if widget.property('state') == state:
+        return
+    widget.setProperty('state', state)
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
+
+
+def icon(name='app'):
+    """Иконка: для 'app' - icon.ico, который читается с диска один раз"""
+    cached = _icons.get(name)
+    if cached is None:
+        if name == 'app' and os.path.exists(ICON_PATH):
+            cached = QIcon(ICON_PATH)
+        else:
+            # Если файл не найден, используем простую синюю иконку
+            pixmap = QPixmap(32, 32)
+            pixmap.fill(color('accent'))
+            cached = QIcon(pixmap)
+        _icons[name] = cached
+    return cached
+
+
+def font(name):
+    cached = _fonts.get(name)
+    if cached is None:
+        size, bold = FONTS[name]
+        cached = QFont()
+        cached.setPointSize(size)
+        cached.setBold(bold)
+        _fonts[name] = cached
+    return cached
+
+
+def color(name):
+    cached = _colors.get(name)
+    if cached is None:
+        cached = _colors[name] = QColor(COLORS[name])
+    return cached
+
+
+def brush(name):
+    cached = _brushes.get(name)
+    if cached is None:
+        cached = _brushes[name] = QBrush(color(name))
+    return cached
@@ -0,0 +1,271 @@
+"""Проверка файла цен по набору правил.
+
+Правила регистрируются декоратором rule() и проверяют одну категорию:
+получают название и список товаров и возвращают пары (индекс товара или
+None, сообщение). Большие файлы делятся на порции категорий, которые
+проверяются в пуле процессов; результаты выдаются по мере готовности.
+После правки повторно проверяются только измененные категории.
+"""
+
+import importlib
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from trader_pricing import numeric_value
+from trader_store import HEADER_STEPS, Product, is_raw_products
+
+ERROR = "error"
+WARNING = "warning"
+
+SEVERITY_LABELS = {ERROR: "Ошибка", WARNING: "Предупреждение"}
+
+Rule = namedtuple('Rule', 'code severity description check')
+Finding = namedtuple('Finding', 'severity code category_index product_index message')
+
+RULES = {}
+
+
+def rule(code, severity, description):
+    """Регистрация правила проверки категории"""
+    def register(check):
+        RULES[code] = Rule(code, severity, description, check)
+        return check
+    return register
+
+
+NUMERIC_FIELDS = (
+    ('coefficient', "коэффициент"),
+    ('maxstock', "макс. запас"),
+    ('quantity', "количество"),
+    ('buy_price', "цена покупки"),
+    ('sell_price', "цена продажи"),
+)
+
+
+@rule('malformed', ERROR, "Строка товара содержит меньше шести полей")
+def check_malformed(name, products):
+    for index, product in enumerate(products):
+        if not product.is_valid:
+            yield index, f"Некорректная строка товара: {product.classname}"
+
+
+@rule('not_numeric', ERROR, "Нечисловое значение поля товара")
+def check_not_numeric(name, products):
+    for index, product in enumerate(products):
+        if product.is_valid:
+            for attribute, label in NUMERIC_FIELDS:
+                value = getattr(product, attribute)
+                if type(value) is str and numeric_value(value) is None:
+                    yield index, f"{product.classname}: {label} '{value}' не является числом"
+
+
+@rule('negative_value', ERROR, "Отрицательное значение, отличное от -1")
+def check_negative_value(name, products):
+    for index, product in enumerate(products):
+        if product.is_valid:
+            for attribute, label in NUMERIC_FIELDS:
+                value = numeric_value(getattr(product, attribute))
+                if value is not None and value < 0 and value != -1:
+                    yield index, f"{product.classname}: {label} {value}"
+
+
+@rule('sell_above_buy', WARNING, "Цена продажи выше цены покупки")
+def check_sell_above_buy(name, products):
+    for index, product in enumerate(products):
+        if product.is_valid:
+            buy = numeric_value(product.buy_price)
+            sell = numeric_value(product.sell_price)
+            if buy is not None and sell is not None and 0 <= buy < sell:
+                yield index, f"{product.classname}: продажа {sell} > покупка {buy}"
+
+
+@rule('duplicate_classname', WARNING, "Товар повторяется в категории")
+def check_duplicate_classname(name, products):
+    seen = set()
+    for index, product in enumerate(products):
+        if product.is_valid:
+            if product.classname in seen:
+                yield index, f"{product.classname} встречается в категории повторно"
+            seen.add(product.classname)
+
+
+@rule('empty_category', WARNING, "Категория без товаров")
+def check_empty_category(name, products):
+    if not products:
+        yield None, "В категории нет товаров"
+
+
+def validate_shard(shard, codes):
+    """Проверка порции категорий: shard - список (индекс, название, товары)"""
+    rules = [RULES[code] for code in codes]
+    findings = []
+    for category_index, name, products in shard:
+        if is_raw_products(products):
+            # Неразобранная категория документа разбирается только для проверки
+            products = [Product.from_csv(product) for product in products]
+        for current in rules:
+            for product_index, message in current.check(name, products):
+                findings.append(Finding(current.severity, current.code, category_index, product_index, message))
+    return findings
+
+
+def _import_rule_modules(modules):
+    # В процессах пула регистрируем дополнительные правила заново
+    for module in modules:
+        importlib.import_module(module)
+
+
+class Validator:
+    """Запуск правил по категориям, при большом файле - в пуле процессов.
+
+    modules - имена модулей с дополнительными правилами: они импортируются
+    в каждом процессе пула, чтобы правила были доступны и там.
+    """
+
+    PARALLEL_THRESHOLD = 100000
+    SHARD_PRODUCTS = 5000
+
+    def __init__(self, codes=None, modules=(), workers=None):
+        self.modules = tuple(modules)
+        _import_rule_modules(self.modules)
+        self.codes = list(codes) if codes is not None else list(RULES)
+        unknown = [code for code in self.codes if code not in RULES]
+        if unknown:
+            raise ValueError(f"Неизвестные правила: {', '.join(unknown)}. Доступны: {', '.join(RULES)}")
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = None
+
+    def shards(self, categories):
+        """Деление категорий на порции примерно по SHARD_PRODUCTS товаров"""
+        shard = []
+        size = 0
+        for index, category in enumerate(categories):
+            shard.append((index, category['CategoryName'], category['Products']))
+            size += len(category['Products'])
+            if size >= self.SHARD_PRODUCTS:
+                yield shard
+                shard = []
+                size = 0
+        if shard:
+            yield shard
+
+    def run(self, categories, cancelled=None):
+        """Проверка категорий; выдает списки находок по мере готовности порций.
+
+        Индексы категорий в находках - позиции в переданном списке.
+        cancelled - функция без аргументов, прерывающая проверку.
+        """
+        total = sum(len(category['Products']) for category in categories)
+        if total < self.PARALLEL_THRESHOLD or self.workers < 2:
+            for shard in self.shards(categories):
+                if cancelled is not None and cancelled():
+                    return
+                yield validate_shard(shard, self.codes)
+            return
+
+        executor = self._pool()
+        futures = [executor.submit(validate_shard, shard, self.codes) for shard in self.shards(categories)]
+        try:
+            for future in as_completed(futures):
+                if cancelled is not None and cancelled():
+                    return
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def validate(self, categories):
+        """Все находки одним списком"""
+        findings = []
+        for batch in self.run(categories):
+            findings.extend(batch)
+        return findings
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers, initializer=_import_rule_modules,
+                                                 initargs=(self.modules,))
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+class ValidationResults:
+    """Находки проверки документа с отслеживанием измененных категорий.
+
+    Подключается к документу как слушатель: категории, затронутые правкой,
+    помечаются измененными, и revalidate() проверяет только их.
+    Повторяющиеся названия категорий проверяются по индексу документа.
+    Подписчики (listeners) вызываются без аргументов после правки,
+    которая добавила измененные категории.
+    """
+
+    def __init__(self, document):
+        self.document = document
+        self.listeners = []
+        self._by_category = {}
+        self.dirty = {}
+
+    def clear(self):
+        self._by_category.clear()
+        self.dirty.clear()
+
+    def add(self, categories, findings):
+        """Добавление находок проверки списка categories.
+
+        Находки для категорий, измененных после начала проверки, пропускаются:
+        такие категории будут проверены заново.
+        """
+        for finding in findings:
+            category = categories[finding.category_index]
+            if id(category) in self.dirty:
+                continue
+            self._by_category.setdefault(id(category), (category, []))[1].append(finding)
+
+    def on_step(self, step, undo_step):
+        method, args = step
+        if method in HEADER_STEPS:
+            return
+        if method in ('set_product', 'add_product', 'insert_product', 'delete_product'):
+            category = self.document.record(args[0])
+            self.dirty[id(category)] = category
+            return
+        if method in ('set_record', 'delete_record'):
+            old = undo_step[1][-1]
+            self._by_category.pop(id(old), None)
+            self.dirty.pop(id(old), None)
+        if method != 'delete_record':
+            self.dirty[id(args[-1])] = args[-1]
+
+    def on_commit(self):
+        if self.dirty:
+            for listener in self.listeners:
+                listener()
+
+    def revalidate(self, validator):
+        """Повторная проверка измененных категорий, возвращает их количество"""
+        categories = list(self.dirty.values())
+        self.dirty.clear()
+        for category in categories:
+            self._by_category.pop(id(category), None)
+        self.add(categories, validator.validate(categories))
+        return len(categories)
+
+    def findings(self):
+        """Находки в порядке категорий с текущими индексами категорий"""
+        result = []
+        for category, findings in self._by_category.values():
+            category_index = self.document.record_position(category)
+            if category_index is not None:
+                result.extend(finding._replace(category_index=category_index) for finding in findings)
+        for name, categories in self.document.categories_by_name.items():
+            for category in categories[1:]:
+                result.append(Finding(WARNING, 'duplicate_category', self.document.record_position(category), None,
+                                      f"Категория '{name}' встречается повторно"))
+        result.sort(key=lambda finding: (finding.category_index,
+                                         -1 if finding.product_index is None else finding.product_index))
+        return result
@@ -0,0 +1,235 @@
+"""Рабочая область: файлы цен, торговцев и ID торговцев, открытые вместе.
+
+Файлы ссылаются друг на друга: IDs[].Categories - на CategoryName из файла
+цен, IDs[].Id - на Traders[].Id из файла торговцев. Рабочая область
+подписывается на изменения всех трех документов и при каждой правке
+перепроверяет только затронутые ею названия категорий и Id торговцев.
+"""
+
+import os
+
+from trader_io import load_config
+from trader_store import ConfigDocument
+
+WORKSPACE_FILES = {
+    "price": "TraderPlusPriceConfig.json",
+    "general": "TraderPlusGeneralConfig.json",
+    "ids": "TraderPlusIDsConfig.json",
+}
+
+# Виды проблем и их описания
+DANGLING_CATEGORY = "dangling_category"
+ORPHAN_CATEGORY = "orphan_category"
+UNKNOWN_TRADER = "unknown_trader"
+TRADER_WITHOUT_IDS = "trader_without_ids"
+
+PROBLEM_LABELS = {
+    DANGLING_CATEGORY: "Категория из IDs отсутствует в файле цен",
+    ORPHAN_CATEGORY: "Категория не используется ни одним торговцем",
+    UNKNOWN_TRADER: "Id из IDs отсутствует в файле торговцев",
+    TRADER_WITHOUT_IDS: "У торговца нет записи в IDs",
+}
+
+RECORD_STEPS = ('add_record', 'insert_record', 'set_record', 'delete_record')
+
+
+def changed_records(step, undo_step):
+    """Прежняя и новая запись для шага документа (None, если записи нет)"""
+    method = step[0]
+    old = undo_step[1][-1] if method in ('set_record', 'delete_record') else None
+    new = step[1][-1] if method != 'delete_record' else None
+    return old, new
+
+
+class _DocumentListener:
+    """Слушатель одного документа рабочей области"""
+
+    def __init__(self, workspace, file_type):
+        self.workspace = workspace
+        self.file_type = file_type
+
+    def on_step(self, step, undo_step):
+        if step[0] in RECORD_STEPS:
+            self.workspace._record_changed(self.file_type, *changed_records(step, undo_step))
+
+    def on_commit(self):
+        self.workspace._notify()
+
+
+class Workspace:
+    """Три документа TraderPlus с перекрестными индексами.
+
+    problems - словарь вид проблемы -> множество ключей (названий категорий
+    или Id торговцев). Подписчики (listeners) вызываются без аргументов
+    после каждой правки, изменившей список проблем.
+    """
+
+    def __init__(self):
+        self.documents = {}
+        self.paths = {}
+        self.listeners = []
+        self._listeners = {}
+        self.category_refs = {}
+        self.problems = {kind: set() for kind in PROBLEM_LABELS}
+        self._changed = False
+
+    @classmethod
+    def from_directory(cls, directory):
+        """Загрузка стандартных файлов TraderPlus из папки (отсутствующие пропускаются)"""
+        workspace = cls()
+        for file_type, name in WORKSPACE_FILES.items():
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                workspace.set_document(ConfigDocument(load_config(path)), path)
+        return workspace
+
+    def document(self, file_type):
+        return self.documents.get(file_type)
+
+    def set_document(self, document, path=None):
+        """Подключение документа (заменяет документ того же типа)"""
+        file_type = document.file_type
+        if file_type not in WORKSPACE_FILES:
+            raise ValueError(f"Неизвестный тип файла: {file_type}")
+        self.remove_document(file_type)
+        self.documents[file_type] = document
+        self.paths[file_type] = path
+        listener = self._listeners[file_type] = _DocumentListener(self, file_type)
+        document.listeners.append(listener)
+        self.rebuild()
+
+    def remove_document(self, file_type):
+        """Отключение документа"""
+        document = self.documents.pop(file_type, None)
+        self.paths.pop(file_type, None)
+        if document is None:
+            return
+        listener = self._listeners.pop(file_type)
+        if listener in document.listeners:
+            document.listeners.remove(listener)
+        self.rebuild()
+
+    # --- Перекрестные индексы ---
+
+    def rebuild(self):
+        """Полное построение индексов (при подключении и отключении файлов)"""
+        self.category_refs = {}
+        for kind in self.problems:
+            self.problems[kind].clear()
+        ids = self.documents.get("ids")
+        if ids is not None:
+            for entry in ids.records():
+                self._add_refs(entry)
+        names = set(self.category_refs)
+        price = self.documents.get("price")
+        if price is not None:
+            names.update(price.categories_by_name)
+        for name in names:
+            self._check_category(name)
+        trader_ids = set()
+        for file_type, index in (("general", 'traders_by_id'), ("ids", 'ids_by_id')):
+            document = self.documents.get(file_type)
+            if document is not None:
+                trader_ids.update(getattr(document, index))
+        for trader_id in trader_ids:
+            self._check_trader(trader_id)
+        self._changed = True
+        self._notify()
+
+    def _add_refs(self, entry):
+        for name in set(entry.get('Categories', [])):
+            self.category_refs[name] = self.category_refs.get(name, 0) + 1
+
+    def _remove_refs(self, entry):
+        for name in set(entry.get('Categories', [])):
+            count = self.category_refs.get(name, 0) - 1
+            if count > 0:
+                self.category_refs[name] = count
+            else:
+                self.category_refs.pop(name, None)
+
+    def _set_problem(self, kind, key, flagged):
+        problems = self.problems[kind]
+        if flagged and key not in problems:
+            problems.add(key)
+            self._changed = True
+        elif not flagged and key in problems:
+            problems.discard(key)
+            self._changed = True
+
+    def _check_category(self, name):
+        price = self.documents.get("price")
+        ids = self.documents.get("ids")
+        referenced = name in self.category_refs
+        exists = price is not None and name in price.categories_by_name
+        self._set_problem(DANGLING_CATEGORY, name, price is not None and referenced and not exists)
+        self._set_problem(ORPHAN_CATEGORY, name, ids is not None and exists and not referenced)
+
+    def _check_trader(self, trader_id):
+        general = self.documents.get("general")
+        ids = self.documents.get("ids")
+        in_general = general is not None and trader_id in general.traders_by_id
+        in_ids = ids is not None and trader_id in ids.ids_by_id
+        self._set_problem(UNKNOWN_TRADER, trader_id, general is not None and in_ids and not in_general)
+        self._set_problem(TRADER_WITHOUT_IDS, trader_id, ids is not None and in_general and not in_ids)
+
+    def _record_changed(self, file_type, old, new):
+        """Перепроверка ключей, затронутых заменой записи old на new"""
+        if file_type == "price":
+            for record in (old, new):
+                if record is not None:
+                    self._check_category(record['CategoryName'])
+            return
+        if file_type == "ids":
+            if old is not None:
+                self._remove_refs(old)
+            if new is not None:
+                self._add_refs(new)
+            for record in (old, new):
+                if record is not None:
+                    for name in set(record.get('Categories', [])):
+                        self._check_category(name)
+        for record in (old, new):
+            if record is not None:
+                self._check_trader(record.get('Id'))
+
+    def _notify(self):
+        if self._changed:
+            self._changed = False
+            for listener in self.listeners:
+                listener()
+
+    def category_traders(self):
+        """Торговцы каждой категории по файлу IDs: название категории -> список Id"""
+        result = {}
+        ids = self.documents.get("ids")
+        if ids is not None:
+            for entry in ids.records():
+                for name in dict.fromkeys(entry.get('Categories', [])):
+                    result.setdefault(name, []).append(entry.get('Id'))
+        return result
+
+    def trader_label(self, trader_id):
+        """Имя торговца из файла торговцев или его Id"""
+        general = self.documents.get("general")
+        traders = general.traders_by_id.get(trader_id) if general is not None else None
+        if traders and traders[0].get('GivenName'):
+            return traders[0]['GivenName']
+        return f"Id {trader_id}"
+
+    # --- Результаты ---
+
+    def problem_count(self):
+        return sum(len(keys) for keys in self.problems.values())
+
+    def problem_list(self):
+        """Проблемы в виде списка (вид, ключ), упорядоченного для показа"""
+        return [(kind, key)
+                for kind in PROBLEM_LABELS
+                for key in sorted(self.problems[kind], key=str)]
+
+    def describe(self, kind, key):
+        """Текст проблемы для показа пользователю"""
+        if kind in (DANGLING_CATEGORY, ORPHAN_CATEGORY):
+            return f"{PROBLEM_LABELS[kind]}: {key}"
+        return f"{PROBLEM_LABELS[kind]}: Id {key}"